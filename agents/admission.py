@@ -0,0 +1,181 @@
+"""
+Admission control for the chat pipeline.
+
+Limits how many questions are inside the Reef at once. Requests beyond the
+concurrency limit wait in a bounded queue; when the queue is full, or a request
+cannot be admitted within the queue timeout, it is rejected immediately with a
+Retry-After hint instead of joining an overloaded pipeline and timing out.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted to the pipeline."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded FIFO wait queue.
+
+    All methods must be called from the server event loop.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+    ):
+        """Initialize the controller (defaults come from settings)."""
+        self.max_concurrent = max_concurrent or settings.chat_max_concurrent_requests
+        self.max_queued = max_queued if max_queued is not None else settings.chat_max_queued_requests
+        self.queue_timeout = queue_timeout if queue_timeout is not None else settings.chat_queue_timeout_seconds
+
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        # Metrics
+        self._admitted = 0
+        self._rejected_queue_full = 0
+        self._rejected_timeout = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._total_service_seconds = 0.0
+        self._completed = 0
+
+    @property
+    def active(self) -> int:
+        """Requests currently inside the pipeline."""
+        return self._active
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests currently waiting for a slot."""
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def retry_after_seconds(self) -> int:
+        """Estimate how long a rejected client should back off."""
+        if self._completed == 0:
+            return settings.chat_retry_after_seconds
+
+        mean_service = self._total_service_seconds / self._completed
+        # Time for the current queue to drain through the available slots
+        estimate = mean_service * (self.queue_depth + 1) / self.max_concurrent
+        return max(1, math.ceil(estimate))
+
+    async def acquire(self) -> float:
+        """
+        Wait for a pipeline slot.
+
+        Returns:
+            Seconds spent waiting in the queue
+
+        Raises:
+            AdmissionRejected: 429 if the queue is full, 503 if the wait times out
+        """
+        start = time.monotonic()
+
+        if self._active < self.max_concurrent and self.queue_depth == 0:
+            self._active += 1
+            self._record_admission(0.0)
+            return 0.0
+
+        if self.queue_depth >= self.max_queued:
+            self._rejected_queue_full += 1
+            logger.warning(f"Admission rejected: queue full ({self.queue_depth} waiting)")
+            raise AdmissionRejected(429, "Too many concurrent requests, please retry later", self.retry_after_seconds())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # The releasing request hands its slot over by resolving the waiter.
+            # asyncio.wait (unlike wait_for) leaves the waiter alone on cancellation,
+            # so a slot handed over just before it can be passed on below.
+            done, _ = await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+        if not done:
+            waiter.cancel()
+            self._rejected_timeout += 1
+            logger.warning(f"Admission rejected: no slot within {self.queue_timeout}s")
+            raise AdmissionRejected(503, "Service busy, please retry later", self.retry_after_seconds())
+
+        waited = time.monotonic() - start
+        self._record_admission(waited)
+        return waited
+
+    def release(self, service_seconds: Optional[float] = None) -> None:
+        """
+        Return a pipeline slot, handing it to the oldest waiter if any.
+
+        Args:
+            service_seconds: Time the request spent in the pipeline (for Retry-After estimates)
+        """
+        if service_seconds is not None:
+            self._total_service_seconds += service_seconds
+            self._completed += 1
+
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self._active = max(0, self._active - 1)
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[float]:
+        """Hold a pipeline slot for the duration of the block."""
+        waited = await self.acquire()
+        start = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(time.monotonic() - start)
+
+    def _record_admission(self, waited: float) -> None:
+        """Update wait-time metrics for an admitted request."""
+        self._admitted += 1
+        self._total_wait_seconds += waited
+        self._max_wait_seconds = max(self._max_wait_seconds, waited)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of admission metrics."""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "active": self._active,
+            "queue_depth": self.queue_depth,
+            "admitted": self._admitted,
+            "rejected_queue_full": self._rejected_queue_full,
+            "rejected_timeout": self._rejected_timeout,
+            "avg_wait_ms": round(self._total_wait_seconds / self._admitted * 1000, 2) if self._admitted else 0.0,
+            "max_wait_ms": round(self._max_wait_seconds * 1000, 2),
+        }
+
+
+# Global admission controller for chat endpoints
+admission_controller = AdmissionController()
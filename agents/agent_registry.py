@@ -0,0 +1,116 @@
+"""
+Process-wide registry of agent instances and the shared OpenAI client.
+
+Praval handlers used to build a new agent object (and with it a new AsyncOpenAI
+client, connection pool and TLS session) for every Spore. The registry creates
+each agent once and hands all of them a single pooled AsyncOpenAI client, so
+connections are kept alive across the four or five LLM calls of a question.
+"""
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional, Type, TypeVar
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+A = TypeVar('A')
+
+
+class AgentRegistry:
+    """Lazily-built singletons for agents and their shared LLM client."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.RLock()
+        self._client: Optional[AsyncOpenAI] = None
+        self._agents: Dict[Type[Any], Any] = {}
+
+    def get_openai_client(self) -> AsyncOpenAI:
+        """
+        Get the shared AsyncOpenAI client, creating it on first use.
+
+        Returns:
+            AsyncOpenAI client with a pooled, keep-alive HTTP transport, or the
+            deterministic LocalLLMClient when llm_backend is "local"
+        """
+        with self._lock:
+            if self._client is None and settings.llm_backend == "local":
+                # Imported lazily: local_llm uses the query parser, which imports the agents
+                from local_llm import LocalLLMClient
+                self._client = LocalLLMClient()
+                logger.info("Local LLM stand-in client created (no network calls)")
+            elif self._client is None:
+                http_client = DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=settings.openai_max_connections,
+                        max_keepalive_connections=settings.openai_max_keepalive_connections,
+                        keepalive_expiry=settings.openai_keepalive_expiry_seconds,
+                    ),
+                    timeout=httpx.Timeout(
+                        settings.openai_timeout_seconds,
+                        connect=settings.openai_connect_timeout_seconds,
+                    ),
+                )
+                # Retries are handled by the LLM gateway, with jitter and a circuit breaker
+                self._client = AsyncOpenAI(
+                    api_key=settings.openai_api_key,
+                    http_client=http_client,
+                    max_retries=0,
+                )
+                logger.info(
+                    f"Shared OpenAI client created (max_connections={settings.openai_max_connections}, "
+                    f"keepalive={settings.openai_max_keepalive_connections})"
+                )
+            return self._client
+
+    def get(self, agent_cls: Type[A]) -> A:
+        """
+        Get the singleton instance of an agent class.
+
+        Args:
+            agent_cls: Agent class (e.g. ReportWriterAgent)
+
+        Returns:
+            Shared agent instance
+        """
+        agent = self._agents.get(agent_cls)
+        if agent is not None:
+            return agent
+
+        with self._lock:
+            if agent_cls not in self._agents:
+                self._agents[agent_cls] = agent_cls()
+            return self._agents[agent_cls]
+
+    def initialize(self, agent_classes: Iterable[Type[Any]]) -> None:
+        """
+        Eagerly build the shared client and agent instances.
+
+        Args:
+            agent_classes: Agent classes to instantiate
+        """
+        self.get_openai_client()
+        for agent_cls in agent_classes:
+            self.get(agent_cls)
+
+    async def aclose(self) -> None:
+        """Close the shared client and forget all instances."""
+        with self._lock:
+            client = self._client
+            self._client = None
+            self._agents.clear()
+
+        if client is not None:
+            await client.close()
+            logger.info("Shared OpenAI client closed")
+
+
+# Global registry instance
+agent_registry = AgentRegistry()
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Get the shared AsyncOpenAI client."""
+    return agent_registry.get_openai_client()
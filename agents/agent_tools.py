@@ -3,8 +3,7 @@ import json
 import math
 import statistics
 from typing import Dict, Any, List, Optional
-import httpx
-from config import settings
+from schema_registry import schema_registry
 import logging
 
 logger = logging.getLogger(__name__)
@@ -156,7 +155,7 @@ class StatisticalTools:
 
 
 class CubeJsTools:
-    """Tools for interacting with Cube.js semantic layer."""
+    """Tools for interacting with Cube.js semantic layer (answered from the schema registry)."""
 
     @staticmethod
     async def get_available_cubes() -> List[str]:
@@ -167,15 +166,8 @@ class CubeJsTools:
             List of cube names
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{settings.cubejs_api_url}/meta",
-                    headers={"Authorization": settings.cubejs_api_secret},
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                meta = response.json()
-                return [cube["name"] for cube in meta.get("cubes", [])]
+            await schema_registry.ensure_loaded()
+            return schema_registry.cube_names()
         except Exception as e:
             logger.error(f"Error fetching Cube.js meta: {e}")
             return []
@@ -192,19 +184,8 @@ class CubeJsTools:
             List of measure names
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{settings.cubejs_api_url}/meta",
-                    headers={"Authorization": settings.cubejs_api_secret},
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                meta = response.json()
-
-                for cube in meta.get("cubes", []):
-                    if cube["name"] == cube_name:
-                        return [m["name"] for m in cube.get("measures", [])]
-                return []
+            await schema_registry.ensure_loaded()
+            return schema_registry.measures(cube_name)
         except Exception as e:
             logger.error(f"Error fetching cube measures: {e}")
             return []
@@ -221,19 +202,8 @@ class CubeJsTools:
             List of dimension names
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{settings.cubejs_api_url}/meta",
-                    headers={"Authorization": settings.cubejs_api_secret},
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                meta = response.json()
-
-                for cube in meta.get("cubes", []):
-                    if cube["name"] == cube_name:
-                        return [d["name"] for d in cube.get("dimensions", [])]
-                return []
+            await schema_registry.ensure_loaded()
+            return schema_registry.dimensions(cube_name)
         except Exception as e:
             logger.error(f"Error fetching cube dimensions: {e}")
             return []
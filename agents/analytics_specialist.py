@@ -4,21 +4,29 @@ Analytics Specialist Agent.
 Data analyst specializing in press shop metrics and production analytics.
 Translates manufacturing questions into analytical queries and executes them.
 """
+import asyncio
 import json
 import logging
+import re
 import time
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from praval import agent, broadcast, Spore
 from models import CubeQuery
-from cubejs_client import cubejs_client
+from cubejs_client import cubejs_client, CubeQueryTimeout
+from query_dedupe import batch_query_deduplicator, speculative_queries
 from openai import AsyncOpenAI
 from config import settings
 from async_utils import run_async
+from cancellation import cancellation_registry, RequestCancelled
+from agent_registry import agent_registry
+from schema_registry import schema_registry
 
 logger = logging.getLogger(__name__)
 
-# Metric to Cube.js measure mapping by cube
-METRIC_MAPPING = {
+# Hand-written aliases the LLM and the query parser emit, by cube. The mappings
+# actually used (METRIC_MAPPING / DIMENSION_MAPPING below) are compiled from the
+# Cube.js schema; aliases whose target is no longer in the schema are dropped.
+METRIC_ALIASES = {
     "PressOperations": {
         "count": "PressOperations.count",
         "pass_rate": "PressOperations.passRate",
@@ -80,8 +88,7 @@ METRIC_MAPPING = {
     },
 }
 
-# Dimension mapping by cube
-DIMENSION_MAPPING = {
+DIMENSION_ALIASES = {
     "PressOperations": {
         "part_family": "PressOperations.partFamily",
         "press_line_id": "PressOperations.pressLineId",
@@ -110,6 +117,74 @@ DIMENSION_MAPPING = {
 }
 
 
+def _snake_case(name: str) -> str:
+    """camelCase member name -> snake_case alias (avgOee -> avg_oee)."""
+    return re.sub(r"(?<=[a-z0-9])([A-Z])", r"_\1", name).lower()
+
+
+def _compile_mapping(members_by_cube: Dict[str, List[str]], aliases: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+    """
+    Build alias -> member maps for the cubes in the schema.
+
+    Every member is reachable by its own name and its snake_case form; the
+    hand-written aliases are layered on top where their target exists.
+    """
+    compiled = {}
+    for cube_name, members in members_by_cube.items():
+        mapping = {}
+        for member in members:
+            short_name = member.split(".", 1)[1]
+            mapping[short_name] = member
+            mapping[_snake_case(short_name)] = member
+        stale = []
+        for alias, member in aliases.get(cube_name, {}).items():
+            if member in members:
+                mapping[alias] = member
+            else:
+                stale.append(alias)
+        if stale:
+            logger.warning(f"Dropping {cube_name} aliases whose members are not in the Cube.js schema: {stale}")
+        compiled[cube_name] = mapping
+    return compiled
+
+
+def _install(target: Dict[str, Dict[str, str]], compiled: Dict[str, Dict[str, str]]) -> None:
+    """Replace a mapping in place, one cube at a time, so importers keep a valid reference."""
+    for cube_name, mapping in compiled.items():
+        target[cube_name] = mapping
+    for cube_name in [name for name in target if name not in compiled]:
+        target.pop(cube_name, None)
+
+
+def compile_member_mappings() -> None:
+    """
+    Recompile METRIC_MAPPING / DIMENSION_MAPPING from the schema registry.
+
+    Called whenever the registry installs a new schema. Without a schema the
+    aliases are used as they are.
+    """
+    if not schema_registry.loaded:
+        _install(METRIC_MAPPING, {cube: dict(aliases) for cube, aliases in METRIC_ALIASES.items()})
+        _install(DIMENSION_MAPPING, {cube: dict(aliases) for cube, aliases in DIMENSION_ALIASES.items()})
+        return
+
+    cube_names = schema_registry.cube_names()
+    _install(METRIC_MAPPING, _compile_mapping(
+        {cube: schema_registry.measures(cube) for cube in cube_names}, METRIC_ALIASES
+    ))
+    _install(DIMENSION_MAPPING, _compile_mapping(
+        {cube: schema_registry.dimensions(cube) for cube in cube_names}, DIMENSION_ALIASES
+    ))
+    logger.info(f"Compiled member mappings for {len(cube_names)} cubes from the Cube.js schema")
+
+
+# Metric / dimension name -> Cube.js member, by cube
+METRIC_MAPPING: Dict[str, Dict[str, str]] = {}
+DIMENSION_MAPPING: Dict[str, Dict[str, str]] = {}
+compile_member_mappings()
+schema_registry.add_listener(compile_member_mappings)
+
+
 class AnalyticsSpecialistAgent:
     """
     Analytics Specialist Agent.
@@ -131,6 +206,9 @@ class AnalyticsSpecialistAgent:
 
         Returns:
             CubeQuery ready for execution
+
+        Raises:
+            ValueError: If the query does not match the Cube.js schema
         """
         cube_recommendation = enriched_request.get("cube_recommendation", "PressOperations")
 
@@ -225,15 +303,28 @@ class AnalyticsSpecialistAgent:
             limit=1000  # Default limit
         )
 
+        # Fail here, not after a round trip to Cube.js
+        schema_registry.validate_query(query)
+
         return query
 
-    async def execute_query(self, query: CubeQuery, session_id: str) -> Dict[str, Any]:
+    async def execute_query(
+        self,
+        query: CubeQuery,
+        session_id: str,
+        request_id: str = "",
+        deadline: Optional[float] = None,
+        batch_id: str = ""
+    ) -> Dict[str, Any]:
         """
         Execute Cube.js query and prepare data_ready Spore.
 
         Args:
             query: CubeQuery to execute
             session_id: Session identifier
+            request_id: Request correlation identifier
+            deadline: Absolute request deadline (epoch seconds), forwarded downstream
+            batch_id: /chat/batch identifier; identical queries in a batch run once
 
         Returns:
             data_ready knowledge payload
@@ -241,14 +332,27 @@ class AnalyticsSpecialistAgent:
         start_time = time.time()
 
         try:
+            # Reuse the Query Speculator's request if it predicted this exact query
+            result = None
+            speculative = speculative_queries.claim(request_id, query)
+            if speculative is not None:
+                try:
+                    result = await asyncio.wrap_future(speculative)
+                    logger.info(f"Request {request_id}: reused speculative Cube.js query")
+                except Exception as e:
+                    logger.warning(f"Speculative Cube.js query failed ({e}); executing it again")
+
             # Execute query
-            result = await self.client.execute_query(query)
+            if result is None:
+                result = await batch_query_deduplicator.execute(
+                    batch_id, query, lambda: self.client.execute_query(query, deadline)
+                )
 
             # Extract data
             query_results = result.get("data", [])
             row_count = len(query_results)
 
-            # Calculate query time
+            # Calculate query time (includes any "Continue wait" polling)
             query_time_ms = int((time.time() - start_time) * 1000)
 
             logger.info(f"Query executed successfully: {row_count} rows in {query_time_ms}ms")
@@ -266,6 +370,8 @@ class AnalyticsSpecialistAgent:
                 "row_count": row_count,
                 "query_time_ms": query_time_ms,
                 "session_id": session_id,
+                "request_id": request_id,
+                "deadline": deadline,
                 "metadata": metadata,
             }
 
@@ -350,11 +456,18 @@ def analytics_specialist_handler(spore: Spore):
     knowledge = spore.knowledge
     spore_type = knowledge.get("type")
     session_id = knowledge.get("session_id", "")
+    request_id = knowledge.get("request_id", "")
+    deadline = knowledge.get("deadline")
+    batch_id = knowledge.get("batch_id", "")
 
-    logger.info(f"Processing {spore_type} (session {session_id})")
+    if cancellation_registry.is_cancelled(request_id):
+        logger.info(f"Request {request_id} was cancelled - skipping {spore_type}")
+        return
 
-    # Initialize specialist
-    specialist = AnalyticsSpecialistAgent()
+    logger.info(f"Processing {spore_type} (session {session_id}, request {request_id})")
+
+    # Get shared specialist instance
+    specialist = agent_registry.get(AnalyticsSpecialistAgent)
 
     if spore_type == "domain_enriched_request":
         is_rejected = knowledge.get("is_rejected", False)
@@ -371,6 +484,8 @@ def analytics_specialist_handler(spore: Spore):
                 "row_count": 0,
                 "query_time_ms": 0,
                 "session_id": session_id,
+                "request_id": request_id,
+                "deadline": deadline,
                 "metadata": {"is_rejected": True, "rejection_reason": knowledge.get("rejection_reason")},
             })
             return
@@ -383,12 +498,26 @@ def analytics_specialist_handler(spore: Spore):
             logger.info(f"Built Cube.js query: {cube_query.model_dump(exclude_none=True)}")
 
             # Execute query and prepare data_ready Spore
-            data_ready = run_async(specialist.execute_query(cube_query, session_id))
+            data_ready = run_async(
+                specialist.execute_query(cube_query, session_id, request_id, deadline, batch_id),
+                request_id=request_id
+            )
+
+            if cancellation_registry.is_cancelled(request_id):
+                logger.info(f"Request {request_id} was cancelled - not broadcasting data_ready")
+                return
+
+            # A fallback enrichment answers a generic question, not the user's
+            if knowledge.get("degraded"):
+                data_ready["metadata"] = {**data_ready.get("metadata", {}), "degraded": True}
 
             # Broadcast data_ready for Visualization Specialist and Quality Inspector
             logger.info(f"Broadcasting data_ready: {data_ready['row_count']} rows")
             broadcast(data_ready)
 
+        except RequestCancelled:
+            logger.info(f"Request {request_id} was cancelled during query execution")
+
         except ValueError as e:
             logger.error(f"Query execution error: {str(e)}")
             broadcast({
@@ -400,9 +529,30 @@ def analytics_specialist_handler(spore: Spore):
                 "row_count": 0,
                 "query_time_ms": 0,
                 "session_id": session_id,
+                "request_id": request_id,
+                "deadline": deadline,
                 "metadata": {"error": str(e), "error_type": "query_error"},
             })
 
+        except CubeQueryTimeout as e:
+            logger.error(f"Query timeout: {str(e)}")
+            broadcast({
+                "type": "data_ready",
+                "query_results": [],
+                "cube_used": "Error",
+                "measures": [],
+                "dimensions": [],
+                "row_count": 0,
+                "query_time_ms": 0,
+                "session_id": session_id,
+                "request_id": request_id,
+                "deadline": deadline,
+                "metadata": {
+                    "error": "The data service is still preparing this query - please try again shortly",
+                    "error_type": "query_timeout",
+                },
+            })
+
         except ConnectionError as e:
             logger.error(f"Connection error: {str(e)}")
             broadcast({
@@ -414,6 +564,8 @@ def analytics_specialist_handler(spore: Spore):
                 "row_count": 0,
                 "query_time_ms": 0,
                 "session_id": session_id,
+                "request_id": request_id,
+                "deadline": deadline,
                 "metadata": {"error": "Cannot connect to data service", "error_type": "connection_error"},
             })
 
@@ -428,6 +580,8 @@ def analytics_specialist_handler(spore: Spore):
                 "row_count": 0,
                 "query_time_ms": 0,
                 "session_id": session_id,
+                "request_id": request_id,
+                "deadline": deadline,
                 "metadata": {"error": "Internal error processing query", "error_type": "internal_error"},
             })
 
@@ -1,17 +1,25 @@
 """FastAPI application for Manufacturing Analytics Agents."""
+import json
 import logging
 import uuid
 import asyncio
+import time
 from datetime import datetime
 from contextlib import asynccontextmanager
 from typing import Optional
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
 from config import settings
 from models import (
     ChatRequest,
     ChatResponse,
+    BatchChatRequest,
+    BatchChatResult,
+    BatchChatResponse,
+    DataVersionUpdate,
     ChatMessage,
     HealthResponse,
     SessionInfo,
@@ -19,7 +27,19 @@ from models import (
     AgentListResponse
 )
 from cubejs_client import cubejs_client
+from schema_registry import schema_registry
 from session_manager import session_manager
+from response_registry import response_registry
+from async_utils import start_background_loop, stop_background_loop, submit_async
+from agent_registry import agent_registry
+from admission import admission_controller, AdmissionRejected
+from deadlines import make_deadline, remaining_seconds
+from cancellation import cancellation_registry
+from query_dedupe import batch_query_deduplicator, speculative_queries
+from response_cache import response_cache, cache_key
+from data_version import data_version
+from llm_gateway import llm_gateway
+from llm_usage import usage_ledger
 
 # Import Praval infrastructure
 from reef_config import initialize_reef, cleanup_reef
@@ -31,6 +51,8 @@ import analytics_specialist
 import visualization_specialist
 import quality_inspector
 import report_writer
+import stream_relay
+import query_speculator
 
 # Configure logging
 logging.basicConfig(
@@ -45,6 +67,10 @@ async def lifespan(app: FastAPI):
     """Lifecycle manager for the application."""
     logger.info(f"Starting {settings.app_name} v{settings.app_version}")
 
+    # Start the shared event loop that agent handlers submit coroutines to
+    start_background_loop()
+    logger.info("✓ Background event loop started")
+
     # Initialize Praval Reef
     try:
         reef = initialize_reef()
@@ -54,21 +80,35 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"✗ Reef initialization error: {str(e)}")
 
-    # Check Cube.js connection on startup
-    try:
-        is_connected = await cubejs_client.health_check()
-        if is_connected:
-            logger.info("✓ Cube.js connection verified")
-        else:
-            logger.warning("⚠ Cube.js connection failed")
-    except Exception as e:
-        logger.error(f"✗ Cube.js connection error: {str(e)}")
+    # Build agent singletons and the shared, pooled OpenAI client once
+    agent_registry.initialize([
+        manufacturing_advisor.ManufacturingAdvisorAgent,
+        analytics_specialist.AnalyticsSpecialistAgent,
+        visualization_specialist.VisualizationSpecialistAgent,
+        quality_inspector.QualityInspectorAgent,
+        report_writer.ReportWriterAgent,
+    ])
+    logger.info("✓ Agent instances and shared OpenAI client initialized")
+
+    # Load the Cube.js schema once (this also verifies the connection and opens the
+    # pooled Cube.js HTTP client), then keep it fresh in the background
+    if await schema_registry.refresh():
+        logger.info("✓ Cube.js connection verified and schema loaded")
+    else:
+        logger.warning("⚠ Cube.js connection failed - schema will be retried in the background")
+    schema_registry.start_background_refresh()
 
     yield
 
     logger.info("Shutting down application")
+    await schema_registry.stop_background_refresh()
     cleanup_reef()
 
+    # The shared client's connections live on the background loop, so close it there
+    await asyncio.wrap_future(submit_async(agent_registry.aclose()))
+    await cubejs_client.aclose()
+    stop_background_loop()
+
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -99,13 +139,19 @@ async def root():
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
-    """Health check endpoint."""
-    cubejs_connected = await cubejs_client.health_check()
+    """
+    Health check endpoint.
+
+    Reports the schema registry's cached Cube.js status (kept fresh by its
+    background refresh) instead of fetching /meta on every call.
+    """
+    cubejs_connected = schema_registry.connected
 
     return HealthResponse(
         status="healthy" if cubejs_connected else "degraded",
         version=settings.app_version,
-        cubejs_connected=cubejs_connected
+        cubejs_connected=cubejs_connected,
+        cubejs_schema=schema_registry.status(),
     )
 
 
@@ -132,7 +178,9 @@ async def list_agents():
             "visualization_specialist": "Chart type selection and data visualization",
             "quality_inspector": "Anomaly detection and root cause analysis",
             "report_writer": "Narrative composition and insights generation",
-            "response_storage": "Response storage for HTTP endpoint"
+            "response_storage": "Response storage for HTTP endpoint",
+            "stream_relay": "Pipeline stage relay for streaming endpoint",
+            "query_speculator": "Speculative Cube.js execution during enrichment"
         }
 
         # Extract agent names from all channels
@@ -180,140 +228,470 @@ async def list_agents():
         raise HTTPException(status_code=500, detail="Failed to retrieve agent list")
 
 
+def _start_request(request: ChatRequest, batch_id: str = "") -> tuple[str, str, dict]:
+    """
+    Record the user message and build the user_query Spore knowledge.
+
+    Args:
+        request: Incoming chat request
+        batch_id: /chat/batch identifier, if the question is part of a batch
+
+    Returns:
+        Tuple of (session_id, request_id, user_query knowledge)
+    """
+    # Get or create session
+    session_id = request.session_id or str(uuid.uuid4())
+
+    if not session_manager.session_exists(session_id):
+        session_id = session_manager.create_session()
+
+    # Add user message to session
+    user_message = ChatMessage(
+        role="user",
+        content=request.message,
+        timestamp=datetime.now().isoformat()
+    )
+    session_manager.add_message(session_id, user_message)
+
+    # Get conversation context
+    context_messages = session_manager.get_context(session_id, max_messages=5)
+    context = [
+        {"role": msg.role, "content": msg.content}
+        for msg in context_messages[:-1]  # Exclude current message
+    ]
+
+    # Correlates every Spore of this question, so concurrent questions in one session never collide
+    request_id = str(uuid.uuid4())
+
+    logger.info(f"Processing message via Praval agents: '{request.message}' "
+                f"(session: {session_id}, request: {request_id})")
+
+    # Create user_query Spore knowledge
+    user_query_knowledge = {
+        "type": "user_query",
+        "message": request.message,
+        "session_id": session_id,
+        "request_id": request_id,
+        "context": context,
+        "timestamp": datetime.utcnow().isoformat(),
+        # Absolute deadline every agent checks before starting an LLM call
+        # Multiple LLM calls in sequence: Manufacturing Advisor -> Quality Inspector -> Report Writer
+        # Each can take 3-5 seconds, so allow sufficient time for the full pipeline
+        "deadline": make_deadline(settings.chat_timeout_seconds),
+        "batch_id": batch_id,
+    }
+
+    return session_id, request_id, user_query_knowledge
+
+
+def _broadcast_user_query(user_query_knowledge: dict) -> None:
+    """Broadcast the user_query Spore using Reef's API."""
+    logger.info(f"Broadcasting user_query Spore for request {user_query_knowledge['request_id']}")
+    reef = get_reef()
+    reef.broadcast(from_agent="chat_endpoint", knowledge=user_query_knowledge)
+
+
+def _to_chart_data(chart_spec: Optional[dict]) -> Optional[dict]:
+    """Convert a Visualization Specialist chart_spec to the ChartData shape, if supported."""
+    if not chart_spec:
+        return None
+
+    chart_type = chart_spec.get("type", "table")
+    if chart_type not in ["bar", "line", "table"]:
+        return None
+
+    return {
+        "chart_type": chart_type,
+        "data": chart_spec.get("data", {}),  # Chart.js format dict with labels/datasets
+        "options": chart_spec.get("options"),
+        "x_axis": None,
+        "y_axis": None,
+        "title": chart_spec.get("options", {}).get("plugins", {}).get("title", {}).get("text")
+    }
+
+
+def _timeout_response(session_id: str) -> ChatResponse:
+    """Record and build the fallback response for a request that timed out."""
+    assistant_message = ChatMessage(
+        role="assistant",
+        content="I'm analyzing your query. This is taking longer than expected. Please try again.",
+        timestamp=datetime.now().isoformat()
+    )
+    session_manager.add_message(session_id, assistant_message)
+
+    return ChatResponse(
+        message="Processing timeout. Please try again.",
+        session_id=session_id,
+        chart=None,
+        insights=None,
+        suggested_questions=["Can you rephrase your question?"]
+    )
+
+
+def _build_chat_response(final_response: dict, session_id: str) -> ChatResponse:
+    """Record the assistant message and convert final_response_ready knowledge to a ChatResponse."""
+    # Extract final response
+    narrative = final_response.get("narrative", "No response generated")
+    chart_spec = final_response.get("chart_spec")
+    follow_ups = final_response.get("follow_ups", [])
+
+    # Convert chart_spec to ChartData model if present
+    chart_data = _to_chart_data(chart_spec)
+
+    # Add assistant message to session
+    assistant_message = ChatMessage(
+        role="assistant",
+        content=narrative,
+        timestamp=datetime.now().isoformat()
+    )
+    session_manager.add_message(session_id, assistant_message)
+
+    # Extract insights from narrative (split by bullet points)
+    insights = [line.strip("• ").strip() for line in narrative.split("\n") if line.strip().startswith("•")]
+
+    return ChatResponse(
+        message=narrative,
+        session_id=session_id,
+        chart=chart_data,
+        insights=insights if insights else None,
+        suggested_questions=follow_ups[:3] if follow_ups else []
+    )
+
+
+def _with_debug(response: ChatResponse, request: ChatRequest, request_id: str, cache_hit: bool) -> ChatResponse:
+    """Attach the request's LLM usage to the response when the client asked for debug output."""
+    if request.debug:
+        response.debug = {
+            "request_id": request_id,
+            "cache_hit": cache_hit,
+            "llm_usage": usage_ledger.get(request_id),
+        }
+    return response
+
+
+def _admission_error(error: AdmissionRejected) -> HTTPException:
+    """Convert an admission rejection into a fast 429/503 with Retry-After."""
+    return HTTPException(
+        status_code=error.status_code,
+        detail=error.detail,
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+async def _wait_for_disconnect(http_request: Request) -> None:
+    """Return once the HTTP client has gone away."""
+    while True:
+        message = await http_request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format a Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 @app.post("/chat", response_model=ChatResponse, tags=["Chat"])
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """
     Main chat endpoint using Praval multi-agent system.
 
     Broadcasts user_query Spore and waits for final_response_ready from agents.
     """
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(http_request))
     try:
-        # Get or create session
-        session_id = request.session_id or str(uuid.uuid4())
-
-        if not session_manager.session_exists(session_id):
-            session_id = session_manager.create_session()
+        async with admission_controller.admit():
+            return await _process_chat(request, disconnected)
+    except AdmissionRejected as e:
+        raise _admission_error(e)
+    finally:
+        disconnected.cancel()
 
-        # Add user message to session
-        user_message = ChatMessage(
-            role="user",
-            content=request.message,
-            timestamp=datetime.now().isoformat()
-        )
-        session_manager.add_message(session_id, user_message)
-
-        # Get conversation context
-        context_messages = session_manager.get_context(session_id, max_messages=5)
-        context = [
-            {"role": msg.role, "content": msg.content}
-            for msg in context_messages[:-1]  # Exclude current message
-        ]
-
-        logger.info(f"Processing message via Praval agents: '{request.message}' (session: {session_id})")
-
-        # Create user_query Spore knowledge
-        user_query_knowledge = {
-            "type": "user_query",
-            "message": request.message,
-            "session_id": session_id,
-            "context": context,
-            "timestamp": datetime.utcnow().isoformat(),
-        }
 
-        # Broadcast user_query Spore using Reef's API
-        logger.info(f"Broadcasting user_query Spore for session {session_id}")
-        reef = get_reef()
-        reef.broadcast(from_agent="chat_endpoint", knowledge=user_query_knowledge)
-
-        # Wait for final_response_ready with timeout
-        # Since Praval agents process Spores asynchronously, we need to wait for the response
-        # Multiple LLM calls in sequence: Manufacturing Advisor -> Quality Inspector -> Report Writer
-        # Each can take 3-5 seconds, so allow sufficient time for the full pipeline
-        timeout_seconds = 30.0
-        poll_interval = 0.2
-        start_time = asyncio.get_event_loop().time()
+async def _process_chat(request: ChatRequest, disconnected: asyncio.Future, batch_id: str = ""):
+    """
+    Run one question through the Praval pipeline and wait for its response.
 
+    Args:
+        request: Chat request
+        disconnected: Future that completes when the HTTP client goes away
+        batch_id: /chat/batch identifier, if the question is part of a batch
+    """
+    try:
+        session_id, request_id, user_query_knowledge = _start_request(request, batch_id)
+
+        # Answer repeated questions from the cache without touching the Reef
+        key = None
+        if settings.response_cache_enabled:
+            key = cache_key(request.message, user_query_knowledge["context"], data_version.token)
+            cached_response = response_cache.get(key)
+            if cached_response is not None:
+                logger.info(f"Response cache hit (request {request_id})")
+                return _with_debug(_build_chat_response(cached_response, session_id), request, request_id, True)
+
+        # Register completion Future before broadcasting so a fast response is never missed
+        response_future = response_registry.register(request_id)
+
+        # Since Praval agents process Spores asynchronously, we await a Future that the
+        # Report Writer (or response storage agent) resolves as soon as the response exists
         final_response = None
 
-        # Create temporary response storage if not exists
-        if not hasattr(report_writer, '_pending_responses'):
-            report_writer._pending_responses = {}
-
-        while asyncio.get_event_loop().time() - start_time < timeout_seconds:
-            await asyncio.sleep(poll_interval)
+        try:
+            _broadcast_user_query(user_query_knowledge)
 
-            # Check if Report Writer has stored the response
-            if hasattr(report_writer, '_pending_responses'):
-                final_response = report_writer._pending_responses.get(session_id)
-                if final_response:
-                    # Clean up
-                    del report_writer._pending_responses[session_id]
-                    logger.info(f"Received final_response_ready for session {session_id}")
-                    break
+            timeout_seconds = max(0.0, remaining_seconds(user_query_knowledge["deadline"]))
+            await asyncio.wait(
+                {response_future, disconnected},
+                timeout=timeout_seconds,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if response_future.done():
+                final_response = response_future.result()
+                logger.info(f"Received final_response_ready for request {request_id}")
+        finally:
+            response_registry.discard(request_id)
 
-        # Timeout handling
         if final_response is None:
-            logger.error(f"Timeout waiting for final_response_ready (session {session_id})")
+            # Nobody will read the answer - stop the agents still working on it
+            cancellation_registry.cancel(request_id)
 
-            # Create fallback response
-            assistant_message = ChatMessage(
-                role="assistant",
-                content="I'm analyzing your query. This is taking longer than expected. Please try again.",
-                timestamp=datetime.now().isoformat()
-            )
-            session_manager.add_message(session_id, assistant_message)
-
-            return ChatResponse(
-                message="Processing timeout. Please try again.",
-                session_id=session_id,
-                chart=None,
-                insights=None,
-                suggested_questions=["Can you rephrase your question?"]
-            )
+            if disconnected.done() and not disconnected.cancelled():
+                logger.info(f"Client disconnected before response (request {request_id})")
+                return Response(status_code=499)
 
-        # Extract final response
-        narrative = final_response.get("narrative", "No response generated")
-        chart_spec = final_response.get("chart_spec")
-        follow_ups = final_response.get("follow_ups", [])
-
-        # Convert chart_spec to ChartData model if present
-        chart_data = None
-        if chart_spec:
-            chart_type = chart_spec.get("type", "table")
-            if chart_type in ["bar", "line", "table"]:
-                chart_data = {
-                    "chart_type": chart_type,
-                    "data": chart_spec.get("data", {}),  # Chart.js format dict with labels/datasets
-                    "options": chart_spec.get("options"),
-                    "x_axis": None,
-                    "y_axis": None,
-                    "title": chart_spec.get("options", {}).get("plugins", {}).get("title", {}).get("text")
-                }
-
-        # Add assistant message to session
-        assistant_message = ChatMessage(
-            role="assistant",
-            content=narrative,
-            timestamp=datetime.now().isoformat()
-        )
-        session_manager.add_message(session_id, assistant_message)
+            # Timeout handling
+            logger.error(f"Timeout waiting for final_response_ready (request {request_id})")
+            return _timeout_response(session_id)
 
-        # Extract insights from narrative (split by bullet points)
-        insights = [line.strip("• ").strip() for line in narrative.split("\n") if line.strip().startswith("•")]
+        # Degraded and error answers are not worth repeating to the next asker
+        if key is not None and final_response.get("narrative") and final_response.get("cacheable", True):
+            response_cache.put(key, final_response)
 
-        return ChatResponse(
-            message=narrative,
-            session_id=session_id,
-            chart=chart_data,
-            insights=insights if insights else None,
-            suggested_questions=follow_ups[:3] if follow_ups else []
-        )
+        return _with_debug(_build_chat_response(final_response, session_id), request, request_id, False)
 
     except Exception as e:
         logger.error(f"Unexpected error in chat endpoint: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+async def _process_batch_question(
+    question: str,
+    batch_id: str,
+    disconnected: asyncio.Future,
+    semaphore: asyncio.Semaphore
+) -> BatchChatResult:
+    """Run one batch question under the batch concurrency cap and admission control."""
+    async with semaphore:
+        # Don't start questions nobody is waiting for
+        if disconnected.done():
+            return BatchChatResult(question=question, error="Client disconnected")
+
+        try:
+            async with admission_controller.admit():
+                result = await _process_chat(ChatRequest(message=question), disconnected, batch_id)
+        except AdmissionRejected as e:
+            return BatchChatResult(question=question, error=e.detail)
+        except HTTPException as e:
+            return BatchChatResult(question=question, error=e.detail)
+
+    if not isinstance(result, ChatResponse):
+        return BatchChatResult(question=question, error="Client disconnected")
+
+    return BatchChatResult(question=question, response=result)
+
+
+@app.post("/chat/batch", response_model=BatchChatResponse, tags=["Chat"])
+async def chat_batch(request: BatchChatRequest, http_request: Request):
+    """
+    Batch chat endpoint for running many independent questions at once.
+
+    Questions run through the Praval pipeline concurrently (up to
+    chat_batch_max_concurrency), each in its own session. Identical Cube.js
+    queries within the batch are executed once. Results keep question order.
+    """
+    batch_id = str(uuid.uuid4())
+    start = time.monotonic()
+    logger.info(f"Processing batch {batch_id}: {len(request.questions)} questions")
+
+    semaphore = asyncio.Semaphore(settings.chat_batch_max_concurrency)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(http_request))
+    batch_query_deduplicator.open_batch(batch_id)
+
+    try:
+        results = await asyncio.gather(*[
+            _process_batch_question(question, batch_id, disconnected, semaphore)
+            for question in request.questions
+        ])
+    finally:
+        disconnected.cancel()
+        deduplicated = batch_query_deduplicator.close_batch(batch_id)
+
+    duration_ms = int((time.monotonic() - start) * 1000)
+    logger.info(f"Batch {batch_id} finished in {duration_ms}ms ({deduplicated} Cube.js queries shared)")
+
+    return BatchChatResponse(
+        batch_id=batch_id,
+        results=list(results),
+        deduplicated_queries=deduplicated,
+        duration_ms=duration_ms
+    )
+
+
+@app.post("/chat/stream", tags=["Chat"])
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint using Server-Sent Events.
+
+    Emits one event per pipeline stage as the agents complete it
+    (domain_enriched_request, data_ready, chart_ready, insights_ready),
+    narrative_delta events carrying the narrative text as the Report Writer
+    generates it, followed by final_response_ready carrying the full ChatResponse.
+    """
+    # Admit before the response starts so overload is reported with a proper status code
+    try:
+        await admission_controller.acquire()
+    except AdmissionRejected as e:
+        raise _admission_error(e)
+
+    slot_start = time.monotonic()
+    slot_released = False
+
+    def release_slot():
+        """Release the admission slot exactly once."""
+        nonlocal slot_released
+        if not slot_released:
+            slot_released = True
+            admission_controller.release(time.monotonic() - slot_start)
+
+    try:
+        session_id, request_id, user_query_knowledge = _start_request(request)
+        stage_queue = response_registry.open_stream(request_id)
+        response_future = response_registry.register(request_id)
+    except Exception as e:
+        release_slot()
+        logger.error(f"Unexpected error in chat stream endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    def finish_request():
+        """Drop the request's waiter and stage queue and free its slot (idempotent)."""
+        response_registry.discard(request_id)
+        response_registry.close_stream(request_id)
+        release_slot()
+
+    def stage_event(event: str, data: dict) -> str:
+        """Format a stage event, attaching the ChartData conversion to charts."""
+        if event == "chart_ready":
+            data = {**data, "chart": _to_chart_data(data.get("chart_spec"))}
+        return _sse_event(event, data)
+
+    async def event_stream():
+        deadline = user_query_knowledge["deadline"]
+        final_response = None
+        completed = False
+
+        try:
+            yield _sse_event("started", {"session_id": session_id, "request_id": request_id})
+            _broadcast_user_query(user_query_knowledge)
+
+            while final_response is None:
+                remaining = remaining_seconds(deadline)
+                if remaining <= 0:
+                    break
+
+                next_stage = asyncio.ensure_future(stage_queue.get())
+                done, _ = await asyncio.wait(
+                    {next_stage, response_future},
+                    timeout=remaining,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if next_stage in done:
+                    event, data = next_stage.result()
+                    yield stage_event(event, data)
+                else:
+                    next_stage.cancel()
+
+                if response_future.done():
+                    final_response = response_future.result()
+
+            # Flush stages that arrived together with the final response
+            while not stage_queue.empty():
+                event, data = stage_queue.get_nowait()
+                yield stage_event(event, data)
+
+            if final_response is None:
+                logger.error(f"Timeout waiting for final_response_ready (request {request_id})")
+                chat_response = _timeout_response(session_id)
+            else:
+                logger.info(f"Received final_response_ready for request {request_id}")
+                chat_response = _with_debug(
+                    _build_chat_response(final_response, session_id), request, request_id, False
+                )
+
+            completed = True
+            yield _sse_event("final_response_ready", chat_response.model_dump())
+
+        except Exception as e:
+            logger.error(f"Unexpected error in chat stream: {str(e)}", exc_info=True)
+            yield _sse_event("error", {"detail": "Internal server error"})
+
+        finally:
+            # Timed out, failed or the client went away (Starlette cancels the generator)
+            if not completed or final_response is None:
+                cancellation_registry.cancel(request_id)
+            finish_request()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Covers clients that disconnect before the stream is iterated (nothing was broadcast yet)
+        background=BackgroundTask(finish_request)
+    )
+
+
+@app.get("/metrics", tags=["Health"])
+async def metrics():
+    """Operational metrics for the chat pipeline."""
+    return {
+        "admission": admission_controller.stats(),
+        "pending_responses": response_registry.pending_count(),
+        "response_cache": response_cache.stats(),
+        "cubejs_cache": cubejs_client.cache.stats(),
+        "cubejs_polling": cubejs_client.poll_stats(),
+        "cubejs_schema": schema_registry.status(),
+        "enrichment_fast_path": agent_registry.get(manufacturing_advisor.ManufacturingAdvisorAgent).fast_path_stats(),
+        "chart_rules": agent_registry.get(visualization_specialist.VisualizationSpecialistAgent).rule_stats(),
+        "speculative_queries": speculative_queries.stats(),
+        "llm": llm_gateway.stats(),
+        "llm_usage": usage_ledger.stats(),
+        **data_version.info(),
+    }
+
+
+@app.get("/metrics/requests/{request_id}", tags=["Health"])
+async def request_usage(request_id: str):
+    """LLM tokens, cost and wall time of one recent request, per agent."""
+    usage = usage_ledger.get(request_id)
+    if usage is None:
+        raise HTTPException(status_code=404, detail="No LLM usage recorded for this request")
+    return {"request_id": request_id, **usage}
+
+
+@app.post("/data-version", tags=["Health"])
+async def update_data_version(request: DataVersionUpdate):
+    """
+    Record that the EL/dbt pipeline has refreshed the warehouse.
+
+    Called by the Airflow DAG after dbt tests pass. Cached answers and Cube.js
+    results for the previous data version are dropped.
+    """
+    data_version.bump(request.token)
+    response_cache.clear()
+    cubejs_client.cache.clear()
+    return data_version.info()
+
+
 @app.get("/session/{session_id}", response_model=SessionInfo, tags=["Session"])
 async def get_session(session_id: str):
     """Get session information."""
@@ -2,45 +2,194 @@
 Async utilities for running coroutines from synchronous Praval agent handlers.
 
 Praval agent handlers are synchronous, but they often need to call async functions
-(e.g., HTTP clients, LLM APIs). This module provides utilities to safely run
-async code from sync contexts without blocking an existing event loop.
+(e.g., HTTP clients, LLM APIs). This module owns one long-lived event loop running
+on a dedicated background thread; handlers submit coroutines to it instead of
+creating a new loop (and often a new thread) for every call. Because the loop
+outlives individual calls, pooled clients bound to it keep their connections.
 """
 import asyncio
 import concurrent.futures
 import logging
-from typing import TypeVar, Coroutine, Any
+import threading
+from typing import TypeVar, Coroutine, Any, Optional
+from cancellation import cancellation_registry, RequestCancelled
+from llm_usage import current_request_id
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+# Default time a handler waits for a submitted coroutine
+DEFAULT_TIMEOUT_SECONDS = 60.0
 
-def run_async(coro: Coroutine[Any, Any, T]) -> T:
+
+class BackgroundLoop:
+    """Event loop running forever on a daemon thread."""
+
+    def __init__(self, name: str = "praval-async-loop"):
+        """Initialize without starting the loop."""
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """The running loop, or None if not started."""
+        return self._loop
+
+    def is_running(self) -> bool:
+        """Check whether the background loop is up."""
+        return self._loop is not None and self._loop.is_running()
+
+    def in_loop_thread(self) -> bool:
+        """Check whether the caller is running on the background loop thread."""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """
+        Start the loop thread if it is not already running.
+
+        Returns:
+            The background event loop
+        """
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_loop():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            thread = threading.Thread(target=run_loop, name=self.name, daemon=True)
+            thread.start()
+            ready.wait()
+
+            self._loop = loop
+            self._thread = thread
+            logger.info(f"Background event loop '{self.name}' started")
+            return loop
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Cancel pending tasks, stop the loop and join its thread.
+
+        Args:
+            timeout: Seconds to wait for the thread to exit
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+
+        if loop is None:
+            return
+
+        async def cancel_pending():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_pending(), loop).result(timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Error cancelling background tasks: {e}")
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=timeout)
+        loop.close()
+        logger.info(f"Background event loop '{self.name}' stopped")
+
+
+# Shared loop for all agent handlers (started by the app lifespan)
+background_loop = BackgroundLoop()
+
+
+def start_background_loop() -> asyncio.AbstractEventLoop:
+    """Start the shared background loop (idempotent)."""
+    return background_loop.start()
+
+
+def stop_background_loop() -> None:
+    """Stop the shared background loop."""
+    background_loop.stop()
+
+
+def submit_async(coro: Coroutine[Any, Any, T]) -> "concurrent.futures.Future[T]":
+    """
+    Schedule a coroutine on the shared background loop without waiting.
+
+    The loop is started lazily so handlers also work outside the app lifespan
+    (scripts, tests).
+
+    Args:
+        coro: Async coroutine to execute
+
+    Returns:
+        concurrent.futures.Future for the coroutine result
+    """
+    loop = background_loop.start()
+    return asyncio.run_coroutine_threadsafe(coro, loop)
+
+
+async def _in_request(coro: Coroutine[Any, Any, T], request_id: str) -> T:
+    """Run a coroutine with current_request_id set, so its LLM usage is charged to the request."""
+    current_request_id.set(request_id)
+    return await coro
+
+
+def run_async(
+    coro: Coroutine[Any, Any, T],
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    request_id: str = "",
+) -> T:
     """
     Run an async coroutine from a synchronous context.
 
-    Handles both cases:
-    - No event loop running: Creates a new loop with asyncio.run()
-    - Event loop already running: Uses a thread pool to avoid blocking
+    Submits the coroutine to the shared background loop and blocks the calling
+    thread until it completes.
 
     Args:
         coro: Async coroutine to execute
+        timeout: Seconds to wait before cancelling the coroutine
+        request_id: Request the work belongs to; cancelling the request cancels the
+            coroutine, and LLM usage inside it is charged to the request
 
     Returns:
         Result of the coroutine
 
+    Raises:
+        RuntimeError: If called from the background loop thread itself
+        concurrent.futures.TimeoutError: If the coroutine does not finish in time
+        RequestCancelled: If the request was cancelled before or while the coroutine ran
+
     Example:
         result = run_async(some_async_function(arg1, arg2))
     """
+    if background_loop.in_loop_thread():
+        coro.close()
+        raise RuntimeError("run_async() cannot block the background loop it submits to; await the coroutine instead")
+
+    if cancellation_registry.is_cancelled(request_id):
+        coro.close()
+        raise RequestCancelled(request_id)
+
+    if request_id:
+        coro = _in_request(coro, request_id)
+
+    future = submit_async(coro)
+    cancellation_registry.track(request_id, future)
     try:
-        # Check if there's already a running event loop
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        # No running loop - safe to use asyncio.run()
-        return asyncio.run(coro)
-    else:
-        # There's a running loop - run in a separate thread to avoid blocking
-        logger.debug("Running async coroutine in thread pool (event loop already running)")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(asyncio.run, coro)
-            return future.result(timeout=60)  # 60 second timeout
+        return future.result(timeout=timeout)
+    except concurrent.futures.CancelledError:
+        raise RequestCancelled(request_id)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+    finally:
+        cancellation_registry.untrack(request_id, future)
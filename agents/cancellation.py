@@ -0,0 +1,115 @@
+"""
+Cancellation registry for in-flight agent work.
+
+When /chat times out or the HTTP client disconnects, the endpoint marks the
+request cancelled. Coroutines submitted through run_async for that request are
+cancelled on the background loop, and every handler checks the registry on
+entry and before broadcasting, so no further LLM or Cube.js calls are made and
+no downstream Spores are produced for an answer nobody will read.
+"""
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Set
+
+logger = logging.getLogger(__name__)
+
+# How long a cancelled request id is remembered (covers Spores still in the Reef)
+CANCELLED_TTL_SECONDS = 300.0
+
+
+class RequestCancelled(Exception):
+    """Raised when work is attempted for a cancelled request."""
+
+    def __init__(self, request_id: str):
+        super().__init__(f"Request {request_id} was cancelled")
+        self.request_id = request_id
+
+
+class CancellationRegistry:
+    """Tracks cancelled requests and the futures running on their behalf."""
+
+    def __init__(self, ttl_seconds: float = CANCELLED_TTL_SECONDS):
+        """Initialize an empty registry."""
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._cancelled: Dict[str, float] = {}
+        self._futures: Dict[str, Set[concurrent.futures.Future]] = {}
+        self._listeners: List[Callable[[str], None]] = []
+
+    def cancel(self, request_id: str) -> None:
+        """
+        Mark a request cancelled and cancel its in-flight coroutines.
+
+        Args:
+            request_id: Request correlation identifier
+        """
+        if not request_id:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._cancelled[request_id] = now
+            futures = self._futures.pop(request_id, set())
+            listeners = list(self._listeners)
+            # Forget old cancellations so the registry stays bounded
+            expired = [rid for rid, ts in self._cancelled.items() if now - ts > self.ttl_seconds]
+            for rid in expired:
+                del self._cancelled[rid]
+
+        for future in futures:
+            future.cancel()
+
+        for listener in listeners:
+            try:
+                listener(request_id)
+            except Exception as e:
+                logger.error(f"Cancellation listener failed for {request_id}: {e}")
+
+        logger.info(f"Cancelled request {request_id} ({len(futures)} in-flight calls)")
+
+    def is_cancelled(self, request_id: str) -> bool:
+        """Check whether a request has been cancelled."""
+        if not request_id:
+            return False
+        with self._lock:
+            return request_id in self._cancelled
+
+    def track(self, request_id: str, future: concurrent.futures.Future) -> None:
+        """
+        Associate a running coroutine future with a request.
+
+        The future is cancelled immediately if the request already was.
+        """
+        if not request_id:
+            return
+
+        with self._lock:
+            cancelled = request_id in self._cancelled
+            if not cancelled:
+                self._futures.setdefault(request_id, set()).add(future)
+
+        if cancelled:
+            future.cancel()
+
+    def untrack(self, request_id: str, future: concurrent.futures.Future) -> None:
+        """Forget a finished future."""
+        if not request_id:
+            return
+
+        with self._lock:
+            futures = self._futures.get(request_id)
+            if futures is not None:
+                futures.discard(future)
+                if not futures:
+                    del self._futures[request_id]
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """Register a callback invoked with the request id on cancellation."""
+        with self._lock:
+            self._listeners.append(listener)
+
+
+# Global cancellation registry
+cancellation_registry = CancellationRegistry()
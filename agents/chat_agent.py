@@ -1,9 +1,11 @@
 """Chat Agent: Manages conversation context and coordinates responses."""
 import logging
 from typing import Optional
-from openai import AsyncOpenAI
 from models import ChatMessage
 from config import settings
+from llm_gateway import llm_gateway
+from prompts import QUERY_INTENT_SYSTEM_PROMPT, CONVERSATION_SYSTEM_PROMPT
+from agent_registry import get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +15,7 @@ class ChatAgent:
 
     def __init__(self):
         """Initialize the Chat Agent."""
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = get_openai_client()
         self.model = settings.openai_model
 
     def build_context_string(self, messages: list[ChatMessage]) -> str:
@@ -35,34 +37,19 @@ class ChatAgent:
         Returns:
             True if a data query is needed, False for general chat
         """
-        prompt = f"""Determine if this user message requires querying automotive manufacturing analytics data.
-
-User message: "{user_message}"
+        prompt = f"""User message: "{user_message}"
 {f"Context: {context}" if context else ""}
-
-Respond with JSON: {{"requires_data_query": true/false, "reason": "brief explanation"}}
-
-Messages requiring data queries:
-- Specific questions about OEE, pass rates, quality metrics, production volumes
-- Requests for trends, comparisons, statistics on actual data
-- "What is the OEE?", "Show me defect trends", "Compare press lines", "Which shift is most productive?"
-- Cost analysis, shift performance, part family comparisons
-- "What's the cost per part?", "Show weekend vs weekday production"
-
-Messages NOT requiring data queries (respond conversationally):
-- Meta-questions about the system: "What datasets?", "What data is available?", "What can I ask?"
-- Schema/capability questions: "What metrics do you track?", "What press lines?", "What part families?"
-- Manufacturing domain education: "What is OEE?", "Explain SMED", "What's tonnage?"
-- Greetings: "hello", "hi", "hey"
-- Thank you messages
-- Clarification questions about previous responses
-- General conversation
 """
 
         try:
-            response = await self.client.chat.completions.create(
+            response = await llm_gateway.complete(
+                self.client,
+                "chat_agent",
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=[
+                    {"role": "system", "content": QUERY_INTENT_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
                 temperature=0.1,
                 max_tokens=150,
                 response_format={"type": "json_object"}
@@ -86,48 +73,9 @@ Messages NOT requiring data queries (respond conversationally):
         context: str = ""
     ) -> str:
         """Generate a conversational response without data query."""
-        system_prompt = """You are a helpful assistant for an automotive press manufacturing analytics system.
-
-Manufacturing Context:
-- 2 Press Lines: Line A (800T) produces door outer panels (left/right), Line B (1200T) produces bonnet outer panels
-- 3 Part Families: Door_Outer_Left, Door_Outer_Right, Bonnet_Outer
-- Material Grades: CRS_SPCC (cold rolled steel), HSLA_350, DP600 (high-strength steels)
-- Process: High-speed stamping with cycle times of 1.2-2.0 seconds per part
-- Quality Focus: OEE (Overall Equipment Effectiveness), defect analysis, first pass yield
-
-Available Data Sources:
-• PressOperations: Production-level data with full traceability
-  - Metrics: pass rate, OEE (availability, performance, quality rate), tonnage, cycle time, costs (material/labor/energy)
-  - Dimensions: part family, press line, die, material grade, coil, shift, operator, defect type
-  - Use for: Root cause analysis, shift performance, die/coil traceability, defect patterns
-
-• PartFamilyPerformance: Aggregated performance by part type
-  - Metrics: first pass yield, rework rate, OEE components, cost per part, material correlation (coil defect rate, yield/tensile strength)
-  - Dimensions: part family (Door Left/Right vs Bonnet), part type, material grade
-  - Use for: Part family comparison, material grade optimization, cost analysis
-
-• PressLineUtilization: Press line capacity and shift analysis
-  - Metrics: overall OEE, shift productivity (morning/afternoon/night), weekend vs weekday production, utilization rate (parts/day)
-  - Dimensions: press line (Line A vs Line B), part type
-  - Use for: Capacity planning, shift optimization, line comparison
-
-When users ask meta-questions like "What datasets?" or "What can I ask?", explain these data sources and automotive context clearly.
-
-Example questions to suggest:
-- "What's the OEE for each press line?"
-- "Which part family has the best quality?"
-- "Show me defect trends over time"
-- "Compare shift performance"
-- "Which material grade performs better?"
-- "What's the cost per part by line?"
-- "Show me weekend vs weekday production"
-- "Which defect types are most common?"
-
-Be friendly and concise. If asked about capabilities, explain what manufacturing data we track without overwhelming the user.
-"""
 
         messages = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": CONVERSATION_SYSTEM_PROMPT},
             {"role": "user", "content": user_message}
         ]
 
@@ -135,7 +83,9 @@ Be friendly and concise. If asked about capabilities, explain what manufacturing
             messages.insert(1, {"role": "assistant", "content": f"Previous context: {context}"})
 
         try:
-            response = await self.client.chat.completions.create(
+            response = await llm_gateway.complete(
+                self.client,
+                "chat_agent",
                 model=self.model,
                 messages=messages,
                 temperature=0.7,
@@ -1,4 +1,5 @@
 """Configuration settings for the analytics agents service."""
+from typing import Dict, Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -15,12 +16,69 @@ class Settings(BaseSettings):
     cubejs_api_url: str = "http://cubejs:4000/cubejs-api/v1"
     cubejs_api_secret: str = "mysecretkey1234567890abcdefghijkl"
 
+    # Persistent Cube.js HTTP connection pool and per-operation timeouts
+    cubejs_max_connections: int = 50
+    cubejs_max_keepalive_connections: int = 20
+    cubejs_keepalive_expiry_seconds: float = 30.0
+    cubejs_http2: bool = False  # Requires the h2 package (pip install httpx[http2])
+    cubejs_connect_timeout_seconds: float = 5.0
+    cubejs_query_timeout_seconds: float = 30.0
+    cubejs_meta_timeout_seconds: float = 10.0
+
+    # "Continue wait" polling (capped exponential backoff, bounded by the request deadline)
+    cubejs_poll_initial_delay_seconds: float = 0.2
+    cubejs_poll_max_delay_seconds: float = 2.0
+    cubejs_poll_max_wait_seconds: float = 60.0
+
+    # Cached Cube.js schema (/meta), refreshed in the background
+    schema_refresh_interval_seconds: float = 300.0
+    schema_refresh_retry_seconds: float = 15.0  # After a failed refresh
+
+    # Cube.js query-result cache (keyed by data version and canonical query)
+    cubejs_cache_enabled: bool = True
+    cubejs_cache_max_bytes: int = 64 * 1024 * 1024
+    cubejs_cache_ttl_seconds: float = 900.0
+    cubejs_cache_compression: Literal["off", "zstd", "zlib"] = "zstd"  # zstd needs the zstandard package, else zlib
+    cubejs_cache_compress_min_bytes: int = 16 * 1024
+
     # OpenAI Settings
     openai_api_key: str
     openai_model: str = "gpt-4o-mini"
     openai_temperature: float = 0.1
     openai_max_tokens: int = 1000
 
+    # LLM backend: "openai" or "local" (deterministic offline stand-in for benchmarks and CI)
+    llm_backend: Literal["openai", "local"] = "openai"
+    local_llm_latency_seconds: float = 0.2
+    local_llm_seconds_per_token: float = 0.0
+    local_llm_completion_tokens: int = 0  # 0 = estimate from the response text
+
+    # Shared OpenAI HTTP connection pool
+    openai_max_connections: int = 100
+    openai_max_keepalive_connections: int = 20
+    openai_keepalive_expiry_seconds: float = 30.0
+    openai_timeout_seconds: float = 60.0
+    openai_connect_timeout_seconds: float = 5.0
+
+    # LLM gateway: per-model concurrency, retries, hedging and circuit breaker
+    llm_model_concurrency: Dict[str, int] = {"gpt-4o": 8, "gpt-4o-mini": 32}
+    llm_default_concurrency: int = 16
+    llm_max_retries: int = 2
+    llm_retry_base_delay_seconds: float = 0.5
+    llm_retry_max_delay_seconds: float = 4.0
+    llm_hedging_enabled: bool = False
+    llm_hedge_percentile: float = 0.95
+    llm_hedge_min_samples: int = 20
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_reset_seconds: float = 30.0
+
+    # LLM usage accounting (USD per million tokens; requests kept for lookup)
+    llm_pricing_usd_per_million: Dict[str, Dict[str, float]] = {
+        "gpt-4o": {"prompt": 2.50, "completion": 10.00},
+        "gpt-4o-mini": {"prompt": 0.15, "completion": 0.60},
+    }
+    llm_usage_max_requests: int = 1000
+
     # Multi-Model Strategy
     model_quality_inspector: str = "gpt-4o"  # Complex reasoning
     model_report_writer: str = "gpt-4o"      # Narrative composition
@@ -28,6 +86,47 @@ class Settings(BaseSettings):
     model_analytics_specialist: str = "gpt-4o-mini"
     model_visualization_specialist: str = "gpt-4o-mini"
 
+    # Request deadline and per-stage budgets (minimum seconds left to attempt each LLM call)
+    chat_timeout_seconds: float = 30.0
+    budget_enrichment_seconds: float = 8.0
+    budget_chart_selection_seconds: float = 3.0
+    budget_insights_seconds: float = 6.0
+    budget_narrative_seconds: float = 6.0
+
+    # Chat admission control
+    chat_max_concurrent_requests: int = 32
+    chat_max_queued_requests: int = 64
+    chat_queue_timeout_seconds: float = 5.0
+    chat_retry_after_seconds: int = 5  # Used until service times are observed
+
+    # Batch chat
+    chat_batch_max_concurrency: int = 8  # Questions of one batch in the pipeline at once
+
+    # Rule-based enrichment fast path (skips the LLM for well-formed questions)
+    enrichment_fast_path_enabled: bool = True
+    enrichment_fast_path_min_confidence: float = 0.8
+
+    # Quality Inspector prompt digest (statistics always; raw rows only if they fit)
+    insights_digest_token_budget: int = 2000
+    insights_digest_top_k: int = 5
+
+    # Speculative Cube.js execution while the Manufacturing Advisor enriches the question
+    speculative_query_enabled: bool = True
+    speculative_query_min_confidence: float = 0.5
+    speculative_query_ttl_seconds: float = 60.0
+
+    # Deterministic chart-type rules: "on" (rules decide, LLM only for ambiguous shapes),
+    # "shadow" (LLM decides, agreement with the rules is measured) or "off" (LLM only)
+    chart_rules_mode: Literal["on", "shadow", "off"] = "on"
+
+    # Stream Report Writer narrative deltas to /chat/stream clients
+    narrative_streaming_enabled: bool = True
+
+    # Final-answer cache (keyed by question, context and data version)
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 512
+    response_cache_ttl_seconds: float = 3600.0
+
     # Session Settings
     max_session_messages: int = 30  # Increased from 10 for better context
     session_timeout_minutes: int = 30
@@ -1,15 +1,76 @@
 """Cube.js API client wrapper with error handling."""
+import asyncio
+import json
 import logging
-from typing import Any, Optional
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
 import httpx
 from models import CubeQuery
 from config import settings
+from data_version import data_version
+from deadlines import remaining_seconds
+from query_cache import QueryResultCache
 
 logger = logging.getLogger(__name__)
 
+# Cube.js body for a query that is still being computed
+CONTINUE_WAIT = "Continue wait"
+
+
+class CubeQueryTimeout(TimeoutError):
+    """A Cube.js query was still running ("Continue wait") when time ran out."""
+
+
+def _canonical_filter(item: dict[str, Any]) -> dict[str, Any]:
+    """Filter (or nested and/or group) with order-insensitive values and members."""
+    item = dict(item)
+    for group in ("and", "or"):
+        if group in item:
+            item[group] = sorted(
+                (_canonical_filter(member) for member in item[group]),
+                key=lambda member: json.dumps(member, sort_keys=True, default=str),
+            )
+    if isinstance(item.get("values"), list):
+        item["values"] = sorted(item["values"], key=str)
+    return item
+
+
+def canonical_query_key(query: CubeQuery) -> str:
+    """
+    Stable key for a Cube.js query.
+
+    Queries that differ only in the order of measures, dimensions, filters or
+    filter values return the same rows, so they map to the same key. None
+    fields are dropped; the order of sort keys is kept, since it is significant.
+    """
+    payload = query.model_dump(exclude_none=True)
+    for field in ("measures", "dimensions"):
+        if field in payload:
+            payload[field] = sorted(payload[field])
+    if "filters" in payload:
+        payload["filters"] = [_canonical_filter(item) for item in payload["filters"]]
+    for field in ("filters", "timeDimensions"):
+        if field in payload:
+            payload[field] = sorted(payload[field], key=lambda item: json.dumps(item, sort_keys=True, default=str))
+    if "order" in payload:
+        payload["order"] = list(payload["order"].items())
+    return json.dumps(payload, sort_keys=True, default=str)
+
 
 class CubeJSClient:
-    """Client for interacting with Cube.js API."""
+    """
+    Client for interacting with Cube.js API.
+
+    HTTP connections are pooled and kept alive across queries instead of
+    opening a new connection per call. httpx clients cannot be shared between
+    event loops, so one pooled client is kept per loop (in practice the server
+    loop and the agents' background loop); aclose() releases all of them.
+
+    Successful query results are cached by data version and canonical query
+    (see query_cache), so identical queries from different sessions reach
+    Cube.js once per data version and TTL.
+    """
 
     def __init__(self, api_url: Optional[str] = None, api_secret: Optional[str] = None):
         """Initialize Cube.js client."""
@@ -19,21 +80,167 @@ class CubeJSClient:
             "Content-Type": "application/json",
             "Authorization": self.api_secret
         }
+        self._lock = threading.Lock()
+        self._http_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self.cache = QueryResultCache()
 
-    async def execute_query(self, query: CubeQuery) -> dict[str, Any]:
-        """Execute a Cube.js query and return results."""
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.api_url}/load",
-                    json={"query": query.model_dump(exclude_none=True)},
-                    headers=self.headers
+        # "Continue wait" polling metrics
+        self._polled_queries = 0
+        self._polls = 0
+        self._poll_timeouts = 0
+        self._poll_wait_seconds = 0.0
+
+    def _new_http_client(self) -> httpx.AsyncClient:
+        """Build a pooled, keep-alive HTTP client from the connection settings."""
+        http2 = settings.cubejs_http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("CUBEJS_HTTP2 is enabled but the h2 package is not installed; using HTTP/1.1")
+                http2 = False
+
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.cubejs_max_connections,
+                max_keepalive_connections=settings.cubejs_max_keepalive_connections,
+                keepalive_expiry=settings.cubejs_keepalive_expiry_seconds,
+            ),
+            timeout=httpx.Timeout(
+                settings.cubejs_query_timeout_seconds,
+                connect=settings.cubejs_connect_timeout_seconds,
+            ),
+            http2=http2,
+        )
+
+    def http_client(self) -> httpx.AsyncClient:
+        """
+        Get the pooled HTTP client of the running event loop, creating it on first use.
+
+        Returns:
+            Long-lived httpx.AsyncClient (do not close it; use aclose())
+        """
+        loop = asyncio.get_running_loop()
+        client = self._http_clients.get(loop)
+        if client is not None and not client.is_closed:
+            return client
+
+        with self._lock:
+            # Forget clients of loops that no longer exist
+            for stale_loop in [known for known in self._http_clients if known.is_closed()]:
+                del self._http_clients[stale_loop]
+
+            client = self._http_clients.get(loop)
+            if client is None or client.is_closed:
+                client = self._new_http_client()
+                self._http_clients[loop] = client
+                logger.info(
+                    f"Cube.js HTTP client created (max_connections={settings.cubejs_max_connections}, "
+                    f"keepalive={settings.cubejs_max_keepalive_connections})"
                 )
-                response.raise_for_status()
-                result = response.json()
+            return client
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP clients of every event loop."""
+        with self._lock:
+            clients = list(self._http_clients.items())
+            self._http_clients.clear()
+
+        current_loop = asyncio.get_running_loop()
+        for loop, client in clients:
+            try:
+                if loop is current_loop:
+                    await client.aclose()
+                elif loop.is_running():
+                    # Connections belong to their loop, so close them there
+                    await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), loop))
+            except Exception as e:
+                logger.warning(f"Error closing Cube.js HTTP client: {e}")
+
+        if clients:
+            logger.info("Cube.js HTTP clients closed")
+
+    async def execute_query(self, query: CubeQuery, deadline: Optional[float] = None) -> dict[str, Any]:
+        """
+        Execute a Cube.js query and return results (from the result cache when possible).
 
-                logger.info(f"Query executed successfully: {query.measures or query.dimensions}")
-                return result
+        While Cube.js is still computing the result (e.g. building
+        pre-aggregations) it answers "Continue wait"; the query is then polled
+        again with capped exponential backoff until it completes, the request
+        deadline passes or cubejs_poll_max_wait_seconds elapse.
+
+        Args:
+            query: Cube.js query
+            deadline: Absolute request deadline (epoch seconds), or None
+
+        Returns:
+            Cube.js response payload
+
+        Raises:
+            ValueError: Cube.js rejected the query
+            ConnectionError: Cube.js is unreachable
+            CubeQueryTimeout: The query was still running when time ran out
+        """
+        cache_key = None
+        if settings.cubejs_cache_enabled:
+            cache_key = f"{data_version.token}:{canonical_query_key(query)}"
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Query served from cache: {query.measures or query.dimensions}")
+                return cached
+
+        started = time.monotonic()
+        wait_until = started + settings.cubejs_poll_max_wait_seconds
+        remaining = remaining_seconds(deadline)
+        if remaining is not None:
+            wait_until = min(wait_until, started + remaining)
+
+        delay = settings.cubejs_poll_initial_delay_seconds
+        polls = 0
+        while True:
+            result = await self._load(query, wait_until - time.monotonic())
+            if result.get("error") != CONTINUE_WAIT:
+                break
+
+            polls += 1
+            time_left = wait_until - time.monotonic()
+            if time_left <= 0:
+                self._record_poll(polls, time.monotonic() - started, timed_out=True)
+                logger.warning(f"Cube.js query still running after {polls} polls: {query.measures or query.dimensions}")
+                raise CubeQueryTimeout(
+                    f"Cube.js query still running after {time.monotonic() - started:.1f}s"
+                )
+            await asyncio.sleep(min(delay, time_left))
+            delay = min(delay * 2, settings.cubejs_poll_max_delay_seconds)
+
+        if polls:
+            self._record_poll(polls, time.monotonic() - started, timed_out=False)
+            logger.info(f"Cube.js query ready after {polls} \"Continue wait\" polls")
+
+        if "error" in result:
+            logger.error(f"Cube.js query error: {result['error']}")
+            raise ValueError(f"Cube.js query failed: {result['error']}")
+
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+
+        logger.info(f"Query executed successfully: {query.measures or query.dimensions}")
+        return result
+
+    async def _load(self, query: CubeQuery, time_left: float) -> dict[str, Any]:
+        """One /load request, bounded by the query timeout and the time left."""
+        try:
+            response = await self.http_client().post(
+                f"{self.api_url}/load",
+                json={"query": query.model_dump(exclude_none=True)},
+                headers=self.headers,
+                timeout=httpx.Timeout(
+                    max(0.1, min(settings.cubejs_query_timeout_seconds, time_left)),
+                    connect=settings.cubejs_connect_timeout_seconds,
+                ),
+            )
+            response.raise_for_status()
+            return response.json()
 
         except httpx.HTTPStatusError as e:
             logger.error(f"Cube.js HTTP error: {e.response.status_code} - {e.response.text}")
@@ -45,16 +252,58 @@ class CubeJSClient:
             logger.error(f"Unexpected error executing query: {str(e)}")
             raise
 
+    def _record_poll(self, polls: int, seconds: float, timed_out: bool) -> None:
+        """Count a query that had to be polled."""
+        with self._lock:
+            self._polled_queries += 1
+            self._polls += polls
+            self._poll_wait_seconds += seconds
+            if timed_out:
+                self._poll_timeouts += 1
+
+    def poll_stats(self) -> Dict[str, Any]:
+        """How often and how long queries waited on "Continue wait"."""
+        with self._lock:
+            return {
+                "polled_queries": self._polled_queries,
+                "polls": self._polls,
+                "timeouts": self._poll_timeouts,
+                "wait_seconds": round(self._poll_wait_seconds, 3),
+            }
+
     async def get_meta(self) -> dict[str, Any]:
         """Fetch Cube.js metadata (available cubes, measures, dimensions)."""
+        meta, _ = await self.fetch_meta()
+        return meta
+
+    async def fetch_meta(self, etag: Optional[str] = None) -> Tuple[Optional[dict[str, Any]], Optional[str]]:
+        """
+        Fetch Cube.js metadata, conditionally on a previously seen ETag.
+
+        Args:
+            etag: ETag of the copy already held (sent as If-None-Match)
+
+        Returns:
+            (metadata, ETag of the response); metadata is None if not modified
+        """
+        headers = dict(self.headers)
+        if etag:
+            headers["If-None-Match"] = etag
+
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{self.api_url}/meta",
-                    headers=self.headers
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self.http_client().get(
+                f"{self.api_url}/meta",
+                headers=headers,
+                timeout=httpx.Timeout(
+                    settings.cubejs_meta_timeout_seconds,
+                    connect=settings.cubejs_connect_timeout_seconds,
+                ),
+            )
+            if etag and response.status_code == 304:
+                return None, etag
+            response.raise_for_status()
+            response_etag = response.headers.get("etag")
+            return response.json(), response_etag if isinstance(response_etag, str) else None
 
         except Exception as e:
             logger.error(f"Error fetching metadata: {str(e)}")
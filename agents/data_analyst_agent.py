@@ -2,9 +2,11 @@
 import json
 import logging
 from typing import Any, Optional
-from openai import AsyncOpenAI
 from models import CubeQuery, ChartData
 from config import settings
+from llm_gateway import llm_gateway
+from prompts import SCHEMA_CONTEXT, QUERY_TRANSLATION_SYSTEM_PROMPT, DATA_INSIGHTS_SYSTEM_PROMPT
+from agent_registry import get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -14,71 +16,11 @@ class DataAnalystAgent:
 
     def __init__(self):
         """Initialize the Data Analyst Agent."""
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = get_openai_client()
         self.model = settings.openai_model
 
         # Domain knowledge: Available cubes and their measures/dimensions
-        self.schema_context = """
-Automotive Press Manufacturing Analytics Schema:
-
-1. PressOperations Cube (fact_press_operations):
-   - Measures: count, passedCount, failedCount, passRate, avgOee, avgAvailability, avgPerformance, avgQualityRate,
-              avgTonnage, avgCycleTime, avgStrokeRate, totalCost, avgCostPerPart, avgMaterialCost, avgLaborCost,
-              avgEnergyCost, avgSurfaceDeviation, defectCount, reworkCount
-   - Dimensions: partFamily (Door_Outer_Left, Door_Outer_Right, Bonnet_Outer), pressLineId, lineName, dieId,
-                partType (Door/Bonnet), materialGrade (CRS_SPCC, HSLA_350, DP600), coilId, shiftId, operatorId,
-                qualityStatus, defectType, defectSeverity, tonnageCategory, oeeCategory, productionDate, isWeekend
-   - Use for: Production-level analysis, OEE breakdown, defect analysis, shift comparison, die/coil traceability
-
-2. PartFamilyPerformance Cube (agg_part_family_performance):
-   - Measures: totalPartsProduced, partsPassed, partsFailed, firstPassYield, reworkRate, uniqueDefectTypes,
-              avgOee, avgAvailability, avgPerformance, avgQualityRate, avgTonnage, avgCycleTime,
-              avgCostPerPart, totalProductionCost, avgMaterialCost, avgLaborCost, avgCoilDefectRate,
-              avgMaterialYieldStrength, avgMaterialTensileStrength, productionDays
-   - Dimensions: partFamily, partType (Door/Bonnet), materialGrade
-   - Use for: Part family comparison (Door Left vs Door Right vs Bonnet), material grade performance,
-             first pass yield analysis, cost per part optimization
-
-3. PressLineUtilization Cube (agg_press_line_utilization):
-   - Measures: totalPartsProduced, totalPartsPassed, totalPartsFailed, avgPassRate, overallAvgOee,
-              overallAvgAvailability, overallAvgPerformance, overallAvgQualityRate, avgTonnage, avgCycleTime,
-              totalCost, avgCostPerUnit, totalProductionDays, totalBatches, totalOperatorShifts, totalDefects,
-              totalRework, weekendParts, weekdayParts, weekendProductionPct, morningShiftParts, afternoonShiftParts,
-              nightShiftParts, utilizationRate
-   - Dimensions: pressLineId, lineName (LINE_A/LINE_B), partType
-   - Use for: Press line capacity planning, shift utilization, weekend vs weekday analysis,
-             Line A (800T) vs Line B (1200T) comparison
-
-Automotive Manufacturing Domain:
-- OEE (Overall Equipment Effectiveness) = Availability × Performance × Quality Rate
-- Availability: Uptime / Planned production time
-- Performance: Actual output / Target output (at design cycle time)
-- Quality Rate: Good parts / Total parts produced
-- SMED: Single-Minute Exchange of Die (changeover time)
-- Tonnage: Press force (Line A: 600-650T, Line B: 900-1100T)
-- Cycle Time: Time per part (Line A: 1.2-1.5s, Line B: 1.5-2.0s)
-- Defect Types: Springback, Wrinkling, Necking, Splitting, Surface Defects, Dimensional Variation
-- Material Grades: CRS_SPCC (cold rolled steel), HSLA_350 (high-strength low-alloy), DP600 (dual-phase steel)
-- Part Types: Door outer panels (LEFT/RIGHT on Line A), Bonnet outer panel (Line B)
-
-Query Patterns:
-- "OEE" or "efficiency" → use avgOee, avgAvailability, avgPerformance, avgQualityRate
-- "pass rate" or "quality" → use passRate or avgPassRate
-- "by part" or "which part" → use PressOperations.partFamily or PartFamilyPerformance.partFamily
-- "by line" or "press line" → use PressLineUtilization.lineName or PressOperations.pressLineId
-- "by shift" → use PressOperations.shiftId dimension
-- "defect" or "failure" → use defectCount, defectType, defectSeverity
-- "cost" → use avgCostPerPart, totalCost, avgMaterialCost, avgLaborCost
-- "tonnage" → use avgTonnage measure
-- "cycle time" or "speed" → use avgCycleTime or avgStrokeRate
-- "material" or "coil" → use materialGrade dimension or coilId for traceability
-- "die" → use dieId dimension
-- "over time" or "trends" → use productionDate timeDimension
-- "weekend" or "weekday" → use isWeekend dimension or weekendParts/weekdayParts measures
-- "shift analysis" → use morningShiftParts, afternoonShiftParts, nightShiftParts
-- "best" or "highest" → add order desc
-- "worst" or "lowest" → add order asc
-"""
+        self.schema_context = SCHEMA_CONTEXT
 
     async def translate_to_query(self, user_question: str, context: str = "") -> tuple[CubeQuery, str]:
         """
@@ -87,80 +29,6 @@ Query Patterns:
         Returns:
             Tuple of (CubeQuery, chart_type)
         """
-        system_prompt = f"""You are a data analyst for a manufacturing analytics system.
-Your job is to translate user questions into Cube.js queries.
-
-{self.schema_context}
-
-Chart Type Selection:
-- "bar": Use for comparisons (component vs component, material vs material)
-- "line": Use for time-series data (trends over time, hourly/daily changes)
-- "table": Use for detailed data, multiple metrics, or when uncertain
-
-Respond with a JSON object containing:
-- "query": A Cube.js query object with measures, dimensions, filters, timeDimensions, order, limit
-- "chart_type": One of "bar", "line", or "table"
-- "reasoning": Brief explanation of the query
-
-Example Responses:
-
-1. Part family comparison query:
-{{
-  "query": {{
-    "measures": ["PartFamilyPerformance.totalPartsProduced", "PartFamilyPerformance.firstPassYield", "PartFamilyPerformance.avgCostPerPart"],
-    "dimensions": ["PartFamilyPerformance.partFamily"]
-  }},
-  "chart_type": "bar",
-  "reasoning": "Comparing part families (Door Left/Right vs Bonnet) by production volume, yield, and cost"
-}}
-
-2. OEE breakdown by press line:
-{{
-  "query": {{
-    "measures": ["PressLineUtilization.overallAvgOee", "PressLineUtilization.overallAvgAvailability", "PressLineUtilization.overallAvgPerformance", "PressLineUtilization.overallAvgQualityRate"],
-    "dimensions": ["PressLineUtilization.lineName"]
-  }},
-  "chart_type": "bar",
-  "reasoning": "Showing OEE components breakdown for Line A vs Line B"
-}}
-
-3. Time-series quality trends:
-{{
-  "query": {{
-    "measures": ["PressOperations.passRate", "PressOperations.avgOee"],
-    "dimensions": ["PressOperations.partFamily"],
-    "timeDimensions": [{{
-      "dimension": "PressOperations.productionDate",
-      "granularity": "day"
-    }}]
-  }},
-  "chart_type": "line",
-  "reasoning": "Showing daily quality and OEE trends by part family"
-}}
-
-4. Shift performance analysis:
-{{
-  "query": {{
-    "measures": ["PressLineUtilization.morningShiftParts", "PressLineUtilization.afternoonShiftParts", "PressLineUtilization.nightShiftParts"],
-    "dimensions": ["PressLineUtilization.lineName"]
-  }},
-  "chart_type": "bar",
-  "reasoning": "Comparing shift productivity across press lines"
-}}
-
-5. Defect analysis:
-{{
-  "query": {{
-    "measures": ["PressOperations.defectCount", "PressOperations.reworkCount"],
-    "dimensions": ["PressOperations.defectType"],
-    "order": {{
-      "PressOperations.defectCount": "desc"
-    }},
-    "limit": 10
-  }},
-  "chart_type": "bar",
-  "reasoning": "Top 10 defect types by frequency with rework count"
-}}"""
 
         user_prompt = f"""Question: {user_question}
 
@@ -169,10 +37,12 @@ Example Responses:
 Generate the Cube.js query and chart type."""
 
         try:
-            response = await self.client.chat.completions.create(
+            response = await llm_gateway.complete(
+                self.client,
+                "data_analyst",
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": QUERY_TRANSLATION_SYSTEM_PROMPT},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=settings.openai_temperature,
@@ -259,21 +129,17 @@ Generate the Cube.js query and chart type."""
             return ["No data available for this query."]
 
         try:
-            prompt = f"""Given this manufacturing data query and results:
+            prompt = f"""Question: {user_question}
+Results: {json.dumps(data[:5], indent=2)}"""
 
-Question: {user_question}
-Results: {json.dumps(data[:5], indent=2)}
-
-Generate 2-3 concise insights (one sentence each) about the data. Focus on:
-- Key findings (highest/lowest values)
-- Comparisons between categories
-- Notable patterns or trends
-
-Respond with a JSON array of insight strings."""
-
-            response = await self.client.chat.completions.create(
+            response = await llm_gateway.complete(
+                self.client,
+                "data_analyst",
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=[
+                    {"role": "system", "content": DATA_INSIGHTS_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
                 temperature=0.3,
                 max_tokens=300,
                 response_format={"type": "json_object"}
@@ -0,0 +1,202 @@
+"""
+Token-budgeted statistical digest of query results for LLM prompts.
+
+Instead of writing every result row into the prompt, the digest describes each
+measure with summary statistics, its top and bottom entities and IQR outliers,
+all computed in a single pass over the rows. Raw rows are appended only when
+they fit in what is left of the token budget, so small results are still shown
+in full while 1000-row, high-cardinality results stay a few hundred tokens.
+"""
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+# Rough size of a GPT token in characters of English/number-heavy text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _resolve_key(row: Dict[str, Any], member: str) -> str:
+    """Find the row key for a Cube.js member (full or short name)."""
+    if member in row:
+        return member
+    if "." in member:
+        short_name = member.split(".")[-1]
+        if short_name in row:
+            return short_name
+    return ""
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """Parse numeric values (Cube.js returns numbers as strings)."""
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    """Linear-interpolated quantile of pre-sorted values."""
+    position = (len(sorted_values) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _fmt(value: float) -> str:
+    """Format a number compactly."""
+    return f"{value:.2f}"
+
+
+def _new_moments() -> Dict[str, float]:
+    """Running count, total, mean and squared deviations (Welford) of one measure."""
+    return {"count": 0, "total": 0.0, "mean": 0.0, "m2": 0.0}
+
+
+def _add_value(moments: Dict[str, float], value: float) -> None:
+    """Fold one value into a measure's running moments."""
+    moments["count"] += 1
+    moments["total"] += value
+    delta = value - moments["mean"]
+    moments["mean"] += delta / moments["count"]
+    moments["m2"] += delta * (value - moments["mean"])
+
+
+def _measure_stats(entries: List[Tuple[float, str]], moments: Dict[str, float], top_k: int) -> List[str]:
+    """Summary lines for one measure's (value, entity) pairs and running moments."""
+    count = int(moments["count"])
+    total, mean = moments["total"], moments["mean"]
+    std = math.sqrt(moments["m2"] / count)
+
+    # One sort serves the quantiles and the rankings
+    ranked = sorted(entries, key=lambda entry: entry[0], reverse=True)
+    values = [value for value, _ in reversed(ranked)]
+
+    q1, median, q3, p95 = (_quantile(values, q) for q in (0.25, 0.5, 0.75, 0.95))
+    iqr = q3 - q1
+    low_fence, high_fence = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+    lines = [
+        f"    n={count} min={_fmt(values[0])} max={_fmt(values[-1])} mean={_fmt(mean)} "
+        f"std={_fmt(std)} total={_fmt(total)}",
+        f"    p25={_fmt(q1)} median={_fmt(median)} p75={_fmt(q3)} p95={_fmt(p95)}",
+    ]
+
+    if count > 1:
+        k = min(top_k, count)
+        lines.append("    Top: " + ", ".join(f"{entity}={_fmt(value)}" for value, entity in ranked[:k]))
+        if count > k:
+            lines.append("    Bottom: " + ", ".join(f"{entity}={_fmt(value)}" for value, entity in ranked[-k:][::-1]))
+
+        outliers = [(value, entity) for value, entity in ranked if value < low_fence or value > high_fence]
+        if iqr > 0 and outliers:
+            shown = outliers[:top_k]
+            more = f" (+{len(outliers) - len(shown)} more)" if len(outliers) > len(shown) else ""
+            lines.append(
+                "    Outliers (outside 1.5*IQR): "
+                + ", ".join(f"{entity}={_fmt(value)}" for value, entity in shown) + more
+            )
+        else:
+            lines.append("    Outliers (outside 1.5*IQR): none")
+
+    return lines
+
+
+def build_digest(
+    data: List[Dict[str, Any]],
+    measures: List[str],
+    dimensions: List[str],
+    token_budget: int,
+    top_k: int = 5,
+) -> str:
+    """
+    Build a prompt-ready digest of query results within a token budget.
+
+    Args:
+        data: Query result rows
+        measures: Measures in the query
+        dimensions: Dimensions in the query
+        token_budget: Approximate maximum tokens for the digest
+        top_k: Entities listed at each end of every measure's ranking
+
+    Returns:
+        Digest text: statistics for every measure, plus raw rows if they fit
+    """
+    lines = [f"Total rows: {len(data)}"]
+    if not data:
+        return "\n".join(lines)
+
+    first_row = data[0]
+    measure_keys = [key for key in (_resolve_key(first_row, m) for m in measures) if key]
+    dimension_keys = [key for key in (_resolve_key(first_row, d) for d in dimensions) if key]
+
+    # Single pass over the rows for every measure: the column with the entity each
+    # value belongs to (for quantiles and rankings) and the running moments
+    columns: Dict[str, List[Tuple[float, str]]] = {key: [] for key in measure_keys}
+    moments = {key: _new_moments() for key in measure_keys}
+    for index, row in enumerate(data, 1):
+        if dimension_keys:
+            entity = " / ".join(str(row.get(key)) for key in dimension_keys)
+        else:
+            entity = f"row {index}"
+        for key in measure_keys:
+            value = _to_float(row.get(key))
+            if value is not None:
+                columns[key].append((value, entity))
+                _add_value(moments[key], value)
+
+    stats_lines = []
+    for key, entries in columns.items():
+        if entries:
+            stats_lines.append(f"  {key}:")
+            stats_lines.extend(_measure_stats(entries, moments[key], top_k))
+
+    if stats_lines:
+        lines.append("\nStatistics (computed over ALL rows):")
+        lines.extend(stats_lines)
+
+    digest = "\n".join(lines)
+
+    # Raw rows only if all of them fit in what is left of the budget
+    raw = _raw_rows(data, (token_budget - estimate_tokens(digest)) * CHARS_PER_TOKEN)
+    if raw is not None:
+        return digest + "\n" + raw
+
+    return (
+        digest
+        + f"\n\nRaw rows omitted: {len(data)} rows exceed the prompt budget. "
+        "The statistics, rankings and outliers above cover every row."
+    )
+
+
+def _raw_rows(data: List[Dict[str, Any]], max_chars: int) -> Optional[str]:
+    """
+    Format every row, or return None as soon as they cannot fit in max_chars.
+
+    Rows share their keys, so the key text alone gives a lower bound on the
+    size of every row; results that are clearly too large are rejected without
+    formatting a single row.
+    """
+    header = "\nCOMPLETE DATA (all rows):"
+    min_row_chars = sum(len(key) + 4 for key in data[0]) + 4
+    if len(header) + len(data) * min_row_chars > max_chars:
+        return None
+
+    raw_lines = [header]
+    used = len(header)
+    for i, row in enumerate(data, 1):
+        row_str = ", ".join(f"{k}: {v}" for k, v in row.items())
+        line = f"  {i}. {row_str}"
+        used += len(line) + 1
+        if used > max_chars:
+            return None
+        raw_lines.append(line)
+    return "\n".join(raw_lines)
@@ -0,0 +1,50 @@
+"""
+Warehouse data version token.
+
+The EL/dbt pipeline bumps the token when it finishes loading and transforming
+data. Caches include the token in their keys, so every answer computed against
+the previous warehouse state stops matching as soon as new data lands.
+"""
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DataVersion:
+    """Current warehouse data version."""
+
+    def __init__(self):
+        """Start with a random token (nothing computed before startup is cached)."""
+        self._token = uuid.uuid4().hex
+        self._updated_at = datetime.utcnow()
+
+    @property
+    def token(self) -> str:
+        """Current version token."""
+        return self._token
+
+    def bump(self, token: Optional[str] = None) -> str:
+        """
+        Move to a new data version.
+
+        Args:
+            token: Version reported by the pipeline (e.g. its run id); random if omitted
+
+        Returns:
+            The new token
+        """
+        self._token = token or uuid.uuid4().hex
+        self._updated_at = datetime.utcnow()
+        logger.info(f"Data version updated to {self._token}")
+        return self._token
+
+    def info(self) -> Dict[str, Any]:
+        """Token and when it last changed."""
+        return {"data_version": self._token, "updated_at": self._updated_at.isoformat()}
+
+
+# Global data version
+data_version = DataVersion()
@@ -0,0 +1,56 @@
+"""
+Request deadline helpers.
+
+/chat stamps an absolute deadline (Unix epoch seconds) on the user_query Spore
+and every agent forwards it in the knowledge it broadcasts. Before starting an
+LLM call, an agent checks the remaining budget and switches to its deterministic
+fallback when the call could not finish before the endpoint gives up.
+"""
+import logging
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def make_deadline(timeout_seconds: float) -> float:
+    """Absolute deadline for a request starting now."""
+    return time.time() + timeout_seconds
+
+
+def remaining_seconds(deadline: Optional[float]) -> Optional[float]:
+    """
+    Seconds left before the deadline.
+
+    Args:
+        deadline: Absolute deadline (epoch seconds), or None for no deadline
+
+    Returns:
+        Remaining seconds (may be negative), or None if there is no deadline
+    """
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def has_budget(deadline: Optional[float], required_seconds: float, stage: str = "") -> bool:
+    """
+    Check whether enough time is left for a stage.
+
+    Args:
+        deadline: Absolute deadline (epoch seconds), or None for no deadline
+        required_seconds: Minimum budget the stage needs
+        stage: Stage name for logging
+
+    Returns:
+        True if there is no deadline or at least required_seconds remain
+    """
+    remaining = remaining_seconds(deadline)
+    if remaining is None or remaining >= required_seconds:
+        return True
+
+    logger.warning(
+        f"Deadline budget low for {stage or 'stage'}: {remaining:.1f}s left, "
+        f"{required_seconds:.1f}s needed - using deterministic fallback"
+    )
+    return False
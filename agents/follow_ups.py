@@ -0,0 +1,156 @@
+"""
+Deterministic follow-up question generator for the Report Writer.
+
+Suggestions are derived from what the user is looking at: the primary metric,
+the dimensions already broken down, the chart type and any anomalies or root
+causes the Quality Inspector reported. Generating them locally replaces a
+second, sequential LLM round trip after the narrative.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+# Cube.js member short names -> phrases users ask with
+METRIC_LABELS = {
+    "avgOee": "OEE",
+    "overallAvgOee": "OEE",
+    "passRate": "pass rate",
+    "avgPassRate": "pass rate",
+    "firstPassYield": "first pass yield",
+    "defectCount": "defect count",
+    "totalDefects": "defect count",
+    "reworkCount": "rework count",
+    "reworkRate": "rework rate",
+    "totalRework": "rework count",
+    "avgQualityRate": "quality rate",
+    "overallAvgQualityRate": "quality rate",
+    "avgCostPerPart": "cost per part",
+    "avgCostPerUnit": "cost per part",
+    "totalCost": "total cost",
+    "totalProductionCost": "total cost",
+    "avgCycleTime": "cycle time",
+    "avgTonnage": "tonnage",
+    "count": "production volume",
+    "totalPartsProduced": "production volume",
+}
+
+DIMENSION_LABELS = {
+    "shiftId": "shift",
+    "dieId": "die",
+    "operatorId": "operator",
+    "materialGrade": "material grade",
+    "pressLineId": "press line",
+    "lineName": "press line",
+    "partFamily": "part family",
+    "partType": "part family",
+    "defectType": "defect type",
+    "defectSeverity": "defect severity",
+    "coilId": "coil",
+}
+
+# Breakdowns to suggest next, most useful for root-cause drill-down first
+DRILL_DOWN_ORDER = ["shift", "die", "operator", "material grade", "press line", "part family"]
+
+# Metric a user typically checks after the one shown
+RELATED_METRICS = {
+    "OEE": "defect count",
+    "defect count": "cost per part",
+    "pass rate": "defect count",
+    "first pass yield": "rework rate",
+    "quality rate": "defect count",
+    "rework count": "cost per part",
+    "rework rate": "cost per part",
+    "cost per part": "OEE",
+    "total cost": "OEE",
+    "cycle time": "OEE",
+    "tonnage": "defect count",
+    "production volume": "OEE",
+}
+
+
+def _short_name(member: str) -> str:
+    """Member name without the cube prefix."""
+    return member.split(".")[-1]
+
+
+def _label(short_name: str, labels: Dict[str, str]) -> str:
+    """Human label for a member, falling back to splitting camelCase."""
+    if short_name in labels:
+        return labels[short_name]
+    return re.sub(r"(?<!^)(?=[A-Z])", " ", short_name).lower()
+
+
+def generate_follow_ups(
+    chart_type: str,
+    measures: Optional[List[str]] = None,
+    dimensions: Optional[List[str]] = None,
+    observations: Optional[List[Dict[str, Any]]] = None,
+    anomalies: Optional[List[Dict[str, Any]]] = None,
+    root_causes: Optional[List[Dict[str, Any]]] = None,
+    limit: int = 3,
+) -> List[str]:
+    """
+    Suggest follow-up questions for the analysis just shown.
+
+    Args:
+        chart_type: Chart type shown to the user
+        measures: Cube.js measures in the query
+        dimensions: Cube.js dimensions in the query
+        observations: Observation insights
+        anomalies: Detected anomalies
+        root_causes: Root cause hypotheses
+        limit: Maximum number of suggestions
+
+    Returns:
+        Follow-up question strings (drill down, investigate, related metric)
+    """
+    metric = _label(_short_name(measures[0]), METRIC_LABELS) if measures else "OEE"
+    used = {_label(_short_name(d), DIMENSION_LABELS) for d in (dimensions or [])}
+    next_dimensions = [d for d in DRILL_DOWN_ORDER if d not in used]
+
+    suggestions: List[str] = []
+
+    # Nothing notable in this view - widen it before drilling down
+    if not observations and not anomalies and "press line" not in used:
+        suggestions.append(f"Show {metric} for each press line")
+
+    # 1. Investigate what the Quality Inspector flagged
+    if anomalies:
+        anomaly = anomalies[0]
+        entity = anomaly.get("entity")
+        anomaly_metric = anomaly.get("metric") or metric
+        if entity:
+            suggestions.append(f"What is driving the {anomaly_metric} result for {entity}?")
+    if root_causes and next_dimensions:
+        hypothesis = root_causes[0].get("hypothesis", "").lower()
+        if "die" in hypothesis and "die" not in used:
+            suggestions.append(f"Compare {metric} by die to check for die wear")
+        elif "material" in hypothesis and "material grade" not in used:
+            suggestions.append(f"Compare {metric} by material grade")
+        elif "operator" in hypothesis and "operator" not in used:
+            suggestions.append(f"Compare {metric} by operator")
+
+    # 2. Drill one level deeper
+    for dimension in next_dimensions:
+        question = f"Break down {metric} by {dimension}"
+        if not any(f"by {dimension}" in s for s in suggestions):
+            suggestions.append(question)
+            break
+
+    # 3. Add the time dimension, or explain the trend already shown
+    if chart_type == "line":
+        target = next_dimensions[0] if next_dimensions else "press line"
+        suggestions.append(f"Which {target} contributed most to the change in {metric}?")
+    else:
+        suggestions.append(f"How has {metric} trended over the past month?")
+
+    # 4. Related metric across the same breakdown
+    related = RELATED_METRICS.get(metric, "defect count")
+    across = sorted(used)[0] if used else "press line"
+    suggestions.append(f"Compare {related} across {across}")
+
+    unique: List[str] = []
+    for suggestion in suggestions:
+        if suggestion not in unique:
+            unique.append(suggestion)
+
+    return unique[:limit]
@@ -0,0 +1,521 @@
+"""
+Central gateway for every LLM call made by the agents.
+
+All agents send their chat completions through ``llm_gateway.complete`` instead
+of calling ``client.chat.completions.create`` directly. The gateway adds:
+
+- per-model concurrency limits (gpt-4o and gpt-4o-mini have different rate limits)
+- retries with full-jitter exponential backoff on 429, 5xx and connection errors,
+  honouring Retry-After when OpenAI sends it
+- optional hedging: a second identical request once the first has been running
+  longer than the model's recent p95 latency; the first to finish wins
+- a per-model circuit breaker that fails fast with ``LLMUnavailable`` while
+  OpenAI is down, so agents go straight to their deterministic fallbacks
+- per-agent call and latency metrics; tokens, cost and wall time go to the
+  usage ledger (llm_usage) per agent and per request. A hedge race's losing
+  request is cancelled but usually already billed: it is counted as
+  ``hedged_cancelled`` and charged with its estimated prompt tokens (the
+  completion tokens it generated before cancellation are never reported and
+  stay unaccounted)
+
+The client is passed in by the caller, so agents keep using their own
+(shared or mocked) AsyncOpenAI client.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import openai
+from config import settings
+from data_digest import estimate_tokens
+from llm_usage import usage_ledger
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept per model for the hedging threshold
+LATENCY_WINDOW = 200
+
+
+class LLMUnavailable(Exception):
+    """Raised without calling OpenAI while a model's circuit breaker is open."""
+
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(f"LLM circuit open for {model}; retry in {retry_in:.1f}s")
+        self.model = model
+        self.retry_in = retry_in
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying."""
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return False
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header, if the error carries one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _estimated_usage(kwargs: Dict[str, Any]) -> SimpleNamespace:
+    """Usage stand-in for a cancelled request: estimated prompt tokens, no completion tokens."""
+    prompt = "".join(str(message.get("content", "")) for message in kwargs.get("messages", []))
+    return SimpleNamespace(prompt_tokens=estimate_tokens(prompt) if prompt else 0, completion_tokens=0)
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of unsorted samples."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ModelLimiter:
+    """
+    Concurrency limit for one model, usable from any event loop.
+
+    Agents run on the shared background loop while chat endpoints run on the
+    server loop, so an asyncio.Semaphore (bound to one loop) cannot be used.
+    Waiters are woken on their own loop with call_soon_threadsafe.
+    """
+
+    def __init__(self, limit: int):
+        """
+        Initialize the limiter.
+
+        Args:
+            limit: Maximum concurrent calls
+        """
+        self.limit = max(1, limit)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free, without waiting."""
+        with self._lock:
+            if self._in_flight < self.limit:
+                self._in_flight += 1
+                return True
+            return False
+
+    async def acquire(self) -> None:
+        """Wait for a free slot."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._in_flight < self.limit:
+                self._in_flight += 1
+                return
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, waiter))
+                    granted = False
+                except ValueError:
+                    # The slot was handed over just as we were cancelled
+                    granted = True
+            if granted:
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the next waiter if there is one."""
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(_grant, waiter)
+                    return
+                except RuntimeError:
+                    continue
+            self._in_flight = max(0, self._in_flight - 1)
+
+    @property
+    def in_flight(self) -> int:
+        """Calls currently holding a slot."""
+        with self._lock:
+            return self._in_flight
+
+
+def _grant(waiter: asyncio.Future) -> None:
+    """Wake a limiter waiter on its own loop (a cancelled waiter releases the slot itself)."""
+    if waiter.cancelled():
+        return
+    waiter.set_result(None)
+
+
+class _LimitedStream:
+    """
+    A streamed completion that keeps its concurrency slot until it is consumed.
+
+    The slot is released when iteration ends (normally or with an error) or
+    when the stream is closed, whichever comes first.
+    """
+
+    def __init__(self, stream: Any, limiter: "ModelLimiter"):
+        """
+        Wrap a stream returned by chat.completions.create.
+
+        Args:
+            stream: Async iterator of completion chunks
+            limiter: Limiter whose slot the stream holds
+        """
+        self._stream = stream
+        self._iterator = stream.__aiter__()
+        self._limiter: Optional[ModelLimiter] = limiter
+
+    def _release(self) -> None:
+        """Give the slot back (once)."""
+        limiter, self._limiter = self._limiter, None
+        if limiter is not None:
+            limiter.release()
+
+    def __aiter__(self) -> "_LimitedStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            return await self._iterator.__anext__()
+        except BaseException:
+            # StopAsyncIteration, a dropped connection or cancellation all end the stream
+            self._release()
+            raise
+
+    async def close(self) -> None:
+        """Release the slot and close the underlying stream."""
+        self._release()
+        close = getattr(self._stream, "close", None) or getattr(self._stream, "aclose", None)
+        if close is not None:
+            await close()
+
+    async def __aenter__(self) -> "_LimitedStream":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one model."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failed calls that open the circuit
+            reset_seconds: Time the circuit stays open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    def before_call(self) -> Optional[float]:
+        """
+        Check whether a call may go out.
+
+        Returns:
+            None if allowed, otherwise seconds until the next trial call
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return None
+            elapsed = time.monotonic() - self._opened_at
+            if elapsed < self.reset_seconds:
+                return self.reset_seconds - elapsed
+            # Half-open: let exactly one trial call through
+            if self._trial_in_flight:
+                return self.reset_seconds
+            self._trial_in_flight = True
+            return None
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def abandon_trial(self) -> None:
+        """Forget a half-open trial call that was cancelled before it finished."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a failure, opening (or re-opening) the circuit at the threshold."""
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(f"LLM circuit opened after {self._failures} consecutive failures")
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """closed, open or half_open."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                return "open"
+            return "half_open"
+
+
+class LLMGateway:
+    """Shared entry point for chat completions with limits, retries, hedging and metrics."""
+
+    def __init__(self):
+        """Initialize per-model limiters, breakers and metrics."""
+        self._lock = threading.Lock()
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._agent_stats: Dict[str, Dict[str, Any]] = {}
+
+    def _limiter(self, model: str) -> ModelLimiter:
+        """Limiter for a model, sized from llm_model_concurrency."""
+        with self._lock:
+            if model not in self._limiters:
+                limit = settings.llm_model_concurrency.get(model, settings.llm_default_concurrency)
+                self._limiters[model] = ModelLimiter(limit)
+            return self._limiters[model]
+
+    def _breaker(self, model: str) -> CircuitBreaker:
+        """Circuit breaker for a model."""
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(
+                    settings.llm_breaker_failure_threshold,
+                    settings.llm_breaker_reset_seconds,
+                )
+            return self._breakers[model]
+
+    def _hedge_delay(self, model: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None if hedging is off or unwarranted."""
+        if not settings.llm_hedging_enabled:
+            return None
+        with self._lock:
+            samples = list(self._latencies.get(model, ()))
+        if len(samples) < settings.llm_hedge_min_samples:
+            return None
+        return _percentile(samples, settings.llm_hedge_percentile)
+
+    def _stats(self, agent: str) -> Dict[str, Any]:
+        """Mutable metrics record for an agent (caller holds the lock)."""
+        return self._agent_stats.setdefault(agent, {
+            "calls": 0,
+            "errors": 0,
+            "retries": 0,
+            "hedged": 0,
+            "hedged_cancelled": 0,
+            "short_circuited": 0,
+            "latencies": deque(maxlen=LATENCY_WINDOW),
+        })
+
+    def _count(self, agent: str, field: str) -> None:
+        """Increment a counter for an agent."""
+        with self._lock:
+            self._stats(agent)[field] += 1
+
+    def _record_success(self, agent: str, model: str, seconds: float, response: Any, stream: bool = False) -> None:
+        """
+        Record latency of a completed call and charge its tokens to the usage ledger.
+
+        Streams are only counted here: their latency is time to first byte and
+        their usage arrives in the last chunk, so the caller records it.
+        """
+        with self._lock:
+            stats = self._stats(agent)
+            stats["calls"] += 1
+            if stream:
+                return
+            stats["latencies"].append(seconds)
+            self._latencies.setdefault(model, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+        usage_ledger.record(agent, model, seconds, getattr(response, "usage", None))
+
+    async def _attempt(self, client: Any, model: str, limiter: ModelLimiter, kwargs: Dict[str, Any]) -> Any:
+        """
+        One request under the model's concurrency limit.
+
+        A stream keeps the slot until it has been consumed or closed.
+        """
+        await limiter.acquire()
+        try:
+            response = await client.chat.completions.create(model=model, **kwargs)
+        except BaseException:
+            limiter.release()
+            raise
+
+        if kwargs.get("stream"):
+            return _LimitedStream(response, limiter)
+        limiter.release()
+        return response
+
+    async def _hedged_attempt(self, client: Any, model: str, limiter: ModelLimiter,
+                              kwargs: Dict[str, Any], agent: str) -> Any:
+        """
+        One request, duplicated if it outlives the model's p95 latency.
+
+        The hedge is only sent when a concurrency slot is free, so hedging never
+        queues behind (or adds load to) a saturated model.
+        """
+        delay = self._hedge_delay(model)
+        if delay is None or kwargs.get("stream"):
+            return await self._attempt(client, model, limiter, kwargs)
+
+        async def hedge():
+            try:
+                return await client.chat.completions.create(model=model, **kwargs)
+            finally:
+                limiter.release()
+
+        primary = asyncio.ensure_future(self._attempt(client, model, limiter, kwargs))
+        secondary = None
+        started = {primary: time.monotonic()}
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not limiter.try_acquire():
+                return await primary
+
+            self._count(agent, "hedged")
+            logger.info(f"Hedging {model} call for {agent} after {delay:.2f}s")
+            secondary = asyncio.ensure_future(hedge())
+            started[secondary] = time.monotonic()
+            pending = {primary, secondary}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            # Both failed - surface the primary's error
+            return primary.result()
+        finally:
+            # The loser, or both requests if the caller was cancelled (their slots are released)
+            for task in (primary, secondary):
+                if task is not None and not task.done():
+                    task.cancel()
+                    if secondary is not None:
+                        self._record_cancelled_hedge(agent, model, time.monotonic() - started[task], kwargs)
+
+    def _record_cancelled_hedge(self, agent: str, model: str, seconds: float, kwargs: Dict[str, Any]) -> None:
+        """Count a request cancelled after a hedge and charge its estimated prompt tokens."""
+        self._count(agent, "hedged_cancelled")
+        usage_ledger.record(agent, model, seconds, _estimated_usage(kwargs))
+
+    async def complete(self, client: Any, agent: str, model: str, **kwargs: Any) -> Any:
+        """
+        Create a chat completion through the gateway.
+
+        Args:
+            client: AsyncOpenAI client to call
+            agent: Calling agent's name (for metrics)
+            model: Model name
+            **kwargs: Remaining chat.completions.create arguments
+
+        Returns:
+            The completion (or stream, if stream=True)
+
+        Raises:
+            LLMUnavailable: The model's circuit breaker is open
+            Exception: The last error once retries are exhausted, or any
+                non-retryable error (e.g. 400 Bad Request) immediately
+        """
+        breaker = self._breaker(model)
+        retry_in = breaker.before_call()
+        if retry_in is not None:
+            self._count(agent, "short_circuited")
+            raise LLMUnavailable(model, retry_in)
+
+        limiter = self._limiter(model)
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                response = await self._hedged_attempt(client, model, limiter, kwargs, agent)
+            except asyncio.CancelledError:
+                breaker.abandon_trial()
+                raise
+            except Exception as e:
+                retryable = _is_retryable(e)
+                if not retryable or attempt >= settings.llm_max_retries:
+                    self._count(agent, "errors")
+                    if retryable:
+                        breaker.record_failure()
+                    else:
+                        # The service answered; only the request was bad
+                        breaker.record_success()
+                    raise
+
+                # Full jitter, but never retry sooner than the server asked
+                backoff = min(settings.llm_retry_max_delay_seconds,
+                              settings.llm_retry_base_delay_seconds * 2 ** attempt)
+                delay = random.uniform(0, backoff)
+                retry_after = _retry_after(e)
+                if retry_after is not None:
+                    delay = max(delay, min(retry_after, settings.llm_retry_max_delay_seconds))
+
+                attempt += 1
+                self._count(agent, "retries")
+                logger.warning(f"{agent} {model} call failed ({e}); retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            breaker.record_success()
+            self._record_success(agent, model, time.monotonic() - start, response, bool(kwargs.get("stream")))
+            return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-agent call metrics and per-model limiter/breaker state."""
+        with self._lock:
+            agents = {}
+            for agent, stats in self._agent_stats.items():
+                latencies = list(stats["latencies"])
+                agents[agent] = {
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "retries": stats["retries"],
+                    "hedged": stats["hedged"],
+                    "hedged_cancelled": stats["hedged_cancelled"],
+                    "short_circuited": stats["short_circuited"],
+                    "avg_latency_ms": round(1000 * sum(latencies) / len(latencies), 1) if latencies else 0.0,
+                    "p95_latency_ms": round(1000 * _percentile(latencies, 0.95), 1) if latencies else 0.0,
+                }
+            models = {
+                model: {
+                    "in_flight": limiter.in_flight,
+                    "limit": limiter.limit,
+                    "circuit": self._breakers[model].state if model in self._breakers else "closed",
+                }
+                for model, limiter in self._limiters.items()
+            }
+        return {"agents": agents, "models": models}
+
+
+# Global gateway instance
+llm_gateway = LLMGateway()
@@ -0,0 +1,169 @@
+"""
+Token, cost and time accounting for LLM calls.
+
+Every call through the LLM gateway is recorded with its agent, model, token
+usage (including prompt tokens served from the provider's prefix cache) and
+wall time, aggregated both per agent (process lifetime) and per request. The
+request is taken from ``current_request_id``, which run_async sets for the
+coroutines it runs on behalf of a request, so agents do not have to pass
+request identifiers down to the gateway.
+"""
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from config import settings
+
+# Request the running coroutine works for ("" outside a request)
+current_request_id: ContextVar[str] = ContextVar("current_request_id", default="")
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Estimate the USD cost of a call from llm_pricing_usd_per_million.
+
+    Args:
+        model: Model name
+        prompt_tokens: Prompt tokens billed
+        completion_tokens: Completion tokens billed
+
+    Returns:
+        Cost in USD (0 for models without a price)
+    """
+    pricing = settings.llm_pricing_usd_per_million.get(model, {})
+    return (
+        prompt_tokens * pricing.get("prompt", 0.0)
+        + completion_tokens * pricing.get("completion", 0.0)
+    ) / 1_000_000
+
+
+def _empty_totals() -> Dict[str, Any]:
+    """Zeroed usage totals."""
+    return {
+        "calls": 0,
+        "prompt_tokens": 0,
+        "cached_prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "cost_usd": 0.0,
+        "wall_seconds": 0.0,
+    }
+
+
+def _add(totals: Dict[str, Any], prompt_tokens: int, cached_tokens: int,
+         completion_tokens: int, cost: float, seconds: float) -> None:
+    """Add one call to a totals record."""
+    totals["calls"] += 1
+    totals["prompt_tokens"] += prompt_tokens
+    totals["cached_prompt_tokens"] += cached_tokens
+    totals["completion_tokens"] += completion_tokens
+    totals["total_tokens"] += prompt_tokens + completion_tokens
+    totals["cost_usd"] += cost
+    totals["wall_seconds"] += seconds
+
+
+def _rounded(totals: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a totals record with readable precision."""
+    return {
+        **totals,
+        "cost_usd": round(totals["cost_usd"], 6),
+        "wall_seconds": round(totals["wall_seconds"], 3),
+    }
+
+
+def _token_count(usage: Any, field: str) -> int:
+    """Token count from an OpenAI usage object (0 if missing)."""
+    value = getattr(usage, field, 0)
+    return value if isinstance(value, int) else 0
+
+
+def _cached_token_count(usage: Any) -> int:
+    """Prompt tokens served from the provider's prefix cache (0 if not reported)."""
+    return _token_count(getattr(usage, "prompt_tokens_details", None), "cached_tokens")
+
+
+class UsageLedger:
+    """Per-agent and per-request LLM usage, keeping the most recent requests."""
+
+    def __init__(self, max_requests: int = 1000):
+        """
+        Initialize the ledger.
+
+        Args:
+            max_requests: Requests kept for per-request lookup (oldest dropped first)
+        """
+        self.max_requests = max_requests
+        self._lock = threading.Lock()
+        self._agents: Dict[str, Dict[str, Any]] = {}
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._requests: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def record(self, agent: str, model: str, seconds: float, usage: Any,
+               request_id: Optional[str] = None) -> None:
+        """
+        Record one LLM call.
+
+        Args:
+            agent: Calling agent's name
+            model: Model name
+            seconds: Wall time of the call
+            usage: OpenAI usage object (prompt_tokens, completion_tokens and
+                optionally prompt_tokens_details.cached_tokens), or None
+            request_id: Request to charge (defaults to current_request_id)
+        """
+        prompt_tokens = _token_count(usage, "prompt_tokens")
+        cached_tokens = _cached_token_count(usage)
+        completion_tokens = _token_count(usage, "completion_tokens")
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        if request_id is None:
+            request_id = current_request_id.get()
+
+        with self._lock:
+            _add(self._agents.setdefault(agent, _empty_totals()), prompt_tokens, cached_tokens, completion_tokens, cost, seconds)
+            _add(self._models.setdefault(model, _empty_totals()), prompt_tokens, cached_tokens, completion_tokens, cost, seconds)
+
+            if not request_id:
+                return
+
+            request = self._requests.get(request_id)
+            if request is None:
+                request = {"totals": _empty_totals(), "agents": {}}
+                self._requests[request_id] = request
+                while len(self._requests) > self.max_requests:
+                    self._requests.popitem(last=False)
+
+            _add(request["totals"], prompt_tokens, cached_tokens, completion_tokens, cost, seconds)
+            agent_totals = request["agents"].setdefault(agent, {**_empty_totals(), "model": model})
+            _add(agent_totals, prompt_tokens, cached_tokens, completion_tokens, cost, seconds)
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Usage of one request.
+
+        Args:
+            request_id: Request identifier
+
+        Returns:
+            {"totals": {...}, "agents": {agent: {..., "model"}}}, or None if unknown
+        """
+        with self._lock:
+            request = self._requests.get(request_id)
+            if request is None:
+                return None
+            return {
+                "totals": _rounded(request["totals"]),
+                "agents": {agent: _rounded(totals) for agent, totals in request["agents"].items()},
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """Lifetime usage per agent and per model."""
+        with self._lock:
+            return {
+                "agents": {agent: _rounded(totals) for agent, totals in self._agents.items()},
+                "models": {model: _rounded(totals) for model, totals in self._models.items()},
+                "requests_tracked": len(self._requests),
+            }
+
+
+# Global ledger instance
+usage_ledger = UsageLedger(max_requests=settings.llm_usage_max_requests)
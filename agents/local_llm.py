@@ -0,0 +1,219 @@
+"""
+Deterministic local stand-in for the OpenAI chat completions API.
+
+Selected with LLM_BACKEND=local, it lets the full agent pipeline run without
+network access (CI, benchmarks, air-gapped load tests). The client recognises
+each agent's prompt (system prefix plus user message) by the JSON format it
+asks for and answers with a schema-valid response derived from the prompt:
+
+- enrichment: the rule-based query parser's result for the user query
+- chart type: the data shape rules applied to the data summary
+- insights: one summary observation over the digest's row count
+- narrative, chat and query-translation prompts: fixed, well-formed answers
+
+Latency and token counts are synthetic and configurable, so throughput and
+caching behaviour can be measured with realistic timing.
+"""
+import asyncio
+import json
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from config import settings
+from data_digest import estimate_tokens
+from query_parser import parse_query
+
+# Enrichment for questions the rule-based parser cannot interpret
+DEFAULT_ENRICHMENT = {
+    "is_in_scope": True,
+    "rejection_reason": "",
+    "user_intent": "pass_rate_overview",
+    "part_families": [],
+    "metrics": ["pass_rate"],
+    "dimensions": [],
+    "cube_recommendation": "PressOperations",
+    "filters": {},
+}
+
+LOCAL_NARRATIVE = """🔍 Key Findings:
+• {observation}
+• Results were produced by the local LLM stand-in
+
+💡 Recommended Actions:
+• Review the chart for the entities with the lowest values"""
+
+
+def _enrichment(prompt: str) -> Dict[str, Any]:
+    """Manufacturing Advisor enrichment from the parser."""
+    match = re.search(r'User Query: "(.*)"', prompt)
+    parsed, _ = parse_query(match.group(1)) if match else (None, 0.0)
+    return parsed or DEFAULT_ENRICHMENT
+
+
+def _chart_type(prompt: str) -> Dict[str, Any]:
+    """Visualization Specialist chart type from the data summary."""
+    rows_match = re.search(r"Rows: (\d+)", prompt)
+    rows = int(rows_match.group(1)) if rows_match else 0
+
+    if rows == 1:
+        chart_type = "kpi"
+    elif "Time series: Yes" in prompt:
+        chart_type = "line"
+    elif rows > 15:
+        chart_type = "table"
+    elif "Multi-dimensional: Yes" in prompt:
+        chart_type = "grouped_bar"
+    else:
+        chart_type = "bar"
+
+    return {"chart_type": chart_type, "reasoning": f"Local stand-in: {rows} rows"}
+
+
+def _insights(prompt: str) -> Dict[str, Any]:
+    """Quality Inspector insights over the digest's row count."""
+    rows_match = re.search(r"Total rows: (\d+)", prompt)
+    rows = int(rows_match.group(1)) if rows_match else 0
+    return {
+        "observations": [{
+            "type": "summary",
+            "text": f"Query returned {rows} rows",
+            "confidence": 0.5,
+            "data_points": {"row_count": rows},
+        }],
+        "anomalies": [],
+        "root_causes": [],
+    }
+
+
+def respond(prompt: str) -> str:
+    """
+    Deterministic completion text for an agent prompt.
+
+    Args:
+        prompt: Text of all messages (system prefix and user content)
+
+    Returns:
+        Completion content (JSON for JSON-format prompts, otherwise text)
+    """
+    if '"is_in_scope"' in prompt:
+        return json.dumps(_enrichment(prompt))
+    if '"chart_type": "kpi|bar' in prompt:
+        return json.dumps(_chart_type(prompt))
+    if '"observations"' in prompt:
+        return json.dumps(_insights(prompt))
+    if '"requires_data_query"' in prompt:
+        return json.dumps({"requires_data_query": True, "reason": "Local stand-in always queries data"})
+    if "Generate the Cube.js query" in prompt:
+        return json.dumps({
+            "query": {"measures": ["PressOperations.passRate"], "dimensions": ["PressOperations.partFamily"]},
+            "chart_type": "bar",
+            "reasoning": "Local stand-in query",
+        })
+    if "JSON array of insight strings" in prompt:
+        return json.dumps({"insights": ["Local stand-in analysis complete."]})
+    if "Compose a clear, actionable narrative" in prompt:
+        observation = re.search(r"^\s*1\. (.+?) \(confidence", prompt, re.MULTILINE)
+        return LOCAL_NARRATIVE.format(
+            observation=observation.group(1) if observation else "Data retrieved successfully"
+        )
+    return "Hello! I am the local LLM stand-in."
+
+
+class _Completions:
+    """chat.completions namespace of the local client."""
+
+    async def create(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        stream: bool = False,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Create a completion (or stream) like AsyncOpenAI's chat.completions.create.
+
+        Args:
+            model: Model name (echoed back)
+            messages: Chat messages
+            stream: Return an async iterator of chunks instead of a completion
+            **kwargs: Other OpenAI arguments (accepted and ignored)
+
+        Returns:
+            ChatCompletion, or an async iterator of ChatCompletionChunk
+        """
+        prompt_text = "\n".join(str(message.get("content", "")) for message in messages)
+        content = respond(prompt_text)
+
+        usage = CompletionUsage(
+            prompt_tokens=estimate_tokens(prompt_text),
+            completion_tokens=settings.local_llm_completion_tokens or estimate_tokens(content),
+            total_tokens=0,
+        )
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+
+        await asyncio.sleep(settings.local_llm_latency_seconds)
+
+        if stream:
+            return self._stream(model, content, usage)
+
+        await asyncio.sleep(settings.local_llm_seconds_per_token * usage.completion_tokens)
+        return ChatCompletion(
+            id=f"local-{uuid.uuid4().hex[:12]}",
+            object="chat.completion",
+            created=int(time.time()),
+            model=model,
+            choices=[{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }],
+            usage=usage,
+        )
+
+    async def _stream(self, model: str, content: str, usage: CompletionUsage) -> AsyncIterator[ChatCompletionChunk]:
+        """Yield the content word by word, then a usage-only chunk."""
+        completion_id = f"local-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        words = re.findall(r"\S+\s*", content)
+        delay = settings.local_llm_seconds_per_token * usage.completion_tokens / max(1, len(words))
+
+        for word in words:
+            await asyncio.sleep(delay)
+            yield ChatCompletionChunk(
+                id=completion_id,
+                object="chat.completion.chunk",
+                created=created,
+                model=model,
+                choices=[{"index": 0, "delta": {"content": word}, "finish_reason": None}],
+            )
+
+        yield ChatCompletionChunk(
+            id=completion_id,
+            object="chat.completion.chunk",
+            created=created,
+            model=model,
+            choices=[],
+            usage=usage,
+        )
+
+
+class _Chat:
+    """chat namespace of the local client."""
+
+    def __init__(self):
+        self.completions = _Completions()
+
+
+class LocalLLMClient:
+    """Drop-in replacement for AsyncOpenAI covering chat.completions.create."""
+
+    def __init__(self):
+        """Initialize the client."""
+        self.chat = _Chat()
+
+    async def close(self) -> None:
+        """Nothing to release (matches AsyncOpenAI.close)."""
+        return None
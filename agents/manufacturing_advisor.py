@@ -6,11 +6,18 @@ Understands manufacturing terminology and enriches user queries with domain cont
 """
 import json
 import logging
-from typing import Dict, List, Any
+import time
+from typing import Dict, List, Any, Optional
 from praval import agent, broadcast, Spore
-from openai import AsyncOpenAI
 from config import settings
+from llm_gateway import llm_gateway
+from prompts import ENRICHMENT_SYSTEM_PROMPT
 from async_utils import run_async
+from cancellation import cancellation_registry, RequestCancelled
+from deadlines import has_budget
+from query_parser import parse_query
+from schema_registry import schema_registry
+from agent_registry import agent_registry, get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -24,11 +31,24 @@ class ManufacturingAdvisorAgent:
 
     def __init__(self):
         """Initialize the Manufacturing Advisor Agent."""
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = get_openai_client()
         self.model = settings.openai_model
+
+        # Rule-based fast path metrics
+        self._fast_path_hits = 0
+        self._fast_path_misses = 0
+        self._llm_calls = 0
+        self._llm_seconds = 0.0
+
         logger.info("Manufacturing Advisor Agent initialized")
 
-    async def enrich_query(self, user_message: str, context: List[Dict[str, str]], session_id: str) -> Dict[str, Any]:
+    async def enrich_query(
+        self,
+        user_message: str,
+        context: List[Dict[str, str]],
+        session_id: str,
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Enrich user query with manufacturing domain knowledge.
         Includes guardrails to reject out-of-scope questions.
@@ -37,75 +57,44 @@ class ManufacturingAdvisorAgent:
             user_message: User's natural language query
             context: Previous conversation messages
             session_id: Session identifier
+            deadline: Absolute request deadline (epoch seconds)
 
         Returns:
             Enriched request dict with is_in_scope flag
         """
+        # Well-formed questions ("OEE by shift") are parsed deterministically
+        if settings.enrichment_fast_path_enabled:
+            parsed, confidence = parse_query(user_message)
+            if parsed is not None and confidence >= settings.enrichment_fast_path_min_confidence:
+                self._fast_path_hits += 1
+                logger.info(f"Rule-based enrichment (confidence {confidence}): {parsed}")
+                return parsed
+            self._fast_path_misses += 1
+
+        if not has_budget(deadline, settings.budget_enrichment_seconds, "enrichment"):
+            return self._fallback_enrichment()
+
         # Build context string
         context_str = "\n".join([f"{msg.get('role', 'user')}: {msg.get('content', '')}" for msg in context[-3:]])
 
-        # Use LLM to extract intent and entities with guardrails
-        prompt = f"""You are a senior manufacturing engineer analyzing user queries for an automotive press analytics system.
-
-GUARDRAILS - REJECT these out-of-scope queries:
-- Questions about unrelated topics (weather, sports, general knowledge, etc.)
-- Requests to perform actions outside analytics (send emails, create files, etc.)
-- Personal questions or conversations unrelated to manufacturing
-- Requests for data/systems we don't have access to
-
-IN-SCOPE queries include:
-- Questions about manufacturing data, metrics, processes
-- Requests to analyze press operations, quality, defects, costs
-- Questions about system capabilities and available data
-- Comparisons, trends, root cause analysis
-- Help with understanding the system
-- Data exploration queries (latest records, time ranges, machine counts, etc.)
-- Metadata queries (what data exists, date ranges, entity counts)
-
-Manufacturing System Context:
-- 2 Press Lines: LINE_A (800T, produces Door_Outer_Left and Door_Outer_Right), LINE_B (1200T, produces Bonnet_Outer)
-- 3 Part Families: Door_Outer_Left, Door_Outer_Right, Bonnet_Outer
-
-**Cube Selection Guide (IMPORTANT - select based on requested dimensions):**
-- **PressOperations**: shift_id, operator_id, die_id, defect_type, defect_severity, quality_status, coil_id, is_weekend
-- **PartFamilyPerformance**: part_family, part_type, material_grade (NO shift_id or operator_id)
-- **PressLineUtilization**: press_line_id, line_name, part_type (NO shift_id or operator_id)
-
-Previous Context:
-{context_str}
-
-User Query: "{user_message}"
-
-IMPORTANT: Extract ONLY what the user explicitly asks for. Don't add extra metrics or dimensions.
-
-Respond in JSON format:
-{{
-    "is_in_scope": true or false,
-    "rejection_reason": "if out of scope, brief explanation",
-    "user_intent": "brief description of what user wants",
-    "part_families": ["ONLY part families explicitly mentioned by user"],
-    "metrics": ["ONLY metrics explicitly requested by user"],
-    "dimensions": ["ONLY dimensions explicitly requested for breakdown"],
-    "cube_recommendation": "PressOperations|PartFamilyPerformance|PressLineUtilization",
-    "filters": {{"filter_key": "filter_value"}}
-}}
-
-Examples:
-- "What data do you have?" → in_scope: true, metrics: [], dimensions: [], cube_recommendation: "PressOperations"
-- "Compare quality rates across shifts" → in_scope: true, metrics: ["pass_rate"], dimensions: ["shift_id"], cube_recommendation: "PressOperations"
-- "Show me OEE by line" → in_scope: true, metrics: ["avgOee"], dimensions: ["press_line_id"], cube_recommendation: "PressLineUtilization"
-- "Defects by operator" → in_scope: true, metrics: ["defect_count"], dimensions: ["operator_id"], cube_recommendation: "PressOperations"
-- "Part family performance" → in_scope: true, metrics: ["pass_rate"], dimensions: ["part_family"], cube_recommendation: "PartFamilyPerformance"
-- "What's the weather?" → in_scope: false, rejection_reason: "Weather data not available"
-"""
+        # Static guardrails and format live in the cacheable system prefix
+        prompt = f'Previous Context:\n{context_str}\n\nUser Query: "{user_message}"'
 
         try:
-            response = await self.client.chat.completions.create(
+            start = time.monotonic()
+            response = await llm_gateway.complete(
+                self.client,
+                "manufacturing_advisor",
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=[
+                    {"role": "system", "content": ENRICHMENT_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
                 response_format={"type": "json_object"},
                 temperature=0.1,
             )
+            self._llm_calls += 1
+            self._llm_seconds += time.monotonic() - start
 
             enriched = json.loads(response.choices[0].message.content)
             logger.info(f"Enriched query: {enriched}")
@@ -114,17 +103,34 @@ Examples:
 
         except Exception as e:
             logger.error(f"Error enriching query: {e}")
-            # Fallback: assume in-scope data query
-            return {
-                "is_in_scope": True,
-                "rejection_reason": "",
-                "user_intent": "general_query",
-                "part_families": [],
-                "metrics": ["count"],
-                "dimensions": [],
-                "cube_recommendation": "PressOperations",
-                "filters": {},
-            }
+            return self._fallback_enrichment()
+
+    def fast_path_stats(self) -> Dict[str, Any]:
+        """Rule-based enrichment hit rate and estimated LLM latency saved."""
+        attempts = self._fast_path_hits + self._fast_path_misses
+        avg_llm_ms = self._llm_seconds / self._llm_calls * 1000 if self._llm_calls else 0.0
+        return {
+            "hits": self._fast_path_hits,
+            "misses": self._fast_path_misses,
+            "hit_rate": round(self._fast_path_hits / attempts, 3) if attempts else 0.0,
+            "avg_llm_enrichment_ms": round(avg_llm_ms, 2),
+            # Each hit skips one enrichment call of average observed duration
+            "estimated_ms_saved": round(self._fast_path_hits * avg_llm_ms, 2),
+        }
+
+    def _fallback_enrichment(self) -> Dict[str, Any]:
+        """Fallback: assume in-scope data query (degraded - the answer must not be cached)."""
+        return {
+            "is_in_scope": True,
+            "rejection_reason": "",
+            "user_intent": "general_query",
+            "part_families": [],
+            "metrics": ["count"],
+            "dimensions": [],
+            "cube_recommendation": "PressOperations",
+            "filters": {},
+            "degraded": True,
+        }
 
 
 
@@ -150,15 +156,28 @@ def manufacturing_advisor_handler(spore: Spore):
     knowledge = spore.knowledge
     user_message = knowledge.get("message", "")
     session_id = knowledge.get("session_id", "")
+    request_id = knowledge.get("request_id", "")
+    deadline = knowledge.get("deadline")
     context = knowledge.get("context", [])
 
-    logger.info(f"Processing user query (session {session_id}): {user_message}")
+    if cancellation_registry.is_cancelled(request_id):
+        logger.info(f"Request {request_id} was cancelled - skipping enrichment")
+        return
+
+    logger.info(f"Processing user query (session {session_id}, request {request_id}): {user_message}")
 
-    # Initialize advisor
-    advisor = ManufacturingAdvisorAgent()
+    # Get shared advisor instance
+    advisor = agent_registry.get(ManufacturingAdvisorAgent)
 
     # Enrich query with domain knowledge (unified flow for ALL queries)
-    enriched = run_async(advisor.enrich_query(user_message, context, session_id))
+    try:
+        enriched = run_async(
+            advisor.enrich_query(user_message, context, session_id, deadline),
+            request_id=request_id
+        )
+    except RequestCancelled:
+        logger.info(f"Request {request_id} was cancelled during enrichment")
+        return
 
     # Check guardrails - reject out-of-scope queries
     if not enriched.get("is_in_scope", True):
@@ -171,6 +190,8 @@ def manufacturing_advisor_handler(spore: Spore):
             "is_rejected": True,
             "rejection_reason": rejection_reason,
             "session_id": session_id,
+            "request_id": request_id,
+            "deadline": deadline,
             "user_message": user_message,
         })
         return
@@ -184,14 +205,14 @@ def manufacturing_advisor_handler(spore: Spore):
     )
 
     if is_metadata_query:
-        logger.info(f"Detected metadata query - fetching Cube.js metadata")
+        logger.info(f"Detected metadata query - answering from the Cube.js schema registry")
 
-        # Fetch metadata from Cube.js
-        from cubejs_client import cubejs_client
-        import asyncio
+        # Cube.js schema from the registry (loaded at startup, refreshed in the background)
+        cacheable = True
         try:
-            metadata = run_async(cubejs_client.get_meta())
-            cubes = metadata.get("cubes", [])
+            if not run_async(schema_registry.ensure_loaded(), request_id=request_id):
+                raise ConnectionError("Cube.js schema not available")
+            cubes = schema_registry.cubes()
 
             # Build response from actual Cube.js schema
             response_lines = ["**Available Data Sources:**\n"]
@@ -229,7 +250,8 @@ def manufacturing_advisor_handler(spore: Spore):
 
         except Exception as e:
             logger.error(f"Failed to fetch Cube.js metadata: {e}")
-            # Fallback response
+            # Fallback response (not cached, the real schema may be back next time)
+            cacheable = False
             capability_response = """**Available Data Sources:**
 
 📊 **PressOperations** - Detailed press operation records
@@ -238,6 +260,10 @@ def manufacturing_advisor_handler(spore: Spore):
 
 Ask me about OEE, quality metrics, defects, costs, or production trends."""
 
+        if cancellation_registry.is_cancelled(request_id):
+            logger.info(f"Request {request_id} was cancelled - not broadcasting metadata response")
+            return
+
         # Broadcast a direct response
         broadcast({
             "type": "final_response_ready",
@@ -249,6 +275,9 @@ Ask me about OEE, quality metrics, defects, costs, or production trends."""
                 "Compare quality rates across shifts"
             ],
             "session_id": session_id,
+            "request_id": request_id,
+            "deadline": deadline,
+            "cacheable": cacheable,
         })
         return
 
@@ -263,10 +292,18 @@ Ask me about OEE, quality metrics, defects, costs, or production trends."""
         "filters": enriched.get("filters", {}),
         "time_range": None,
         "session_id": session_id,
+        "request_id": request_id,
+        "deadline": deadline,
+        "batch_id": knowledge.get("batch_id", ""),
         "user_message": user_message,
         "is_rejected": False,
+        "degraded": enriched.get("degraded", False),
     }
 
+    if cancellation_registry.is_cancelled(request_id):
+        logger.info(f"Request {request_id} was cancelled - not broadcasting domain_enriched_request")
+        return
+
     logger.info(f"Broadcasting domain_enriched_request: intent={domain_enriched['user_intent']}")
     broadcast(domain_enriched)
 
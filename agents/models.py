@@ -1,5 +1,5 @@
 """Pydantic models for API requests and responses."""
-from typing import Any, Literal, Optional, Union
+from typing import Annotated, Any, Literal, Optional, Union
 from pydantic import BaseModel, Field
 
 
@@ -14,6 +14,7 @@ class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
     message: str = Field(..., min_length=1, max_length=500)
     session_id: Optional[str] = None
+    debug: bool = False
 
 
 class ChartData(BaseModel):
@@ -32,6 +33,32 @@ class ChatResponse(BaseModel):
     chart: Optional[ChartData] = None
     insights: Optional[list[str]] = None
     suggested_questions: Optional[list[str]] = None
+    debug: Optional[dict[str, Any]] = None  # Request id, cache hit and LLM usage (if requested)
+
+
+class BatchChatRequest(BaseModel):
+    """Request model for batch chat endpoint."""
+    questions: list[Annotated[str, Field(min_length=1, max_length=500)]] = Field(..., min_length=1, max_length=50)
+
+
+class BatchChatResult(BaseModel):
+    """Outcome of one question in a batch."""
+    question: str
+    response: Optional[ChatResponse] = None
+    error: Optional[str] = None
+
+
+class BatchChatResponse(BaseModel):
+    """Response model for batch chat endpoint (results in question order)."""
+    batch_id: str
+    results: list[BatchChatResult]
+    deduplicated_queries: int = 0
+    duration_ms: int
+
+
+class DataVersionUpdate(BaseModel):
+    """Request model for reporting a warehouse refresh."""
+    token: Optional[str] = Field(None, max_length=128)
 
 
 class HealthResponse(BaseModel):
@@ -39,6 +66,7 @@ class HealthResponse(BaseModel):
     status: str
     version: str
     cubejs_connected: bool
+    cubejs_schema: Optional[dict[str, Any]] = None
 
 
 class SessionInfo(BaseModel):
@@ -6,11 +6,16 @@ Analyzes data for anomalies, patterns, and generates manufacturing insights.
 """
 import json
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from praval import agent, broadcast, Spore
-from openai import AsyncOpenAI
 from config import settings
+from llm_gateway import llm_gateway
+from prompts import INSIGHTS_SYSTEM_PROMPT
 from async_utils import run_async
+from cancellation import cancellation_registry, RequestCancelled
+from deadlines import has_budget
+from data_digest import build_digest
+from agent_registry import agent_registry, get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +29,7 @@ class QualityInspectorAgent:
 
     def __init__(self):
         """Initialize the Quality Inspector Agent."""
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = get_openai_client()
         self.model = settings.openai_model
         logger.info("Quality Inspector Agent initialized")
 
@@ -34,7 +39,9 @@ class QualityInspectorAgent:
         measures: List[str],
         dimensions: List[str],
         cube_used: str,
-        session_id: str
+        session_id: str,
+        request_id: str = "",
+        deadline: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Analyze data for patterns, anomalies, and root causes.
@@ -45,91 +52,46 @@ class QualityInspectorAgent:
             dimensions: Dimensions in the query
             cube_used: Cube that was queried
             session_id: Session identifier
+            request_id: Request correlation identifier
+            deadline: Absolute request deadline (epoch seconds)
 
         Returns:
             insights_ready knowledge payload
         """
-        if not data:
+        # Empty insights when there is no data or no time left for the LLM call
+        if not data or not has_budget(deadline, settings.budget_insights_seconds, "insights"):
             return {
                 "type": "insights_ready",
                 "observations": [],
                 "anomalies": [],
                 "root_causes": [],
                 "session_id": session_id,
+                "request_id": request_id,
+                "deadline": deadline,
+                "degraded": bool(data),
             }
 
         # Prepare data summary for LLM
         data_summary = self._summarize_data(data, measures, dimensions)
 
-        # Build analysis prompt with strict anti-hallucination instructions
-        prompt = f"""You are a quality engineer analyzing automotive press manufacturing data.
-
-Manufacturing Context:
-- 2 Press Lines: LINE_A (800T, produces Door_Outer_Left and Door_Outer_Right), LINE_B (1200T, produces Bonnet_Outer)
-- 3 Part Families: Door_Outer_Left, Door_Outer_Right, Bonnet_Outer
-- Common Defects: springback, burr, wrinkle, scratch, dent, crack
-- Key Factors: die wear, material variation, operator skill, process parameters (tonnage, cycle time)
-
-Data Summary:
+        # Anti-hallucination rules and format live in the cacheable system prefix
+        prompt = f"""Data Summary:
 {data_summary}
 
 Cube Queried: {cube_used}
 Measures: {', '.join(measures)}
 Dimensions: {', '.join(dimensions)}
-
-CRITICAL ANTI-HALLUCINATION RULES:
-1. ONLY analyze the data shown above - do NOT make up numbers
-2. ONLY mention entities that appear in the data
-3. ONLY report patterns you can see in the actual data
-4. If you cite a number, it MUST match exactly what's in the data
-5. DO NOT infer data from previous conversations or general knowledge
-6. If the data is empty or has only aggregate counts, say so directly
-
-Analyze this data and provide:
-1. Observation Insights: Key patterns, comparisons, trends FROM THE DATA ABOVE ONLY
-2. Anomalies: Unusual values or outliers (ONLY if visible in the data)
-3. Root Cause Hypotheses: Manufacturing reasons for patterns YOU CAN SEE in the data
-
-Respond in JSON format:
-{{
-    "observations": [
-        {{
-            "type": "comparative" | "pattern" | "trend" | "summary",
-            "text": "Human-readable insight text with EXACT numbers from the data",
-            "confidence": 0.0-1.0,
-            "data_points": {{"key metrics with values from the actual data"}}
-        }}
-    ],
-    "anomalies": [
-        {{
-            "entity": "entity with anomaly (MUST be in the data above)",
-            "metric": "metric with anomaly (MUST be in the data above)",
-            "severity": "low" | "moderate" | "high" | "critical",
-            "description": "Human-readable anomaly description with EXACT values"
-        }}
-    ],
-    "root_causes": [
-        {{
-            "hypothesis": "Root cause hypothesis text",
-            "confidence": 0.0-1.0,
-            "evidence": ["supporting evidence DIRECTLY from the data above"],
-            "recommended_action": "Specific corrective action"
-        }}
-    ]
-}}
-
-Guidelines:
-- VERIFY every number you cite matches the data above
-- Compare ONLY entities that exist in the data
-- If data is limited or aggregated, acknowledge that in your insights
-- Only flag anomalies if there are genuine outliers in THIS data
-- If you can't see a clear pattern in the data, say "insufficient data for pattern detection"
 """
 
         try:
-            response = await self.client.chat.completions.create(
+            response = await llm_gateway.complete(
+                self.client,
+                "quality_inspector",
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=[
+                    {"role": "system", "content": INSIGHTS_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
                 response_format={"type": "json_object"},
                 temperature=0.2,
             )
@@ -145,6 +107,8 @@ Guidelines:
                 "anomalies": insights.get("anomalies", []),
                 "root_causes": insights.get("root_causes", []),
                 "session_id": session_id,
+                "request_id": request_id,
+                "deadline": deadline,
             }
 
         except Exception as e:
@@ -156,12 +120,17 @@ Guidelines:
                 "anomalies": [],
                 "root_causes": [],
                 "session_id": session_id,
+                "request_id": request_id,
+                "deadline": deadline,
+                "degraded": True,
             }
 
     def _summarize_data(self, data: List[Dict[str, Any]], measures: List[str], dimensions: List[str]) -> str:
         """
-        Create a concise summary of the data for LLM analysis.
-        CRITICAL: Include ALL data to prevent hallucination.
+        Create a token-budgeted digest of the data for LLM analysis.
+
+        Statistics, top/bottom entities and outliers always cover every row;
+        the raw rows are included only when they fit the budget.
 
         Args:
             data: Query result rows
@@ -169,55 +138,21 @@ Guidelines:
             dimensions: Dimensions in the query
 
         Returns:
-            Text summary with COMPLETE data
+            Text summary for the prompt
         """
-        summary_lines = []
-
-        # Overall stats
-        summary_lines.append(f"Total rows: {len(data)}")
-        summary_lines.append(f"\n*** IMPORTANT: ONLY analyze the data shown below. DO NOT make up numbers or infer patterns not visible in this data. ***\n")
-
-        # ALWAYS include all data rows to prevent hallucination
-        summary_lines.append("\nCOMPLETE DATA (all rows):")
-        for i, row in enumerate(data, 1):
-            row_str = ", ".join([f"{k}: {v}" for k, v in row.items()])
-            summary_lines.append(f"  {i}. {row_str}")
-
-        # Calculate basic statistics for numeric measures
-        if len(data) > 1:
-            summary_lines.append("\nStatistics (calculated from above data):")
-            for measure in measures:
-                # Try to find measure in data
-                measure_key = self._find_measure_key(data[0], measure)
-                if measure_key:
-                    values = []
-                    for row in data:
-                        val = row.get(measure_key)
-                        if isinstance(val, (int, float)):
-                            values.append(val)
-
-                    if values:
-                        summary_lines.append(f"  {measure_key}:")
-                        summary_lines.append(f"    Min: {min(values):.2f}")
-                        summary_lines.append(f"    Max: {max(values):.2f}")
-                        summary_lines.append(f"    Mean: {sum(values)/len(values):.2f}")
-                        summary_lines.append(f"    Total: {sum(values):.2f}")
-
-        return "\n".join(summary_lines)
-
-    def _find_measure_key(self, row: Dict[str, Any], measure: str) -> str:
-        """Find actual measure key in row data."""
-        # Try full name
-        if measure in row:
-            return measure
-
-        # Try short name
-        if "." in measure:
-            short_name = measure.split(".")[-1]
-            if short_name in row:
-                return short_name
-
-        return ""
+        digest = build_digest(
+            data,
+            measures,
+            dimensions,
+            token_budget=settings.insights_digest_token_budget,
+            top_k=settings.insights_digest_top_k,
+        )
+
+        return (
+            "*** IMPORTANT: ONLY analyze the data shown below. "
+            "DO NOT make up numbers or infer patterns not visible in this data. ***\n\n"
+            + digest
+        )
 
     def detect_critical_anomalies(self, insights: Dict[str, Any]) -> bool:
         """
@@ -257,12 +192,18 @@ def quality_inspector_handler(spore: Spore):
     # Extract knowledge from spore
     knowledge = spore.knowledge
     session_id = knowledge.get("session_id", "")
+    request_id = knowledge.get("request_id", "")
+    deadline = knowledge.get("deadline")
     query_results = knowledge.get("query_results", [])
     measures = knowledge.get("measures", [])
     dimensions = knowledge.get("dimensions", [])
     cube_used = knowledge.get("cube_used", "")
     metadata = knowledge.get("metadata", {})
 
+    if cancellation_registry.is_cancelled(request_id):
+        logger.info(f"Request {request_id} was cancelled - skipping analysis")
+        return
+
     # Check for rejected queries or errors
     is_rejected = metadata.get("is_rejected", False)
     has_error = metadata.get("error") is not None
@@ -275,25 +216,41 @@ def quality_inspector_handler(spore: Spore):
             "anomalies": [],
             "root_causes": [],
             "session_id": session_id,
+            "request_id": request_id,
+            "deadline": deadline,
             "is_rejected": is_rejected,
             "rejection_reason": metadata.get("rejection_reason", ""),
+            "degraded": has_error,
         }
         broadcast(insights)
         return
 
     logger.info(f"Analyzing data (session {session_id}): {len(query_results)} rows")
 
-    # Initialize inspector
-    inspector = QualityInspectorAgent()
+    # Get shared inspector instance
+    inspector = agent_registry.get(QualityInspectorAgent)
 
     # Analyze data and generate insights
-    insights = run_async(inspector.analyze_data(
-        query_results,
-        measures,
-        dimensions,
-        cube_used,
-        session_id
-    ))
+    try:
+        insights = run_async(inspector.analyze_data(
+            query_results,
+            measures,
+            dimensions,
+            cube_used,
+            session_id,
+            request_id,
+            deadline
+        ), request_id=request_id)
+    except RequestCancelled:
+        logger.info(f"Request {request_id} was cancelled during analysis")
+        return
+
+    if cancellation_registry.is_cancelled(request_id):
+        logger.info(f"Request {request_id} was cancelled - not broadcasting insights_ready")
+        return
+
+    if metadata.get("degraded"):
+        insights["degraded"] = True
 
     # Check for critical anomalies
     if inspector.detect_critical_anomalies(insights):
@@ -303,6 +260,8 @@ def quality_inspector_handler(spore: Spore):
             "type": "anomaly_detected",
             "anomalies": [a for a in insights.get("anomalies", []) if a.get("severity") == "critical"],
             "session_id": session_id,
+            "request_id": request_id,
+            "deadline": deadline,
         })
 
     # Broadcast insights_ready
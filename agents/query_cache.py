@@ -0,0 +1,170 @@
+"""
+Cube.js query-result cache.
+
+Different sessions keep asking Cube.js the same questions. CubeJSClient keeps
+results here keyed by the warehouse data version and the canonical query, so
+an identical query is answered from memory until the data changes or the entry
+expires. The cache is bounded by serialized size and evicts the least recently
+used results first; large results are compressed (zstd when the zstandard
+package is installed, zlib otherwise).
+
+Entries are stored serialized, so every hit returns a fresh copy that callers
+may modify freely. The cache is shared by the server loop and the agents'
+background loop, hence the lock.
+"""
+import json
+import logging
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Entry encodings
+_PLAIN, _ZSTD, _ZLIB = "plain", "zstd", "zlib"
+
+
+def _codec() -> str:
+    """Effective compression codec ("off", "zstd", or "zlib" when zstandard is missing)."""
+    if settings.cubejs_cache_compression == "off":
+        return "off"
+    if settings.cubejs_cache_compression == "zstd" and zstandard is not None:
+        return _ZSTD
+    return _ZLIB
+
+
+def _compress(codec: str, payload: bytes) -> bytes:
+    """Compress a payload with a codec from _codec()."""
+    if codec == _ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(payload)
+    return zlib.compress(payload, 6)
+
+
+def _decompress(encoding: str, blob: bytes) -> bytes:
+    """Decode an entry blob by its encoding."""
+    if encoding == _ZSTD:
+        return zstandard.ZstdDecompressor().decompress(blob)
+    if encoding == _ZLIB:
+        return zlib.decompress(blob)
+    return blob
+
+
+class QueryResultCache:
+    """LRU cache of Cube.js results, bounded by bytes, with per-entry TTL."""
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        compress_min_bytes: Optional[int] = None,
+    ):
+        """Initialize the cache (defaults come from settings)."""
+        self.max_bytes = max_bytes if max_bytes is not None else settings.cubejs_cache_max_bytes
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.cubejs_cache_ttl_seconds
+        self.compress_min_bytes = (
+            compress_min_bytes if compress_min_bytes is not None else settings.cubejs_cache_compress_min_bytes
+        )
+
+        self._lock = threading.Lock()
+        # key -> (expires_at, encoding, blob)
+        self._entries: "OrderedDict[str, Tuple[float, str, bytes]]" = OrderedDict()
+        self._bytes = 0
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+        self._raw_bytes_stored = 0
+        self._compressed_bytes_stored = 0
+
+    def _drop(self, key: str) -> None:
+        """Remove an entry and its bytes (caller holds the lock)."""
+        _, _, blob = self._entries.pop(key)
+        self._bytes -= len(blob)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result for a key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            expires_at, encoding, blob = entry
+            if time.monotonic() >= expires_at:
+                self._drop(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+        return json.loads(_decompress(encoding, blob))
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result, evicting the least recently used entries past max_bytes."""
+        if self.max_bytes <= 0:
+            return
+
+        payload = json.dumps(result, separators=(",", ":"), default=str).encode("utf-8")
+        encoding, blob = _PLAIN, payload
+        codec = _codec()
+        if codec != "off" and len(payload) >= self.compress_min_bytes:
+            encoding, blob = codec, _compress(codec, payload)
+
+        if len(blob) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, encoding, blob)
+            self._bytes += len(blob)
+            if encoding != _PLAIN:
+                self._raw_bytes_stored += len(payload)
+                self._compressed_bytes_stored += len(blob)
+
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry (e.g. after a data version bump)."""
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of cache metrics."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+                "compression": _codec(),
+                "compression_ratio": (
+                    round(self._raw_bytes_stored / self._compressed_bytes_stored, 2)
+                    if self._compressed_bytes_stored else None
+                ),
+            }
@@ -0,0 +1,212 @@
+"""
+Sharing of in-flight Cube.js queries.
+
+Single-flight deduplication within a /chat/batch call: standard handover
+questions often resolve to the same Cube.js query. While a batch is open, the
+first question to need a query starts it and every other question in the batch
+awaits the same in-flight task instead of issuing its own request.
+
+Speculative execution: a query predicted from the raw question is started while
+the Manufacturing Advisor is still enriching it. If the Analytics Specialist
+then builds the same canonical query, it awaits the speculative request instead
+of starting its own.
+
+Tasks live on the shared background loop, where all agent coroutines run.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from models import CubeQuery
+from cubejs_client import canonical_query_key
+from async_utils import submit_async
+from cancellation import cancellation_registry
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BatchQueryDeduplicator:
+    """Shares identical Cube.js queries between the questions of one batch."""
+
+    def __init__(self):
+        """Initialize with no open batches."""
+        self._lock = threading.Lock()
+        self._batches: Dict[str, Dict[str, asyncio.Future]] = {}
+        self._hits: Dict[str, int] = {}
+
+    def open_batch(self, batch_id: str) -> None:
+        """Start sharing queries for a batch."""
+        with self._lock:
+            self._batches[batch_id] = {}
+            self._hits[batch_id] = 0
+
+    def close_batch(self, batch_id: str) -> int:
+        """
+        Stop sharing queries for a batch and drop its results.
+
+        Returns:
+            Number of Cube.js queries that were served from another question's request
+        """
+        with self._lock:
+            self._batches.pop(batch_id, None)
+            return self._hits.pop(batch_id, 0)
+
+    async def execute(
+        self,
+        batch_id: str,
+        query: CubeQuery,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """
+        Run a query, sharing it with identical queries in the same batch.
+
+        Args:
+            batch_id: Batch identifier ("" or an unknown batch runs the query directly)
+            query: Cube.js query
+            fetch: Zero-argument coroutine factory that executes the query
+
+        Returns:
+            Cube.js response payload
+        """
+        key = canonical_query_key(query)
+
+        with self._lock:
+            shared = self._batches.get(batch_id) if batch_id else None
+            if shared is None:
+                task = None
+            elif key in shared:
+                task = shared[key]
+                self._hits[batch_id] += 1
+                logger.info(f"Batch {batch_id}: reusing in-flight Cube.js query")
+            else:
+                task = asyncio.ensure_future(fetch())
+                shared[key] = task
+
+        if task is None:
+            return await fetch()
+
+        # Shield so one cancelled question does not cancel the query for the rest of the batch
+        return await asyncio.shield(task)
+
+
+class SpeculativeQueryStore:
+    """
+    Speculative Cube.js queries, one per request, awaiting the real query.
+
+    Each request is claimed at most once. A speculation started after its
+    request was already claimed is not sent, so a slow prediction never
+    issues a query nobody will read.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0):
+        """
+        Initialize the store.
+
+        Args:
+            ttl_seconds: Age after which unclaimed speculations are cancelled
+        """
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # request_id -> (query key or None once claimed, future or None, created monotonic time)
+        self._entries: Dict[str, Tuple[Optional[str], Optional[concurrent.futures.Future], float]] = {}
+        self._started = 0
+        self._hits = 0
+        self._misses = 0
+
+    def _expire(self, now: float) -> None:
+        """Cancel and drop entries older than the TTL (caller holds the lock)."""
+        expired = [rid for rid, (_, _, created) in self._entries.items() if now - created > self.ttl_seconds]
+        for request_id in expired:
+            _, future, _ = self._entries.pop(request_id)
+            if future is not None:
+                future.cancel()
+
+    def start(
+        self,
+        request_id: str,
+        query: CubeQuery,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> bool:
+        """
+        Start a speculative query for a request on the background loop.
+
+        Args:
+            request_id: Request the prediction was made for
+            query: Predicted Cube.js query
+            fetch: Zero-argument coroutine factory that executes the query
+
+        Returns:
+            True if the query was started, False if the request was already claimed
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if request_id in self._entries:
+                return False
+            future = submit_async(fetch())
+            self._entries[request_id] = (canonical_query_key(query), future, now)
+            self._started += 1
+        return True
+
+    def claim(self, request_id: str, query: CubeQuery) -> Optional[concurrent.futures.Future]:
+        """
+        Take the speculative result for a request if it ran the same query.
+
+        A speculation for a different query is cancelled.
+
+        Args:
+            request_id: Request identifier
+            query: Query the Analytics Specialist built
+
+        Returns:
+            Future of the Cube.js response, or None if there is nothing to reuse
+        """
+        if not request_id:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            key, future, _ = self._entries.get(request_id, (None, None, 0.0))
+            # Leave a claimed marker so a late speculation is not sent
+            self._entries[request_id] = (None, None, now)
+
+            if future is None:
+                return None
+            if key == canonical_query_key(query) and not future.cancelled():
+                self._hits += 1
+                return future
+            self._misses += 1
+
+        future.cancel()
+        logger.info(f"Request {request_id}: speculative Cube.js query did not match, discarded")
+        return None
+
+    def discard(self, request_id: str) -> None:
+        """Cancel a request's speculation (e.g. the request was cancelled)."""
+        with self._lock:
+            _, future, _ = self._entries.pop(request_id, (None, None, 0.0))
+        if future is not None:
+            future.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Speculation counters."""
+        with self._lock:
+            decided = self._hits + self._misses
+            return {
+                "started": self._started,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / decided, 3) if decided else 0.0,
+            }
+
+
+# Global deduplicator used by the Analytics Specialist
+batch_query_deduplicator = BatchQueryDeduplicator()
+
+# Global speculative query store (filled by the Query Speculator, read by the Analytics Specialist)
+speculative_queries = SpeculativeQueryStore(ttl_seconds=settings.speculative_query_ttl_seconds)
+cancellation_registry.add_listener(speculative_queries.discard)
@@ -0,0 +1,262 @@
+"""
+Rule-based query parser for the Manufacturing Advisor fast path.
+
+Many questions are a metric, an optional breakdown and an optional part family
+or press line ("OEE by shift", "defect count by operator", "pass rate for
+Door_Outer_Left"). These map directly onto the Analytics Specialist's
+METRIC_MAPPING / DIMENSION_MAPPING keys, so they can be enriched without an LLM
+call. The parser reuses EntityTracker's entity vocabulary for part families,
+press lines, defect types and time periods, and scores how much of the question
+it understood; anything it cannot fully account for goes to the LLM.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from analytics_specialist import METRIC_MAPPING, DIMENSION_MAPPING
+from session_manager_enhanced import EntityTracker
+
+# Metric phrases (longest first) -> candidate METRIC_MAPPING keys, in order of preference.
+# Candidates differ per cube, e.g. defect counts are "defect_count" on PressOperations
+# but "defects" on PressLineUtilization.
+METRIC_VOCABULARY: List[Tuple[str, Tuple[str, ...]]] = [
+    ("first pass yield", ("first_pass_yield", "pass_rate")),
+    ("cost per part", ("cost_per_part", "cost_per_unit")),
+    ("cost per unit", ("cost_per_unit", "cost_per_part")),
+    ("material cost", ("material_cost",)),
+    ("labor cost", ("labor_cost",)),
+    ("labour cost", ("labor_cost",)),
+    ("energy cost", ("energy_cost",)),
+    ("total cost", ("total_cost",)),
+    ("defect count", ("defect_count", "defects")),
+    ("rework count", ("rework_count", "rework")),
+    ("rework rate", ("rework_rate",)),
+    ("quality rate", ("quality_rate",)),
+    ("pass rate", ("pass_rate", "first_pass_yield")),
+    ("cycle time", ("cycle_time",)),
+    ("stroke rate", ("stroke_rate",)),
+    ("parts produced", ("total_parts", "count")),
+    ("utilization", ("utilization_rate",)),
+    ("utilisation", ("utilization_rate",)),
+    ("availability", ("availability",)),
+    ("performance", ("performance",)),
+    ("tonnage", ("tonnage",)),
+    ("defects", ("defect_count", "defects")),
+    ("rework", ("rework_count", "rework")),
+    ("yield", ("first_pass_yield", "pass_rate")),
+    ("cost", ("total_cost",)),
+    ("oee", ("avgOee", "oee")),
+    ("count", ("count",)),
+]
+
+# Breakdown phrases (longest first) -> DIMENSION_MAPPING keys
+DIMENSION_VOCABULARY: List[Tuple[str, str]] = [
+    ("defect severity", "defect_severity"),
+    ("quality status", "quality_status"),
+    ("material grade", "material_grade"),
+    ("part families", "part_family"),
+    ("part family", "part_family"),
+    ("press lines", "press_line_id"),
+    ("press line", "press_line_id"),
+    ("defect types", "defect_type"),
+    ("defect type", "defect_type"),
+    ("part types", "part_type"),
+    ("part type", "part_type"),
+    ("severity", "defect_severity"),
+    ("operators", "operator_id"),
+    ("operator", "operator_id"),
+    ("material", "material_grade"),
+    ("weekend", "is_weekend"),
+    ("shifts", "shift_id"),
+    ("shift", "shift_id"),
+    ("lines", "press_line_id"),
+    ("line", "press_line_id"),
+    ("dies", "die_id"),
+    ("die", "die_id"),
+    ("coils", "coil_id"),
+    ("coil", "coil_id"),
+]
+
+# Words that introduce a breakdown ("OEE by shift", "defects per operator")
+BREAKDOWN_MARKERS = re.compile(r"\b(?:by|per|across|for each|for every|for all|each)\b")
+
+# Filler words that carry no meaning for the query
+STOPWORDS = {
+    "show", "me", "what", "whats", "what's", "is", "are", "the", "a", "an", "of", "for",
+    "by", "per", "across", "each", "every", "all", "and", "give", "get", "list", "display",
+    "please", "tell", "compare", "comparison", "breakdown", "break", "down", "in", "on",
+    "our", "current", "overall", "average", "avg", "mean", "metrics", "rate", "rates",
+    "how", "many", "much", "number", "do", "we", "have", "with", "to", "can", "you",
+}
+
+# Entities the fast path cannot express as filters; questions mentioning them go to the LLM
+UNSUPPORTED_ENTITIES = ("defect_types", "time_period")
+
+# Negations invert a filter ("defects excluding line A"); the fast path cannot express them
+NEGATIONS = re.compile(r"\b(?:not|excluding|exclude|except|without|other than)\b|n't\b")
+
+# "for weekend" / "on weekdays" restrict the data; only "by weekend" is a breakdown
+WEEKEND_FILTER = re.compile(r"(?<!\bby )(?<!\bper )\b(weekends?|weekdays?)\b")
+
+# Cubes tried for a breakdown, most specific first (see the advisor's cube selection guide)
+CUBE_PREFERENCE = {
+    "part_family": ["PartFamilyPerformance", "PressOperations"],
+    "press_line_id": ["PressLineUtilization", "PressOperations"],
+}
+
+# Press line mentions -> press_line_id values stored in the warehouse
+# ("LINE_A" alone is only the line_name)
+PRESS_LINE_PATTERNS = [
+    (re.compile(r"\b(?:line[ _]a|800t)\b"), "LINE_A_800T"),
+    (re.compile(r"\b(?:line[ _]b|1200t)\b"), "LINE_B_1200T"),
+]
+
+
+def _tokens(text: str) -> List[str]:
+    """Lowercase word tokens (underscores kept, so Door_Outer_Left is one token)."""
+    return re.findall(r"[a-z0-9_']+", text.lower())
+
+
+def _consume(text: str, phrase: str) -> Tuple[bool, str]:
+    """Remove a whole-word phrase from text, reporting whether it was present."""
+    pattern = re.compile(rf"\b{re.escape(phrase)}\b")
+    if not pattern.search(text):
+        return False, text
+    return True, pattern.sub(" ", text)
+
+
+def _select_cube(
+    metric_candidates: List[Tuple[str, ...]],
+    dimensions: List[str],
+    filter_keys: List[str]
+) -> Optional[Tuple[str, List[str]]]:
+    """
+    Pick the first preferred cube that has every dimension and filter and a mapping for every metric.
+
+    Returns:
+        (cube name, metric keys for that cube), or None if no cube fits
+    """
+    cubes = ["PressOperations"]
+    for dim in dimensions:
+        if dim in CUBE_PREFERENCE:
+            cubes = CUBE_PREFERENCE[dim]
+            break
+
+    for cube in cubes:
+        metric_map = METRIC_MAPPING.get(cube, {})
+        dimension_map = DIMENSION_MAPPING.get(cube, {})
+
+        if not all(dim in dimension_map for dim in dimensions + filter_keys):
+            continue
+
+        metrics = []
+        for candidates in metric_candidates:
+            key = next((c for c in candidates if c in metric_map), None)
+            if key is None:
+                break
+            metrics.append(key)
+        else:
+            return cube, metrics
+
+    return None
+
+
+def parse_query(message: str) -> Tuple[Optional[Dict[str, Any]], float]:
+    """
+    Parse a question into the Manufacturing Advisor's enrichment dict.
+
+    Args:
+        message: User's natural language query
+
+    Returns:
+        Tuple of (enrichment dict or None, confidence in [0, 1]).
+        Confidence is the share of content words the parser accounted for;
+        it is 0 when no metric is found or the question needs something the
+        fast path cannot express (time ranges, defect types, negations,
+        unknown cube).
+    """
+    entities = EntityTracker().extract_entities(message)
+    if any(entity in entities for entity in UNSUPPORTED_ENTITIES):
+        return None, 0.0
+    if NEGATIONS.search(message.lower()):
+        return None, 0.0
+
+    text = message.lower()
+    total_words = len([t for t in _tokens(text) if t not in STOPWORDS]) or 1
+
+    # Part families and press lines become filters
+    part_families = entities.get("part_families", [])
+    if part_families:
+        for token in ("door_outer_left", "door_outer_right", "bonnet_outer", "doors", "door", "bonnet", "outer", "left", "right"):
+            _, text = _consume(text, token)
+
+    # EntityTracker keeps only the first press line, so both are matched here
+    filters: Dict[str, Any] = {}
+    press_lines = [line_id for pattern, line_id in PRESS_LINE_PATTERNS if pattern.search(text)]
+    if press_lines:
+        filters["press_line_id"] = press_lines[0] if len(press_lines) == 1 else press_lines
+        for token in ("line a", "line b", "line_a", "line_b", "800t", "1200t"):
+            _, text = _consume(text, token)
+
+    weekend = WEEKEND_FILTER.search(text)
+    if weekend:
+        filters["is_weekend"] = "true" if weekend.group(1).startswith("weekend") else "false"
+        text = text[:weekend.start()] + " " + text[weekend.end():]
+
+    # Dimensions only count after a breakdown marker, so "pass rate for line A" is not a breakdown
+    dimensions: List[str] = []
+    marker = BREAKDOWN_MARKERS.search(text)
+    if marker:
+        head, tail = text[:marker.start()], text[marker.start():]
+        for phrase, dim in DIMENSION_VOCABULARY:
+            found, tail = _consume(tail, phrase)
+            if found and dim not in dimensions:
+                dimensions.append(dim)
+        text = head + " " + tail
+
+    # Several lines or part families are compared, not summed into one number
+    if len(press_lines) > 1 and "press_line_id" not in dimensions:
+        dimensions.append("press_line_id")
+    if len(part_families) > 1 and "part_family" not in dimensions:
+        dimensions.append("part_family")
+
+    metric_candidates: List[Tuple[str, ...]] = []
+    for phrase, candidates in METRIC_VOCABULARY:
+        found, text = _consume(text, phrase)
+        if found and candidates not in metric_candidates:
+            metric_candidates.append(candidates)
+
+    # A generic "count" adds nothing to a specific metric ("count of defects")
+    if len(metric_candidates) > 1 and ("count",) in metric_candidates:
+        metric_candidates.remove(("count",))
+
+    if not metric_candidates:
+        return None, 0.0
+
+    selection = _select_cube(metric_candidates, dimensions, list(filters))
+    if selection is None:
+        return None, 0.0
+    cube, metrics = selection
+
+    if part_families and "part_family" not in DIMENSION_MAPPING.get(cube, {}):
+        return None, 0.0
+    if filters and not all(key in DIMENSION_MAPPING.get(cube, {}) for key in filters):
+        return None, 0.0
+
+    unknown_words = [t for t in _tokens(text) if t not in STOPWORDS]
+    confidence = max(0.0, 1.0 - len(unknown_words) / total_words)
+
+    intent = "_".join(metrics)
+    if dimensions:
+        intent += "_by_" + "_".join(dimensions)
+
+    enrichment = {
+        "is_in_scope": True,
+        "rejection_reason": "",
+        "user_intent": intent,
+        "part_families": part_families,
+        "metrics": metrics,
+        "dimensions": dimensions,
+        "cube_recommendation": cube,
+        "filters": filters,
+    }
+
+    return enrichment, round(confidence, 3)
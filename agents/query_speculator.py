@@ -0,0 +1,60 @@
+"""
+Query Speculator Agent.
+
+Predicts the Cube.js query of a user_query with the rule-based query parser and
+starts it immediately, in parallel with the Manufacturing Advisor's LLM
+enrichment. When the Analytics Specialist later builds the same canonical
+query it reuses the in-flight request, hiding Cube.js latency behind the LLM.
+"""
+import logging
+from praval import agent, Spore
+from config import settings
+from query_parser import parse_query
+from query_dedupe import speculative_queries
+from cancellation import cancellation_registry
+from agent_registry import agent_registry
+from analytics_specialist import AnalyticsSpecialistAgent
+
+logger = logging.getLogger(__name__)
+
+
+# Praval agent decorator
+@agent(
+    "query_speculator",
+    responds_to=["user_query"],
+    system_message="Speculative agent starting likely Cube.js queries before enrichment completes",
+    auto_broadcast=False
+)
+def query_speculator_handler(spore: Spore):
+    """
+    Start a speculative Cube.js query for a user query.
+
+    Skipped for batch questions (they already share queries), cancelled
+    requests, and questions the parser cannot interpret with enough confidence.
+
+    Args:
+        spore: Spore with user_query knowledge
+    """
+    if not settings.speculative_query_enabled:
+        return
+
+    knowledge = spore.knowledge
+    request_id = knowledge.get("request_id", "")
+
+    if not request_id or knowledge.get("batch_id") or cancellation_registry.is_cancelled(request_id):
+        return
+
+    enrichment, confidence = parse_query(knowledge.get("message", ""))
+    if enrichment is None or confidence < settings.speculative_query_min_confidence:
+        return
+
+    specialist = agent_registry.get(AnalyticsSpecialistAgent)
+    try:
+        query = specialist.build_cube_query(enrichment)
+    except Exception as e:
+        logger.info(f"No speculative query for request {request_id}: {e}")
+        return
+
+    deadline = knowledge.get("deadline")
+    if speculative_queries.start(request_id, query, lambda: specialist.client.execute_query(query, deadline)):
+        logger.info(f"Started speculative Cube.js query for request {request_id} (confidence {confidence:.2f})")
@@ -2,25 +2,41 @@
 Report Writer Agent.
 
 Technical writer who creates executive summaries and data narratives.
-Combines chart and insights into final response (session correlation).
+Combines chart and insights into final response (request correlation).
 """
-import json
 import logging
-from typing import Dict, List, Any, Optional
+import threading
+import time
+from typing import Callable, Dict, List, Any, Optional
 from praval import agent, broadcast, Spore
-from openai import AsyncOpenAI
 from config import settings
+from llm_gateway import llm_gateway
+from prompts import NARRATIVE_SYSTEM_PROMPT
+from llm_usage import usage_ledger
 from async_utils import run_async
+from cancellation import cancellation_registry, RequestCancelled
+from deadlines import has_budget
+from follow_ups import generate_follow_ups
+from agent_registry import agent_registry, get_openai_client
+from response_registry import response_registry
 
 logger = logging.getLogger(__name__)
 
-# Session correlation storage
-# {session_id: {"chart": chart_spec, "insights": insights_knowledge}}
-_session_data: Dict[str, Dict[str, Any]] = {}
+# Request correlation storage
+# {request_id: {"chart": chart_spec, "insights": insights_knowledge}}
+_request_data: Dict[str, Dict[str, Any]] = {}
 
-# Pending responses for app.py endpoint to retrieve
-# {session_id: final_response_knowledge}
-_pending_responses: Dict[str, Dict[str, Any]] = {}
+# chart_ready and insights_ready arrive on different Reef worker threads
+_request_data_lock = threading.Lock()
+
+
+def _discard_request_data(request_id: str) -> None:
+    """Drop partial chart/insights for a cancelled request (the other half will never arrive)."""
+    with _request_data_lock:
+        _request_data.pop(request_id, None)
+
+
+cancellation_registry.add_listener(_discard_request_data)
 
 
 # Response storage agent - listens for final_response_ready and stores for HTTP endpoint
@@ -32,19 +48,17 @@ _pending_responses: Dict[str, Dict[str, Any]] = {}
 )
 def response_storage_handler(spore: Spore):
     """
-    Store final responses for HTTP endpoint retrieval.
+    Deliver final responses to the waiting HTTP endpoint.
     This agent listens to final_response_ready broadcasts from any source.
     """
-    global _pending_responses
-
     knowledge = spore.knowledge
-    session_id = knowledge.get("session_id", "")
+    request_id = knowledge.get("request_id") or knowledge.get("session_id", "")
 
-    logger.info(f"Response Storage received final_response_ready for session {session_id}")
+    logger.info(f"Response Storage received final_response_ready for request {request_id}")
 
-    # Store the response
-    _pending_responses[session_id] = knowledge
-    logger.info(f"Stored response for session {session_id}")
+    # Wake the endpoint awaiting this request (no-op if already delivered)
+    if response_registry.resolve(request_id, knowledge):
+        logger.info(f"Delivered response for request {request_id}")
 
 
 class ReportWriterAgent:
@@ -56,7 +70,7 @@ class ReportWriterAgent:
 
     def __init__(self):
         """Initialize the Report Writer Agent."""
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = get_openai_client()
         self.model = settings.openai_model
         logger.info("Report Writer Agent initialized")
 
@@ -64,15 +78,29 @@ class ReportWriterAgent:
         self,
         chart_spec: Dict[str, Any],
         insights: Dict[str, Any],
-        session_id: str
+        session_id: str,
+        request_id: str = "",
+        deadline: Optional[float] = None,
+        measures: Optional[List[str]] = None,
+        dimensions: Optional[List[str]] = None,
+        on_delta: Optional[Callable[[str], None]] = None
     ) -> Dict[str, Any]:
         """
         Compose final narrative from chart and insights.
 
+        Makes a single LLM call; follow-up questions are generated deterministically.
+        When on_delta is given the completion is streamed and each text delta is
+        passed to it as it arrives; the returned payload still carries the full text.
+
         Args:
             chart_spec: Chart specification from Visualization Specialist
             insights: Insights from Quality Inspector
             session_id: Session identifier
+            request_id: Request correlation identifier
+            deadline: Absolute request deadline (epoch seconds)
+            measures: Measures in the query (for follow-up suggestions)
+            dimensions: Dimensions in the query (for follow-up suggestions)
+            on_delta: Callback receiving narrative text deltas (enables streaming)
 
         Returns:
             final_response_ready knowledge payload
@@ -81,10 +109,29 @@ class ReportWriterAgent:
         anomalies = insights.get("anomalies", [])
         root_causes = insights.get("root_causes", [])
 
-        # Build narrative prompt
-        prompt = f"""You are a technical writer creating a data narrative for manufacturing analytics.
+        follow_ups = generate_follow_ups(
+            chart_type=chart_spec.get("type", "unknown"),
+            measures=measures,
+            dimensions=dimensions,
+            observations=observations,
+            anomalies=anomalies,
+            root_causes=root_causes,
+        )
+
+        # Not enough time left for the LLM call - answer with the deterministic narrative
+        if not has_budget(deadline, settings.budget_narrative_seconds, "narrative"):
+            return {
+                "type": "final_response_ready",
+                "narrative": self._create_fallback_narrative(observations, anomalies, root_causes),
+                "chart_spec": chart_spec,
+                "follow_ups": follow_ups,
+                "session_id": session_id,
+                "request_id": request_id,
+                "cacheable": False,
+            }
 
-Chart Type: {chart_spec.get('type', 'unknown')}
+        # Build narrative prompt (structure and style live in the system prefix)
+        prompt = f"""Chart Type: {chart_spec.get('type', 'unknown')}
 Number of Data Points: {len(chart_spec.get('data', {}).get('labels', []))}
 
 Insights:
@@ -96,51 +143,26 @@ Anomalies ({len(anomalies)}):
 
 Root Causes ({len(root_causes)}):
 {self._format_root_causes(root_causes)}
-
-Compose a clear, actionable narrative following this structure:
-
-🔍 Key Findings:
-• [3-5 bullet points highlighting the most important observations]
-• Use specific numbers and percentages
-• Focus on comparisons and trends
-
-🔧 Root Causes:
-• [2-3 bullet points explaining WHY these patterns exist]
-• Connect to manufacturing factors (die wear, material, operator, etc.)
-• Only include if root causes were identified
-
-💡 Recommended Actions:
-• [2-3 bullet points with specific next steps]
-• Prioritize immediate vs long-term actions
-• Be concrete and actionable
-
-Guidelines:
-- Use clear, professional language
-- Avoid jargon overload
-- Start with the most important findings
-- Include context (e.g., "28% fewer defects" not just "36 defects")
-- Be concise (3-5 sentences per section)
-- Skip sections if no relevant insights (e.g., skip Root Causes if none identified)
-
-Respond with ONLY the narrative text (no JSON, no extra formatting).
 """
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=800,
-            )
-
-            narrative = response.choices[0].message.content.strip()
-            logger.info(f"Composed narrative ({len(narrative)} chars)")
+            if on_delta is not None and settings.narrative_streaming_enabled:
+                narrative = await self._stream_narrative(prompt, on_delta)
+            else:
+                response = await llm_gateway.complete(
+                    self.client,
+                    "report_writer",
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": NARRATIVE_SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt},
+                    ],
+                    temperature=0.3,
+                    max_tokens=800,
+                )
+                narrative = response.choices[0].message.content.strip()
 
-            # Use LLM to generate contextual follow-up questions
-            chart_type = chart_spec.get("type", "unknown")
-            follow_ups = await self._generate_follow_ups(
-                observations, root_causes, chart_type, narrative
-            )
+            logger.info(f"Composed narrative ({len(narrative)} chars)")
 
             return {
                 "type": "final_response_ready",
@@ -148,6 +170,9 @@ Respond with ONLY the narrative text (no JSON, no extra formatting).
                 "chart_spec": chart_spec,
                 "follow_ups": follow_ups,
                 "session_id": session_id,
+                "request_id": request_id,
+                # A good narrative of fallback insights is still a degraded answer
+                "cacheable": not insights.get("degraded", False),
             }
 
         except Exception as e:
@@ -159,10 +184,55 @@ Respond with ONLY the narrative text (no JSON, no extra formatting).
                 "type": "final_response_ready",
                 "narrative": narrative,
                 "chart_spec": chart_spec,
-                "follow_ups": [],
+                "follow_ups": follow_ups,
                 "session_id": session_id,
+                "request_id": request_id,
+                "cacheable": False,
             }
 
+    async def _stream_narrative(self, prompt: str, on_delta: Callable[[str], None]) -> str:
+        """
+        Stream the narrative completion, forwarding each text delta.
+
+        Args:
+            prompt: Narrative prompt
+            on_delta: Callback receiving each non-empty text delta
+
+        Returns:
+            Assembled narrative text
+        """
+        start = time.monotonic()
+        stream = await llm_gateway.complete(
+            self.client,
+            "report_writer",
+            model=self.model,
+            messages=[
+                {"role": "system", "content": NARRATIVE_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.3,
+            max_tokens=800,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+        parts: List[str] = []
+        usage = None
+        # Closing the stream frees its LLM concurrency slot even if on_delta fails
+        async with stream:
+            async for chunk in stream:
+                # The trailing usage chunk carries no choices
+                if not chunk.choices:
+                    usage = getattr(chunk, "usage", None)
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    on_delta(delta)
+
+        usage_ledger.record("report_writer", self.model, time.monotonic() - start, usage)
+        return "".join(parts).strip()
+
     def _format_observations(self, observations: List[Dict[str, Any]]) -> str:
         """Format observations for prompt."""
         if not observations:
@@ -207,85 +277,6 @@ Respond with ONLY the narrative text (no JSON, no extra formatting).
 
         return "\n".join(lines)
 
-    async def _generate_follow_ups(
-        self,
-        observations: List[Dict[str, Any]],
-        root_causes: List[Dict[str, Any]],
-        chart_type: str,
-        narrative: str
-    ) -> List[str]:
-        """
-        Use LLM to generate contextual follow-up question suggestions.
-
-        Args:
-            observations: Observation insights
-            root_causes: Root cause hypotheses
-            chart_type: Type of chart displayed
-            narrative: The narrative that was generated
-
-        Returns:
-            List of follow-up question strings
-        """
-        # Build context for LLM
-        context_parts = []
-
-        if observations:
-            context_parts.append(f"Key observations: {', '.join([obs.get('text', '') for obs in observations[:2]])}")
-
-        if root_causes:
-            context_parts.append(f"Root causes identified: {', '.join([rc.get('hypothesis', '') for rc in root_causes[:2]])}")
-
-        context_parts.append(f"Chart type shown: {chart_type}")
-
-        context = "\n".join(context_parts)
-
-        prompt = f"""You are helping users explore manufacturing analytics data. Based on the current analysis, suggest 3 logical follow-up questions.
-
-Current Analysis:
-{context}
-
-Narrative shown to user:
-{narrative}
-
-Available data includes:
-- OEE, quality metrics, defect analysis
-- Part families: Door_Outer_Left, Door_Outer_Right, Bonnet_Outer
-- Press lines: LINE_A, LINE_B
-- Dimensions: shift, die, operator, material grade, time
-
-Generate 3 specific, actionable follow-up questions that:
-1. Drill deeper into findings (e.g., if defects found, suggest breaking down by shift)
-2. Explore related metrics (e.g., if showing quality, suggest cost analysis)
-3. Investigate root causes (e.g., if material issue suspected, suggest supplier comparison)
-
-Respond with JSON:
-{{
-    "follow_ups": ["question 1", "question 2", "question 3"]
-}}
-
-Make questions natural and specific to the current analysis. Don't be generic."""
-
-        try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"},
-                temperature=0.4,
-                max_tokens=200,
-            )
-
-            result = json.loads(response.choices[0].message.content)
-            return result.get("follow_ups", [])[:3]
-
-        except Exception as e:
-            logger.error(f"Error generating follow-ups: {e}")
-            # Fallback to generic suggestions
-            return [
-                "Show me OEE trends over the past month",
-                "Compare defect rates across different shifts",
-                "What's the cost breakdown by part family?"
-            ]
-
     def _create_fallback_narrative(
         self,
         observations: List[Dict[str, Any]],
@@ -325,59 +316,70 @@ Make questions natural and specific to the current analysis. Don't be generic.""
 def report_writer_handler(spore: Spore):
     """
     Handle chart_ready and insights_ready Spores.
-    Implements session correlation - waits for BOTH before composing.
+    Implements request correlation - waits for BOTH before composing.
 
     Args:
         spore: Spore with chart_ready or insights_ready knowledge
     """
-    import asyncio
-
-    global _session_data
-
     logger.info(f"Report Writer received spore: {spore.id}")
 
     # Extract knowledge from spore
     knowledge = spore.knowledge
     spore_type = knowledge.get("type")
     session_id = knowledge.get("session_id", "")
+    # Spores from producers without request correlation fall back to the session
+    request_id = knowledge.get("request_id") or session_id
+
+    if cancellation_registry.is_cancelled(request_id):
+        logger.info(f"Request {request_id} was cancelled - skipping {spore_type}")
+        return
 
-    logger.info(f"Processing {spore_type} (session {session_id})")
+    logger.info(f"Processing {spore_type} (session {session_id}, request {request_id})")
 
-    # Initialize session data if needed
-    if session_id not in _session_data:
-        _session_data[session_id] = {
+    with _request_data_lock:
+        # Initialize request data if needed
+        request = _request_data.setdefault(request_id, {
             "chart": None,
             "insights": None,
-        }
+        })
 
-    # Accumulate data based on spore type
-    if spore_type == "chart_ready":
-        # Store full chart specification from Visualization Specialist
-        _session_data[session_id]["chart"] = knowledge.get("chart_spec", {"type": "unknown"})
-        logger.info(f"Received chart_ready for session {session_id}")
+        # Both Spores carry the request deadline; keep whichever arrives
+        if knowledge.get("deadline") is not None:
+            request["deadline"] = knowledge["deadline"]
 
-    elif spore_type == "insights_ready":
-        _session_data[session_id]["insights"] = knowledge
-        _session_data[session_id]["is_rejected"] = knowledge.get("is_rejected", False)
-        logger.info(f"Received insights_ready for session {session_id}")
+        # Accumulate data based on spore type
+        if spore_type == "chart_ready":
+            # Store full chart specification from Visualization Specialist
+            request["chart"] = knowledge.get("chart_spec", {"type": "unknown"})
+            request["measures"] = knowledge.get("measures", [])
+            request["dimensions"] = knowledge.get("dimensions", [])
+            logger.info(f"Received chart_ready for request {request_id}")
 
-    # Check if we have BOTH chart and insights
-    session = _session_data.get(session_id, {})
-    has_chart = session.get("chart") is not None
-    has_insights = session.get("insights") is not None
+        elif spore_type == "insights_ready":
+            request["insights"] = knowledge
+            request["is_rejected"] = knowledge.get("is_rejected", False)
+            logger.info(f"Received insights_ready for request {request_id}")
+
+        # Check if we have BOTH chart and insights
+        has_chart = request.get("chart") is not None
+        has_insights = request.get("insights") is not None
+
+        # Claim the request atomically so only one thread composes the response
+        if has_chart and has_insights:
+            del _request_data[request_id]
 
     if has_chart and has_insights:
-        logger.info(f"Session {session_id}: Have BOTH chart and insights, composing final response")
+        logger.info(f"Request {request_id}: Have BOTH chart and insights, composing final response")
 
-        # Initialize writer
-        writer = ReportWriterAgent()
+        # Get shared writer instance
+        writer = agent_registry.get(ReportWriterAgent)
 
         # Check if rejected query
-        is_rejected = session.get("is_rejected", False)
+        is_rejected = request.get("is_rejected", False)
 
         if is_rejected:
             logger.info(f"Rejected query - generating rejection response")
-            rejection_reason = session["insights"].get("rejection_reason", "Query out of scope")
+            rejection_reason = request["insights"].get("rejection_reason", "Query out of scope")
             final_response = {
                 "type": "final_response_ready",
                 "narrative": f"I can only answer questions about automotive press manufacturing data. {rejection_reason}\n\nPlease ask about:\n• Production metrics (OEE, quality, defects, costs)\n• Press line performance\n• Part family analysis\n• Shift comparisons\n• Trends over time",
@@ -387,29 +389,44 @@ def report_writer_handler(spore: Spore):
                     "Show me quality metrics by part family"
                 ],
                 "session_id": session_id,
+                "request_id": request_id,
             }
         else:
-            # All in-scope queries - compose narrative with LLM
-            final_response = run_async(writer.compose_narrative(
-                chart_spec=session["chart"],
-                insights=session["insights"],
-                session_id=session_id
-            ))
-
-        # Store response for app.py endpoint to retrieve
-        global _pending_responses
-        _pending_responses[session_id] = final_response
-        logger.info(f"Stored final_response in _pending_responses for session {session_id}")
+            # All in-scope queries - compose narrative with LLM,
+            # streaming token deltas when a /chat/stream client is listening
+            on_delta = None
+            if response_registry.has_stream(request_id):
+                def on_delta(delta: str) -> None:
+                    response_registry.publish(request_id, "narrative_delta", {"delta": delta})
+
+            try:
+                final_response = run_async(writer.compose_narrative(
+                    chart_spec=request["chart"],
+                    insights=request["insights"],
+                    session_id=session_id,
+                    request_id=request_id,
+                    deadline=request.get("deadline"),
+                    measures=request.get("measures"),
+                    dimensions=request.get("dimensions"),
+                    on_delta=on_delta
+                ), request_id=request_id)
+            except RequestCancelled:
+                logger.info(f"Request {request_id} was cancelled during narrative composition")
+                return
+
+        if cancellation_registry.is_cancelled(request_id):
+            logger.info(f"Request {request_id} was cancelled - not broadcasting final_response_ready")
+            return
+
+        # Deliver response to the waiting app.py endpoint without an extra Reef hop
+        response_registry.resolve(request_id, final_response)
+        logger.info(f"Resolved final_response for request {request_id}")
 
         # Broadcast final_response_ready
-        logger.info(f"Broadcasting final_response_ready for session {session_id}")
+        logger.info(f"Broadcasting final_response_ready for request {request_id}")
         broadcast(final_response)
 
-        # Cleanup session data
-        del _session_data[session_id]
-        logger.info(f"Cleaned up session data for {session_id}")
-
     else:
-        logger.info(f"Session {session_id}: Waiting for {'insights' if has_chart else 'chart'}")
+        logger.info(f"Request {request_id}: Waiting for {'insights' if has_chart else 'chart'}")
 
     return
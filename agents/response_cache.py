@@ -0,0 +1,115 @@
+"""
+Final-answer cache for /chat.
+
+Keyed by the normalized question, a fingerprint of the conversation context and
+the warehouse data version, so a repeated question is answered without any LLM
+or Cube.js call until the data changes. Entries expire after a TTL and the
+least recently used entry is evicted when the cache is full.
+"""
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(message: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", message.strip().lower()).rstrip("?!. ")
+
+
+def context_fingerprint(context: List[Dict[str, str]]) -> str:
+    """Short stable hash of the conversation context."""
+    serialized = json.dumps(
+        [{"role": m.get("role"), "content": m.get("content")} for m in context],
+        sort_keys=True
+    )
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(message: str, context: List[Dict[str, str]], data_version: str) -> str:
+    """Cache key for a question asked in a given context against a data version."""
+    return f"{data_version}:{context_fingerprint(context)}:{normalize_question(message)}"
+
+
+class ResponseCache:
+    """
+    LRU cache of final_response_ready knowledge with per-entry TTL.
+
+    All methods must be called from the server event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+    ):
+        """Initialize the cache (defaults come from settings)."""
+        self.max_entries = max_entries if max_entries is not None else settings.response_cache_max_entries
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.response_cache_ttl_seconds
+
+        # key -> (expires_at, final_response)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for a key, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        expires_at, response = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self._expirations += 1
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return response
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """Store a response, evicting the least recently used entries if full."""
+        if self.max_entries <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of cache metrics."""
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+        }
+
+
+# Global final-answer cache for chat endpoints
+response_cache = ResponseCache()
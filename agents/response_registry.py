@@ -0,0 +1,148 @@
+"""
+Completion registry for HTTP endpoints waiting on Praval agents.
+
+Praval handlers run on Reef worker threads, while FastAPI endpoints await on the
+server event loop. An endpoint registers an asyncio.Future before broadcasting
+its user_query Spore; whichever agent produces final_response_ready resolves
+that Future thread-safely, waking the endpoint immediately instead of polling.
+
+Streaming endpoints additionally open a per-request event queue that receives
+each intermediate pipeline stage as the agents produce it.
+"""
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _set_future_result(future: asyncio.Future, result: Any) -> None:
+    """Set a Future result unless it was already resolved or cancelled."""
+    if not future.done():
+        future.set_result(result)
+
+
+class ResponseRegistry:
+    """Maps correlation keys to Futures awaited by HTTP endpoints."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._waiters: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._streams: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = {}
+
+    def register(self, key: str) -> asyncio.Future:
+        """
+        Register a waiter for the given key.
+
+        Must be called from the event loop that will await the Future.
+
+        Args:
+            key: Correlation key (request identifier)
+
+        Returns:
+            Future resolved with the final_response_ready knowledge
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            self._waiters[key] = (loop, future)
+        return future
+
+    def resolve(self, key: str, response: Dict[str, Any]) -> bool:
+        """
+        Resolve the waiter for the given key from any thread.
+
+        Args:
+            key: Correlation key (request identifier)
+            response: final_response_ready knowledge payload
+
+        Returns:
+            True if a waiter was found and scheduled for completion
+        """
+        with self._lock:
+            waiter = self._waiters.pop(key, None)
+
+        if waiter is None:
+            logger.debug(f"No waiter registered for {key}, dropping response")
+            return False
+
+        loop, future = waiter
+        try:
+            loop.call_soon_threadsafe(_set_future_result, future, response)
+        except RuntimeError:
+            # Event loop already closed (e.g. server shutting down)
+            logger.warning(f"Event loop closed before response for {key} could be delivered")
+            return False
+
+        return True
+
+    def discard(self, key: str) -> None:
+        """Remove the waiter for the given key (after timeout or delivery)."""
+        with self._lock:
+            self._waiters.pop(key, None)
+
+    def open_stream(self, key: str) -> asyncio.Queue:
+        """
+        Open a stage event queue for the given key.
+
+        Must be called from the event loop that will consume the queue.
+
+        Args:
+            key: Correlation key (request identifier)
+
+        Returns:
+            Queue receiving (event, data) tuples in arrival order
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._streams[key] = (loop, queue)
+        return queue
+
+    def publish(self, key: str, event: str, data: Dict[str, Any]) -> bool:
+        """
+        Publish a stage event to the stream for the given key from any thread.
+
+        Args:
+            key: Correlation key (request identifier)
+            event: Stage name (e.g. chart_ready)
+            data: Event payload
+
+        Returns:
+            True if a stream was open for the key
+        """
+        with self._lock:
+            stream = self._streams.get(key)
+
+        if stream is None:
+            return False
+
+        loop, queue = stream
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+        except RuntimeError:
+            logger.warning(f"Event loop closed before {event} for {key} could be delivered")
+            return False
+
+        return True
+
+    def has_stream(self, key: str) -> bool:
+        """Check whether a streaming endpoint is listening for the given key."""
+        with self._lock:
+            return key in self._streams
+
+    def close_stream(self, key: str) -> None:
+        """Remove the stage event queue for the given key."""
+        with self._lock:
+            self._streams.pop(key, None)
+
+    def pending_count(self) -> int:
+        """Number of endpoints currently waiting for a response."""
+        with self._lock:
+            return len(self._waiters)
+
+
+# Global registry instance
+response_registry = ResponseRegistry()
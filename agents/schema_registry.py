@@ -0,0 +1,344 @@
+"""
+Process-wide registry of the Cube.js schema.
+
+/meta used to be downloaded by every health check, every metadata question and
+each CubeJsTools lookup. The registry loads it once at startup, refreshes it in
+the background (conditional on the ETag when Cube.js sends one, and skipping
+the rebuild when the document is unchanged) and answers lookups of cubes,
+measures, dimensions and member types from indexes built once per schema
+version.
+
+Indexes are rebuilt off to the side and swapped in with a single assignment,
+so lookups from any thread or event loop never see a half-built schema.
+Listeners (e.g. the Analytics Specialist's member mappings) are called after
+every swap, and validate_query() checks a CubeQuery against the schema before
+it is sent.
+"""
+import asyncio
+import difflib
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+from config import settings
+from cubejs_client import cubejs_client
+from models import CubeQuery
+
+logger = logging.getLogger(__name__)
+
+# Filter operators understood by Cube.js
+FILTER_OPERATORS = {
+    "equals", "notEquals", "contains", "notContains", "startsWith", "notStartsWith",
+    "endsWith", "notEndsWith", "gt", "gte", "lt", "lte", "set", "notSet",
+    "inDateRange", "notInDateRange", "beforeDate", "beforeOrOnDate", "afterDate",
+    "afterOrOnDate", "measureFilter",
+}
+
+# Operators that take no values
+VALUELESS_OPERATORS = {"set", "notSet"}
+
+TIME_GRANULARITIES = {"second", "minute", "hour", "day", "week", "month", "quarter", "year"}
+
+
+def _member_name(cube_name: str, member: Dict[str, Any]) -> str:
+    """Full member name (Cube.js /meta returns it qualified; tolerate short names)."""
+    name = member.get("name", "")
+    return name if "." in name else f"{cube_name}.{name}"
+
+
+class _SchemaIndex:
+    """Lookup tables for one version of the Cube.js schema (not modified once built)."""
+
+    def __init__(self, meta: Optional[Dict[str, Any]] = None, fingerprint: str = ""):
+        """
+        Build the indexes for a /meta document.
+
+        Args:
+            meta: Cube.js /meta response (None for an empty schema)
+            fingerprint: Hash of the document, to detect unchanged refreshes
+        """
+        self.fingerprint = fingerprint
+        self.cubes: List[Dict[str, Any]] = list((meta or {}).get("cubes", []))
+        self.cubes_by_name: Dict[str, Dict[str, Any]] = {}
+        self.measures_by_cube: Dict[str, List[str]] = {}
+        self.dimensions_by_cube: Dict[str, List[str]] = {}
+        # Full member name (Cube.member) -> {"cube", "kind", "type", "title"}
+        self.members: Dict[str, Dict[str, Any]] = {}
+
+        for cube in self.cubes:
+            cube_name = cube.get("name", "")
+            self.cubes_by_name[cube_name] = cube
+            for kind, members in (("measure", cube.get("measures", [])),
+                                  ("dimension", cube.get("dimensions", [])),
+                                  ("segment", cube.get("segments", []))):
+                names = []
+                for member in members:
+                    name = _member_name(cube_name, member)
+                    names.append(name)
+                    self.members[name] = {
+                        "cube": cube_name,
+                        "kind": kind,
+                        "type": member.get("type"),
+                        "title": member.get("title", name),
+                    }
+                if kind == "measure":
+                    self.measures_by_cube[cube_name] = names
+                elif kind == "dimension":
+                    self.dimensions_by_cube[cube_name] = names
+
+
+class SchemaRegistry:
+    """Cached Cube.js /meta with background refresh and prebuilt indexes."""
+
+    def __init__(self, client=None):
+        """
+        Initialize an empty registry.
+
+        Args:
+            client: CubeJSClient to load /meta from (defaults to the global client)
+        """
+        self.client = client or cubejs_client
+        self._index = _SchemaIndex()
+        self._etag: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._checked_at: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._refreshes = 0
+        self._rebuilds = 0
+        self._failures = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[], None]] = []
+
+    @property
+    def loaded(self) -> bool:
+        """Whether a schema has been loaded."""
+        return self._loaded_at is not None
+
+    @property
+    def connected(self) -> bool:
+        """Whether the most recent /meta fetch succeeded."""
+        return self.loaded and self._last_error is None
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """Call a function whenever a new schema (or no schema) is installed."""
+        self._listeners.append(callback)
+
+    def _notify(self) -> None:
+        """Run the listeners after the indexes were swapped."""
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Schema listener {getattr(callback, '__name__', callback)} failed: {e}", exc_info=True)
+
+    def load(self, meta: Dict[str, Any], etag: Optional[str] = None) -> bool:
+        """
+        Install a /meta document, rebuilding the indexes only if it changed.
+
+        Args:
+            meta: Cube.js /meta response
+            etag: ETag Cube.js sent with it, if any
+
+        Returns:
+            True if the schema changed
+        """
+        fingerprint = hashlib.sha256(json.dumps(meta, sort_keys=True).encode("utf-8")).hexdigest()
+        changed = fingerprint != self._index.fingerprint
+        if changed:
+            self._index = _SchemaIndex(meta, fingerprint)
+            self._rebuilds += 1
+            logger.info(f"Cube.js schema loaded: {len(self._index.cubes)} cubes, {len(self._index.members)} members")
+
+        self._etag = etag
+        self._loaded_at = self._checked_at = time.time()
+        self._last_error = None
+        if changed:
+            self._notify()
+        return changed
+
+    async def refresh(self) -> bool:
+        """
+        Fetch /meta (conditionally on the last ETag) and install it.
+
+        Returns:
+            True if the fetch succeeded (changed, unchanged or not modified)
+        """
+        self._refreshes += 1
+        try:
+            meta, etag = await self.client.fetch_meta(etag=self._etag if self.loaded else None)
+        except Exception as e:
+            self._failures += 1
+            self._checked_at = time.time()
+            self._last_error = str(e) or type(e).__name__
+            logger.warning(f"Cube.js schema refresh failed: {self._last_error}")
+            return False
+
+        if meta is None:
+            # 304 Not Modified
+            self._loaded_at = self._checked_at = time.time()
+            self._last_error = None
+        else:
+            self.load(meta, etag)
+        return True
+
+    async def ensure_loaded(self) -> bool:
+        """Load the schema now if it has never been loaded; True if it is available."""
+        if not self.loaded:
+            await self.refresh()
+        return self.loaded
+
+    async def _refresh_periodically(self) -> None:
+        """Refresh on the configured interval (sooner after a failed fetch)."""
+        while True:
+            delay = (
+                settings.schema_refresh_interval_seconds if self.connected
+                else settings.schema_refresh_retry_seconds
+            )
+            await asyncio.sleep(delay)
+            await self.refresh()
+
+    def start_background_refresh(self) -> None:
+        """Start refreshing on the running event loop (idempotent)."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh_periodically())
+
+    async def stop_background_refresh(self) -> None:
+        """Stop the background refresh task."""
+        task, self._refresh_task = self._refresh_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def clear(self) -> None:
+        """Forget the loaded schema."""
+        self._index = _SchemaIndex()
+        self._etag = None
+        self._loaded_at = self._checked_at = None
+        self._last_error = None
+        self._notify()
+
+    def cubes(self) -> List[Dict[str, Any]]:
+        """Cube documents as returned by /meta."""
+        return self._index.cubes
+
+    def cube_names(self) -> List[str]:
+        """Names of all cubes."""
+        return list(self._index.cubes_by_name)
+
+    def cube(self, name: str) -> Optional[Dict[str, Any]]:
+        """Cube document by name, or None."""
+        return self._index.cubes_by_name.get(name)
+
+    def measures(self, cube_name: str) -> List[str]:
+        """Full measure names of a cube ([] for unknown cubes)."""
+        return self._index.measures_by_cube.get(cube_name, [])
+
+    def dimensions(self, cube_name: str) -> List[str]:
+        """Full dimension names of a cube ([] for unknown cubes)."""
+        return self._index.dimensions_by_cube.get(cube_name, [])
+
+    def member(self, name: str) -> Optional[Dict[str, Any]]:
+        """Member info ({"cube", "kind", "type", "title"}) by full name, or None."""
+        return self._index.members.get(name)
+
+    def member_type(self, name: str) -> Optional[str]:
+        """Cube.js type of a member (e.g. "number", "string", "time"), or None."""
+        member = self._index.members.get(name)
+        return member["type"] if member else None
+
+    def _check_member(self, name: Any, kinds: tuple, role: str) -> Dict[str, Any]:
+        """Look up a query member, raising ValueError with a precise message if it is not usable."""
+        if not isinstance(name, str) or "." not in name:
+            raise ValueError(f"Invalid {role} {name!r}: expected 'Cube.member'")
+
+        member = self._index.members.get(name)
+        if member is not None and member["kind"] in kinds:
+            return member
+
+        cube_name = name.split(".", 1)[0]
+        if cube_name not in self._index.cubes_by_name:
+            raise ValueError(f"Invalid {role} '{name}': unknown cube '{cube_name}'")
+        if member is not None:
+            raise ValueError(f"Invalid {role} '{name}': it is a {member['kind']}")
+
+        candidates = [
+            candidate for candidate, info in self._index.members.items()
+            if info["cube"] == cube_name and info["kind"] in kinds
+        ]
+        suggestion = difflib.get_close_matches(name, candidates, n=1)
+        hint = f" (did you mean '{suggestion[0]}'?)" if suggestion else ""
+        raise ValueError(f"Invalid {role} '{name}': {cube_name} has no such {'/'.join(kinds)}{hint}")
+
+    def _check_filter(self, query_filter: Dict[str, Any]) -> None:
+        """Validate one filter (or an and/or group of filters)."""
+        for group in ("and", "or"):
+            if group in query_filter:
+                for nested in query_filter[group]:
+                    self._check_filter(nested)
+                return
+
+        member = query_filter.get("member") or query_filter.get("dimension")
+        self._check_member(member, ("dimension", "measure"), "filter member")
+
+        operator = query_filter.get("operator")
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"Invalid filter on '{member}': unknown operator {operator!r}")
+        if operator not in VALUELESS_OPERATORS and not query_filter.get("values"):
+            raise ValueError(f"Invalid filter on '{member}': operator '{operator}' needs values")
+
+    def validate_query(self, query: CubeQuery) -> None:
+        """
+        Check a query against the loaded schema before it is sent to Cube.js.
+
+        Does nothing while no schema is loaded (Cube.js remains the judge).
+
+        Args:
+            query: Query to check
+
+        Raises:
+            ValueError: Naming the first member, operator or granularity Cube.js would reject
+        """
+        if not self.loaded:
+            return
+
+        for measure in query.measures or []:
+            self._check_member(measure, ("measure",), "measure")
+        for dimension in query.dimensions or []:
+            self._check_member(dimension, ("dimension",), "dimension")
+        for query_filter in query.filters or []:
+            self._check_filter(query_filter)
+        for time_dimension in query.timeDimensions or []:
+            name = time_dimension.get("dimension")
+            member = self._check_member(name, ("dimension",), "time dimension")
+            if member["type"] != "time":
+                raise ValueError(f"Invalid time dimension '{name}': type is {member['type']}, not time")
+            granularity = time_dimension.get("granularity")
+            if granularity is not None and granularity not in TIME_GRANULARITIES:
+                raise ValueError(f"Invalid time dimension '{name}': unknown granularity {granularity!r}")
+        for member_name in (query.order or {}):
+            self._check_member(member_name, ("measure", "dimension"), "order member")
+
+    def status(self) -> Dict[str, Any]:
+        """Cached schema status for health checks and metrics."""
+        now = time.time()
+        return {
+            "loaded": self.loaded,
+            "connected": self.connected,
+            "cubes": len(self._index.cubes),
+            "members": len(self._index.members),
+            "age_seconds": round(now - self._loaded_at, 1) if self._loaded_at else None,
+            "last_checked_seconds_ago": round(now - self._checked_at, 1) if self._checked_at else None,
+            "last_error": self._last_error,
+            "etag": self._etag,
+            "refreshes": self._refreshes,
+            "rebuilds": self._rebuilds,
+            "failures": self._failures,
+        }
+
+
+# Global schema registry
+schema_registry = SchemaRegistry()
@@ -19,6 +19,9 @@ class UserQueryKnowledge(BaseModel):
     type: Literal["user_query"] = "user_query"
     message: str = Field(..., description="User's natural language query")
     session_id: str = Field(..., description="Unique session identifier")
+    request_id: str = Field(default="", description="Request correlation identifier (joins Spores of one question)")
+    deadline: Optional[float] = Field(None, description="Absolute request deadline (Unix epoch seconds)")
+    batch_id: str = Field(default="", description="/chat/batch identifier (shares identical Cube.js queries)")
     context: List[Dict[str, str]] = Field(
         default_factory=list,
         description="Previous conversation messages (role, content)",
@@ -41,6 +44,10 @@ class DomainEnrichedRequestKnowledge(BaseModel):
     filters: Dict[str, Any] = Field(default_factory=dict, description="Query filters")
     time_range: Optional[Dict[str, str]] = Field(None, description="Time range filter")
     session_id: str = Field(..., description="Session identifier")
+    request_id: str = Field(default="", description="Request correlation identifier (joins Spores of one question)")
+    deadline: Optional[float] = Field(None, description="Absolute request deadline (Unix epoch seconds)")
+    batch_id: str = Field(default="", description="/chat/batch identifier (shares identical Cube.js queries)")
+    degraded: bool = Field(False, description="Fallback enrichment (LLM failed or no time budget), not the user's question")
     context_notes: str = Field(default="", description="Additional context from conversation")
 
 
@@ -55,9 +62,11 @@ class DataReadyKnowledge(BaseModel):
     row_count: int = Field(..., description="Number of result rows")
     query_time_ms: int = Field(..., description="Query execution time in ms")
     session_id: str = Field(..., description="Session identifier")
+    request_id: str = Field(default="", description="Request correlation identifier (joins Spores of one question)")
+    deadline: Optional[float] = Field(None, description="Absolute request deadline (Unix epoch seconds)")
     metadata: Dict[str, Any] = Field(
         default_factory=dict,
-        description="Query metadata (data_shape, has_time_series, category_counts, etc.)",
+        description="Query metadata (data_shape, has_time_series, category_counts, degraded, etc.)",
     )
 
 
@@ -68,6 +77,10 @@ class ChartReadyKnowledge(BaseModel):
     chart_spec: Dict[str, Any] = Field(..., description="Chart.js specification")
     chart_type: str = Field(..., description="Chart type (bar, line, table, etc.)")
     session_id: str = Field(..., description="Session identifier")
+    request_id: str = Field(default="", description="Request correlation identifier (joins Spores of one question)")
+    deadline: Optional[float] = Field(None, description="Absolute request deadline (Unix epoch seconds)")
+    measures: List[str] = Field(default_factory=list, description="Measures charted")
+    dimensions: List[str] = Field(default_factory=list, description="Dimensions charted")
 
 
 class ObservationInsight(BaseModel):
@@ -105,6 +118,9 @@ class InsightsReadyKnowledge(BaseModel):
     anomalies: List[AnomalyInsight] = Field(default_factory=list, description="Detected anomalies")
     root_causes: List[RootCauseHypothesis] = Field(default_factory=list, description="Root cause hypotheses")
     session_id: str = Field(..., description="Session identifier")
+    request_id: str = Field(default="", description="Request correlation identifier (joins Spores of one question)")
+    deadline: Optional[float] = Field(None, description="Absolute request deadline (Unix epoch seconds)")
+    degraded: bool = Field(False, description="Insights are a fallback (query error, LLM failure, no time budget)")
 
 
 class FinalResponseReadyKnowledge(BaseModel):
@@ -115,6 +131,8 @@ class FinalResponseReadyKnowledge(BaseModel):
     chart_spec: Optional[Dict[str, Any]] = Field(None, description="Chart.js specification (if available)")
     follow_ups: List[str] = Field(default_factory=list, description="Suggested follow-up questions")
     session_id: str = Field(..., description="Session identifier")
+    request_id: str = Field(default="", description="Request correlation identifier (joins Spores of one question)")
+    cacheable: bool = Field(True, description="False for degraded or error answers the response cache must not keep")
     timestamp: str = Field(
         default_factory=lambda: datetime.utcnow().isoformat(),
         description="Response timestamp",
@@ -130,6 +148,7 @@ class ClarificationQuestionKnowledge(BaseModel):
         ..., description="Options for user to choose (label, text)"
     )
     session_id: str = Field(..., description="Session identifier")
+    request_id: str = Field(default="", description="Request correlation identifier (joins Spores of one question)")
 
 
 class QueryRefinementNeededKnowledge(BaseModel):
@@ -140,6 +159,7 @@ class QueryRefinementNeededKnowledge(BaseModel):
     current_row_count: int = Field(..., description="Current result row count")
     suggested_refinement: str = Field(..., description="Suggested refinement action")
     session_id: str = Field(..., description="Session identifier")
+    request_id: str = Field(default="", description="Request correlation identifier (joins Spores of one question)")
 
 
 class QueryExecutionErrorKnowledge(BaseModel):
@@ -149,6 +169,7 @@ class QueryExecutionErrorKnowledge(BaseModel):
     error: str = Field(..., description="Error message")
     error_type: str = Field(..., description="Error type (schema_error, connection_error, etc.)")
     session_id: str = Field(..., description="Session identifier")
+    request_id: str = Field(default="", description="Request correlation identifier (joins Spores of one question)")
 
 
 # ============================================================================
@@ -156,7 +177,12 @@ class QueryExecutionErrorKnowledge(BaseModel):
 # ============================================================================
 
 
-def create_user_query_knowledge(message: str, session_id: str, context: List[Dict[str, str]] = None) -> Dict[str, Any]:
+def create_user_query_knowledge(
+    message: str,
+    session_id: str,
+    context: List[Dict[str, str]] = None,
+    request_id: str = "",
+) -> Dict[str, Any]:
     """
     Create user_query knowledge payload.
 
@@ -164,6 +190,7 @@ def create_user_query_knowledge(message: str, session_id: str, context: List[Dic
         message: User's query message
         session_id: Session identifier
         context: Previous conversation messages
+        request_id: Request correlation identifier
 
     Returns:
         Dict suitable for Spore knowledge field
@@ -172,6 +199,7 @@ def create_user_query_knowledge(message: str, session_id: str, context: List[Dic
         message=message,
         session_id=session_id,
         context=context or [],
+        request_id=request_id,
     ).dict()
 
 
@@ -185,6 +213,7 @@ def create_domain_enriched_request_knowledge(
     filters: Dict[str, Any] = None,
     time_range: Optional[Dict[str, str]] = None,
     context_notes: str = "",
+    request_id: str = "",
 ) -> Dict[str, Any]:
     """
     Create domain_enriched_request knowledge payload.
@@ -199,6 +228,7 @@ def create_domain_enriched_request_knowledge(
         filters: Query filters
         time_range: Time range filter
         context_notes: Additional context
+        request_id: Request correlation identifier
 
     Returns:
         Dict suitable for Spore knowledge field
@@ -213,6 +243,7 @@ def create_domain_enriched_request_knowledge(
         filters=filters or {},
         time_range=time_range,
         context_notes=context_notes,
+        request_id=request_id,
     ).dict()
 
 
@@ -224,6 +255,7 @@ def create_data_ready_knowledge(
     session_id: str,
     query_time_ms: int,
     metadata: Dict[str, Any] = None,
+    request_id: str = "",
 ) -> Dict[str, Any]:
     """
     Create data_ready knowledge payload.
@@ -236,6 +268,7 @@ def create_data_ready_knowledge(
         session_id: Session identifier
         query_time_ms: Query execution time
         metadata: Query metadata
+        request_id: Request correlation identifier
 
     Returns:
         Dict suitable for Spore knowledge field
@@ -249,6 +282,7 @@ def create_data_ready_knowledge(
         query_time_ms=query_time_ms,
         session_id=session_id,
         metadata=metadata or {},
+        request_id=request_id,
     ).dict()
 
 
@@ -256,6 +290,7 @@ def create_chart_ready_knowledge(
     chart_spec: Dict[str, Any],
     chart_type: str,
     session_id: str,
+    request_id: str = "",
 ) -> Dict[str, Any]:
     """
     Create chart_ready knowledge payload.
@@ -264,6 +299,7 @@ def create_chart_ready_knowledge(
         chart_spec: Chart.js specification
         chart_type: Chart type
         session_id: Session identifier
+        request_id: Request correlation identifier
 
     Returns:
         Dict suitable for Spore knowledge field
@@ -272,6 +308,7 @@ def create_chart_ready_knowledge(
         chart_spec=chart_spec,
         chart_type=chart_type,
         session_id=session_id,
+        request_id=request_id,
     ).dict()
 
 
@@ -280,6 +317,7 @@ def create_insights_ready_knowledge(
     anomalies: List[Dict[str, Any]],
     root_causes: List[Dict[str, Any]],
     session_id: str,
+    request_id: str = "",
 ) -> Dict[str, Any]:
     """
     Create insights_ready knowledge payload.
@@ -289,6 +327,7 @@ def create_insights_ready_knowledge(
         anomalies: Detected anomalies
         root_causes: Root cause hypotheses
         session_id: Session identifier
+        request_id: Request correlation identifier
 
     Returns:
         Dict suitable for Spore knowledge field
@@ -298,6 +337,7 @@ def create_insights_ready_knowledge(
         anomalies=[AnomalyInsight(**anom) for anom in anomalies],
         root_causes=[RootCauseHypothesis(**rc) for rc in root_causes],
         session_id=session_id,
+        request_id=request_id,
     ).dict()
 
 
@@ -306,6 +346,7 @@ def create_final_response_ready_knowledge(
     session_id: str,
     chart_spec: Optional[Dict[str, Any]] = None,
     follow_ups: List[str] = None,
+    request_id: str = "",
 ) -> Dict[str, Any]:
     """
     Create final_response_ready knowledge payload.
@@ -315,6 +356,7 @@ def create_final_response_ready_knowledge(
         session_id: Session identifier
         chart_spec: Chart specification
         follow_ups: Follow-up question suggestions
+        request_id: Request correlation identifier
 
     Returns:
         Dict suitable for Spore knowledge field
@@ -324,4 +366,5 @@ def create_final_response_ready_knowledge(
         chart_spec=chart_spec,
         follow_ups=follow_ups or [],
         session_id=session_id,
+        request_id=request_id,
     ).dict()
@@ -0,0 +1,90 @@
+"""
+Stream Relay Agent.
+
+Forwards intermediate pipeline Spores to the /chat/stream endpoint so operators
+see each stage (enrichment, data, chart, insights) as soon as it completes.
+"""
+import logging
+from typing import Any, Dict
+from praval import agent, Spore
+from response_registry import response_registry
+
+logger = logging.getLogger(__name__)
+
+# Spore types relayed to streaming clients, in pipeline order
+STREAMED_STAGES = ["domain_enriched_request", "data_ready", "chart_ready", "insights_ready"]
+
+
+def summarize_stage(knowledge: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the client-facing payload for a pipeline stage.
+
+    Large fields (e.g. raw query rows) are left out; the chart spec is sent in full.
+
+    Args:
+        knowledge: Spore knowledge of a streamed stage
+
+    Returns:
+        Event payload dictionary
+    """
+    spore_type = knowledge.get("type")
+
+    if spore_type == "domain_enriched_request":
+        return {
+            "user_intent": knowledge.get("user_intent", ""),
+            "metrics": knowledge.get("metrics", []),
+            "dimensions": knowledge.get("dimensions", []),
+            "part_families": knowledge.get("part_families", []),
+            "cube_recommendation": knowledge.get("cube_recommendation", ""),
+            "is_rejected": knowledge.get("is_rejected", False),
+        }
+
+    if spore_type == "data_ready":
+        return {
+            "row_count": knowledge.get("row_count", 0),
+            "query_time_ms": knowledge.get("query_time_ms", 0),
+            "cube_used": knowledge.get("cube_used", ""),
+            "measures": knowledge.get("measures", []),
+            "dimensions": knowledge.get("dimensions", []),
+        }
+
+    if spore_type == "chart_ready":
+        return {
+            "chart_type": knowledge.get("chart_type", ""),
+            "chart_spec": knowledge.get("chart_spec"),
+        }
+
+    if spore_type == "insights_ready":
+        return {
+            "observations": knowledge.get("observations", []),
+            "anomalies": knowledge.get("anomalies", []),
+            "root_causes": knowledge.get("root_causes", []),
+        }
+
+    return {}
+
+
+# Praval agent decorator
+@agent(
+    "stream_relay",
+    responds_to=STREAMED_STAGES,
+    system_message="Relay agent forwarding pipeline stages to streaming HTTP clients",
+    auto_broadcast=False
+)
+def stream_relay_handler(spore: Spore):
+    """
+    Publish intermediate pipeline Spores to an open /chat/stream request.
+
+    Args:
+        spore: Spore with one of the streamed stage knowledge types
+    """
+    knowledge = spore.knowledge
+    request_id = knowledge.get("request_id", "")
+
+    # Only non-streaming requests in flight - nothing to relay
+    if not request_id or not response_registry.has_stream(request_id):
+        return
+
+    spore_type = knowledge.get("type")
+    response_registry.publish(request_id, spore_type, summarize_stage(knowledge))
+    logger.info(f"Relayed {spore_type} to stream for request {request_id}")
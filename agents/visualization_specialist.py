@@ -8,9 +8,13 @@ import json
 import logging
 from typing import Dict, List, Any, Optional
 from praval import agent, broadcast, Spore
-from openai import AsyncOpenAI
 from config import settings
+from llm_gateway import llm_gateway
+from prompts import CHART_TYPE_SYSTEM_PROMPT
 from async_utils import run_async
+from cancellation import cancellation_registry, RequestCancelled
+from deadlines import has_budget
+from agent_registry import agent_registry, get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +28,15 @@ class VisualizationSpecialistAgent:
 
     def __init__(self):
         """Initialize the Visualization Specialist Agent."""
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = get_openai_client()
         self.model = settings.openai_model
+
+        # Chart rules metrics (see chart_rules_mode)
+        self._rule_decisions = 0
+        self._llm_decisions = 0
+        self._shadow_comparisons = 0
+        self._shadow_agreements = 0
+
         logger.info("Visualization Specialist Agent initialized")
 
     async def determine_chart_type(
@@ -33,7 +44,8 @@ class VisualizationSpecialistAgent:
         data: List[Dict[str, Any]],
         measures: List[str],
         dimensions: List[str],
-        metadata: Dict[str, Any]
+        metadata: Dict[str, Any],
+        deadline: Optional[float] = None
     ) -> str:
         """
         Use LLM to determine appropriate chart type based on data characteristics.
@@ -43,6 +55,7 @@ class VisualizationSpecialistAgent:
             measures: Measures in the query
             dimensions: Dimensions in the query
             metadata: Data shape metadata from Analytics Specialist
+            deadline: Absolute request deadline (epoch seconds)
 
         Returns:
             Chart type (bar, line, table, kpi, grouped_bar, etc.)
@@ -53,38 +66,35 @@ class VisualizationSpecialistAgent:
         if row_count == 0:
             return "empty"
 
+        rule_chart_type = None
+        if settings.chart_rules_mode != "off":
+            rule_chart_type = self._rule_based_chart_type(measures, dimensions, metadata)
+
+        # Shape settles the chart type - no LLM round trip needed
+        if rule_chart_type is not None and settings.chart_rules_mode == "on":
+            self._rule_decisions += 1
+            logger.info(f"Rule-based chart type: {rule_chart_type}")
+            return rule_chart_type
+
+        if not has_budget(deadline, settings.budget_chart_selection_seconds, "chart selection"):
+            return rule_chart_type or self._heuristic_chart_type(row_count)
+
         # Build data summary for LLM
         data_summary = self._summarize_for_chart_selection(data, measures, dimensions, metadata)
 
-        prompt = f"""You are a data visualization expert. Select the most appropriate chart type for manufacturing dashboard.
-
-Data Characteristics:
+        prompt = f"""Data Characteristics:
 {data_summary}
-
-Available Chart Types:
-- kpi: Single metric display (best for 1 value, e.g., "Overall OEE: 85%")
-- bar: Simple bar chart (best for comparing 2-10 categories)
-- grouped_bar: Grouped/stacked bars (best for multi-dimensional comparisons, e.g., defects by part and type)
-- line: Line chart (best for time series trends)
-- table: Data table (best for >15 rows or complex multi-column data)
-
-Respond with JSON:
-{{
-    "chart_type": "kpi|bar|grouped_bar|line|table",
-    "reasoning": "brief explanation why this type fits the data"
-}}
-
-Guidelines:
-- KPI cards are only for single aggregate metrics
-- Bar charts work best for comparing entities (parts, lines, defects)
-- Grouped bars shine when comparing across 2 dimensions
-- Line charts are for temporal trends
-- Tables handle complexity and large datasets"""
+"""
 
         try:
-            response = await self.client.chat.completions.create(
+            response = await llm_gateway.complete(
+                self.client,
+                "visualization_specialist",
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=[
+                    {"role": "system", "content": CHART_TYPE_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
                 response_format={"type": "json_object"},
                 temperature=0.2,
             )
@@ -94,17 +104,81 @@ Guidelines:
             reasoning = result.get("reasoning", "")
 
             logger.info(f"LLM selected chart type: {chart_type} - {reasoning}")
+            self._llm_decisions += 1
+
+            # Shadow mode: record whether the rules would have agreed with the LLM
+            if rule_chart_type is not None:
+                self._shadow_comparisons += 1
+                if rule_chart_type == chart_type:
+                    self._shadow_agreements += 1
+                else:
+                    logger.info(f"Chart rules disagreed: rules={rule_chart_type}, llm={chart_type}")
+
             return chart_type
 
         except Exception as e:
             logger.error(f"Error in LLM chart type selection: {e}")
-            # Fallback to simple heuristic
-            if row_count == 1:
-                return "kpi"
-            elif row_count <= 10:
-                return "bar"
-            else:
-                return "table"
+            return self._heuristic_chart_type(row_count)
+
+    def _rule_based_chart_type(
+        self,
+        measures: List[str],
+        dimensions: List[str],
+        metadata: Dict[str, Any]
+    ) -> Optional[str]:
+        """
+        Decide the chart type from data shape when the shape alone settles it.
+
+        Args:
+            measures: Measures in the query
+            dimensions: Dimensions in the query
+            metadata: Data shape metadata from Analytics Specialist
+
+        Returns:
+            Chart type, or None for ambiguous shapes that need the LLM
+        """
+        row_count = metadata.get("row_count", 0)
+        dimension_count = len(dimensions)
+        if metadata.get("has_multiple_dimensions"):
+            dimension_count = max(dimension_count, 2)
+
+        if row_count == 1:
+            return "kpi"
+        if metadata.get("has_time_series"):
+            return "line"
+        if row_count > 15:
+            return "table"
+        if dimension_count == 2:
+            return "grouped_bar"
+        if dimension_count == 1 and len(measures) == 1 and row_count <= 10:
+            return "bar"
+
+        # e.g. several measures, 11-15 categories, 3+ dimensions
+        return None
+
+    def rule_stats(self) -> Dict[str, Any]:
+        """Chart rules usage and, in shadow mode, agreement with the LLM."""
+        decisions = self._rule_decisions + self._llm_decisions
+        return {
+            "mode": settings.chart_rules_mode,
+            "rule_decisions": self._rule_decisions,
+            "llm_decisions": self._llm_decisions,
+            "rule_rate": round(self._rule_decisions / decisions, 3) if decisions else 0.0,
+            "shadow_comparisons": self._shadow_comparisons,
+            "shadow_agreement_rate": (
+                round(self._shadow_agreements / self._shadow_comparisons, 3)
+                if self._shadow_comparisons else None
+            ),
+        }
+
+    def _heuristic_chart_type(self, row_count: int) -> str:
+        """Fallback to simple row-count heuristic."""
+        if row_count == 1:
+            return "kpi"
+        elif row_count <= 10:
+            return "bar"
+        else:
+            return "table"
 
     def _summarize_for_chart_selection(
         self,
@@ -545,25 +619,35 @@ def visualization_specialist_handler(spore: Spore):
         logger.info(f"Knowledge keys: {knowledge.keys() if isinstance(knowledge, dict) else 'not a dict'}")
 
         session_id = knowledge.get("session_id", "")
+        request_id = knowledge.get("request_id", "")
+        deadline = knowledge.get("deadline")
         query_results = knowledge.get("query_results", [])
         measures = knowledge.get("measures", [])
         dimensions = knowledge.get("dimensions", [])
         metadata = knowledge.get("metadata", {})
 
-        logger.info(f"Processing data_ready (session {session_id}): {len(query_results)} rows")
+        logger.info(f"Processing data_ready (session {session_id}, request {request_id}): {len(query_results)} rows")
     except Exception as e:
         logger.error(f"Error in visualization_specialist_handler setup: {e}", exc_info=True)
         return
 
+    if cancellation_registry.is_cancelled(request_id):
+        logger.info(f"Request {request_id} was cancelled - skipping chart generation")
+        return
+
     import asyncio
 
-    # Initialize specialist
-    specialist = VisualizationSpecialistAgent()
+    # Get shared specialist instance
+    specialist = agent_registry.get(VisualizationSpecialistAgent)
 
     # Use LLM to determine chart type
-    chart_type = run_async(specialist.determine_chart_type(
-        query_results, measures, dimensions, metadata
-    ))
+    try:
+        chart_type = run_async(specialist.determine_chart_type(
+            query_results, measures, dimensions, metadata, deadline
+        ), request_id=request_id)
+    except RequestCancelled:
+        logger.info(f"Request {request_id} was cancelled during chart selection")
+        return
     logger.info(f"LLM selected chart type: {chart_type}")
 
     # Generate actual chart specification with data
@@ -596,8 +680,17 @@ def visualization_specialist_handler(spore: Spore):
         "chart_type": str(chart_type),
         "chart_spec": chart_spec,
         "session_id": str(session_id),
+        "request_id": str(request_id),
+        "deadline": deadline,
+        # Let the Report Writer tailor follow-up questions to the breakdown shown
+        "measures": measures,
+        "dimensions": dimensions,
     }
 
+    if cancellation_registry.is_cancelled(request_id):
+        logger.info(f"Request {request_id} was cancelled - not broadcasting chart_ready")
+        return
+
     logger.info(f"About to broadcast chart_ready with chart_spec")
     try:
         broadcast(chart_ready)
@@ -5,6 +5,7 @@ Orchestrates the complete data pipeline:
 1. Extract and Load from source databases to warehouse
 2. Run dbt transformations
 3. Run dbt tests
+4. Notify the agents API that the warehouse data changed
 """
 
 from datetime import datetime, timedelta
@@ -102,7 +103,20 @@ dbt_test_task = BashOperator(
     dag=dag,
 )
 
-# Task 4: Generate summary report
+# Task 4: Bump the agents' data version so cached answers are recomputed on new data
+# A notification failure must not fail the pipeline; cached answers then expire by TTL
+notify_data_version_task = BashOperator(
+    task_id='notify_data_version',
+    bash_command="""
+    curl -sf -X POST "${AGENTS_API_URL:-http://agents:8000}/data-version" \
+         -H 'Content-Type: application/json' \
+         -d '{"token": "{{ run_id }}"}' \
+    || echo "WARNING: could not notify agents API of new data version"
+    """,
+    dag=dag,
+)
+
+# Task 5: Generate summary report
 def generate_summary(**context):
     """Generate pipeline execution summary"""
     execution_date = context['execution_date']
@@ -121,4 +135,4 @@ summary_task = PythonOperator(
 )
 
 # Define task dependencies
-el_pipeline_task >> dbt_run_task >> dbt_test_task >> summary_task
+el_pipeline_task >> dbt_run_task >> dbt_test_task >> notify_data_version_task >> summary_task
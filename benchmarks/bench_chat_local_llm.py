@@ -0,0 +1,79 @@
+"""
+Benchmark: end-to-end /chat latency and throughput with the local LLM stand-in.
+
+Runs the full Praval pipeline (Reef, all agents, response cache) without
+network access: LLM_BACKEND=local replaces OpenAI, and Cube.js is replaced by
+a synthetic result set. Useful for CI and air-gapped perf runs.
+
+Usage:
+    python benchmarks/bench_chat_local_llm.py [requests] [concurrency] [llm_latency_seconds]
+"""
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+# Configure before the agents read their settings
+os.environ["LLM_BACKEND"] = "local"
+os.environ.setdefault("OPENAI_API_KEY", "local")
+os.environ.setdefault("LOCAL_LLM_LATENCY_SECONDS", sys.argv[3] if len(sys.argv) > 3 else "0.2")
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from fastapi.testclient import TestClient
+from app import app
+from cubejs_client import cubejs_client
+
+QUESTIONS = [
+    "OEE by press line",
+    "defect count by operator",
+    "pass rate by shift",
+    "cost per part by part family",
+    "What is driving the scrap on the bonnet line this week?",
+]
+
+# Synthetic Cube.js response (one row per operator)
+CUBE_RESULT = {
+    "data": [
+        {"PressOperations.operatorId": f"OP{i:03d}", "PressOperations.defectCount": str(10 + i % 7)}
+        for i in range(12)
+    ]
+}
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    with patch.object(cubejs_client, "execute_query", new_callable=AsyncMock, return_value=CUBE_RESULT), \
+         patch.object(cubejs_client, "fetch_meta", new_callable=AsyncMock, return_value=({"cubes": []}, None)), \
+         TestClient(app) as client:
+
+        def ask(index: int) -> float:
+            start = time.perf_counter()
+            response = client.post("/chat", json={"message": QUESTIONS[index % len(QUESTIONS)]})
+            response.raise_for_status()
+            return time.perf_counter() - start
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = sorted(pool.map(ask, range(requests)))
+        elapsed = time.perf_counter() - started
+
+        metrics = client.get("/metrics").json()
+
+    print(f"/chat with local LLM ({requests} requests, concurrency {concurrency})")
+    print(f"  throughput:   {requests / elapsed:8.1f} req/s")
+    print(f"  latency p50:  {statistics.median(latencies) * 1000:8.1f} ms")
+    print(f"  latency p95:  {latencies[int(0.95 * (len(latencies) - 1))] * 1000:8.1f} ms")
+    print(f"  cache hits:   {metrics['response_cache']['hits']:8d}")
+    print(f"  LLM tokens:   {sum(a['total_tokens'] for a in metrics['llm_usage']['agents'].values()):8d}")
+
+
+if __name__ == "__main__":
+    main()
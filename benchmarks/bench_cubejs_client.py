@@ -0,0 +1,103 @@
+"""
+Benchmark: per-query overhead of the Cube.js HTTP client.
+
+Compares the previous behavior (a new httpx.AsyncClient, and with it a new
+TCP connection and pool, per query) against the persistent, keep-alive client
+of CubeJSClient. A local HTTP/1.1 server stands in for Cube.js so only client
+and connection overhead is measured.
+
+Usage:
+    python benchmarks/bench_cubejs_client.py [queries] [concurrency]
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "local")
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+import httpx
+from cubejs_client import CubeJSClient
+from models import CubeQuery
+
+RESPONSE = json.dumps({
+    "data": [{"PressOperations.shiftId": f"SHIFT_{i}", "PressOperations.passRate": "94.5"} for i in range(3)]
+}).encode()
+
+QUERY = CubeQuery(measures=["PressOperations.passRate"], dimensions=["PressOperations.shiftId"])
+
+
+class CubeStub(BaseHTTPRequestHandler):
+    """Minimal keep-alive Cube.js /load endpoint."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def per_call_client(api_url: str, secret: str) -> None:
+    """Previous behavior: a new client (and connection) per query."""
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        response = await client.post(
+            f"{api_url}/load",
+            json={"query": QUERY.model_dump(exclude_none=True)},
+            headers={"Content-Type": "application/json", "Authorization": secret},
+        )
+        response.raise_for_status()
+        response.json()
+
+
+async def run(label: str, call, queries: int, concurrency: int) -> None:
+    """Run queries with bounded concurrency and print the per-query cost."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await call()
+
+    await call()  # warm up
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(queries)])
+    elapsed = time.perf_counter() - start
+    print(f"  {label:28s} {elapsed / queries * 1000:7.3f} ms/query   {queries / elapsed:8.0f} queries/s")
+
+
+async def main():
+    queries = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CubeStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}/cubejs-api/v1"
+    client = CubeJSClient(api_url=api_url, api_secret="bench")
+
+    print(f"Cube.js client overhead ({queries} queries, concurrency {concurrency})")
+    try:
+        await run("new client per query", lambda: per_call_client(api_url, "bench"), queries, concurrency)
+        await run("persistent pooled client", lambda: client.execute_query(QUERY), queries, concurrency)
+    finally:
+        await client.aclose()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+Benchmark: prompt building cost and cacheable share of prompt tokens.
+
+Every agent sends a static system prefix (agents/prompts.py) followed by a
+per-request user message. This benchmark
+
+1. times building the messages of a call (the prefix is built once at import
+   time, only the user message is formatted per call), and
+2. runs the /chat pipeline with the local LLM stand-in, captures every LLM
+   call and reports the share of prompt tokens that sit in the static prefix,
+   i.e. are reusable by a provider's prompt prefix cache (OpenAI caches
+   prefixes of 1024+ tokens).
+
+Usage:
+    python benchmarks/bench_prompt_prefixes.py [iterations]
+"""
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+# Configure before the agents read their settings
+os.environ["LLM_BACKEND"] = "local"
+os.environ.setdefault("OPENAI_API_KEY", "local")
+os.environ["LOCAL_LLM_LATENCY_SECONDS"] = "0"
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from fastapi.testclient import TestClient
+from app import app
+from cubejs_client import cubejs_client
+from data_digest import estimate_tokens
+from local_llm import _Completions
+from prompts import PROMPT_PREFIXES, PROMPT_VERSION
+
+# OpenAI only caches prompt prefixes of at least this many tokens
+MIN_CACHEABLE_PREFIX_TOKENS = 1024
+
+QUESTIONS = [
+    "OEE by press line",
+    "defect count by operator",
+    "What is driving the scrap on the bonnet line this week?",
+    "Compare quality between the door panels",
+]
+
+CUBE_RESULT = {
+    "data": [
+        {"PressOperations.operatorId": f"OP{i:03d}", "PressOperations.defectCount": str(10 + i % 7)}
+        for i in range(12)
+    ]
+}
+
+
+def bench_build(iterations: int) -> None:
+    """Per-call cost of building the messages: the prefix is reused, only the suffix is formatted."""
+    print(f"Prompt building ({iterations} calls per agent, prompt version {PROMPT_VERSION})")
+    user_message, context_str = "defect count by operator", "user: OEE by line"
+    for name, prefix in PROMPT_PREFIXES.items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            [
+                {"role": "system", "content": prefix},
+                {"role": "user", "content": f'Previous Context:\n{context_str}\n\nUser Query: "{user_message}"'},
+            ]
+        elapsed = time.perf_counter() - start
+        print(f"  {name:32s} {elapsed / iterations * 1e6:6.2f} us/call   prefix: {estimate_tokens(prefix):5d} tok")
+
+
+def bench_cacheable_share() -> None:
+    """Share of prompt tokens in the static system prefix, per agent."""
+    calls = []
+    original_create = _Completions.create
+
+    async def capturing_create(self, model, messages, **kwargs):
+        calls.append(messages)
+        return await original_create(self, model, messages, **kwargs)
+
+    with patch.object(_Completions, "create", capturing_create), \
+         patch.object(cubejs_client, "execute_query", new_callable=AsyncMock, return_value=CUBE_RESULT), \
+         patch.object(cubejs_client, "fetch_meta", new_callable=AsyncMock, return_value=({"cubes": []}, None)), \
+         TestClient(app) as client:
+        for question in QUESTIONS:
+            client.post("/chat", json={"message": question}).raise_for_status()
+
+    prefix_names = {prefix: name for name, prefix in PROMPT_PREFIXES.items()}
+    totals = defaultdict(lambda: {"calls": 0, "prefix": 0, "total": 0})
+    for messages in calls:
+        system = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+        entry = totals[prefix_names.get(system, "(no static prefix)")]
+        entry["calls"] += 1
+        entry["prefix"] += estimate_tokens(system) if system else 0
+        entry["total"] += sum(estimate_tokens(str(message["content"])) for message in messages)
+
+    print(f"\nCacheable prompt tokens ({len(calls)} LLM calls for {len(QUESTIONS)} questions)")
+    for name, entry in sorted(totals.items()):
+        prefix_tokens = entry["prefix"] // entry["calls"]
+        eligible = "yes" if prefix_tokens >= MIN_CACHEABLE_PREFIX_TOKENS else "below minimum"
+        print(f"  {name:32s} calls: {entry['calls']:3d}   prefix: {prefix_tokens:5d} tok   "
+              f"cacheable: {entry['prefix'] / entry['total']:6.1%}   OpenAI cache: {eligible}")
+
+    prefix_total = sum(entry["prefix"] for entry in totals.values())
+    grand_total = sum(entry["total"] for entry in totals.values())
+    print(f"  {'all agents':32s} cacheable: {prefix_total / max(1, grand_total):6.1%} of {grand_total} prompt tokens")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    bench_build(iterations)
+    bench_cacheable_share()
+
+
+if __name__ == "__main__":
+    main()
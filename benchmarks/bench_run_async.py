@@ -0,0 +1,75 @@
+"""
+Benchmark: per-call overhead of running coroutines from sync agent handlers.
+
+Compares the previous strategies (a fresh loop via asyncio.run, or a fresh
+single-thread executor running asyncio.run) against submitting to the shared
+background loop in async_utils.
+
+Usage:
+    python benchmarks/bench_run_async.py [iterations]
+"""
+import asyncio
+import concurrent.futures
+import sys
+import time
+from pathlib import Path
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from async_utils import run_async, start_background_loop, stop_background_loop
+
+
+async def noop_call():
+    """Stand-in for an awaited LLM or Cube.js call."""
+    await asyncio.sleep(0)
+    return 1
+
+
+def fresh_loop_per_call():
+    """Previous behavior with no running loop: asyncio.run() per call."""
+    return asyncio.run(noop_call())
+
+
+def fresh_thread_per_call():
+    """Previous behavior inside a running loop: new executor + asyncio.run() per call."""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, noop_call()).result(timeout=60)
+
+
+def shared_loop_call():
+    """Current behavior: submit to the long-lived background loop."""
+    return run_async(noop_call())
+
+
+def measure(fn, iterations: int) -> float:
+    """Return mean microseconds per call."""
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    start_background_loop()
+
+    try:
+        results = {
+            "asyncio.run per call": measure(fresh_loop_per_call, iterations),
+            "executor + asyncio.run per call": measure(fresh_thread_per_call, iterations),
+            "shared background loop": measure(shared_loop_call, iterations),
+        }
+    finally:
+        stop_background_loop()
+
+    baseline = results["shared background loop"]
+    print(f"run_async overhead ({iterations} calls)")
+    for name, micros in results.items():
+        print(f"  {name:<34} {micros:9.1f} us/call  ({micros / baseline:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -349,3 +349,60 @@ async def test_empty_result_handling():
     assert chart_type == "empty"
     assert insights["observations"] == []
     assert insights["anomalies"] == []
+
+
+@pytest.mark.integration
+def test_enrichment_failure_produces_uncacheable_answer():
+    """Test that the generic fallback query after an LLM failure is marked degraded end to end."""
+    from praval import Spore
+    import manufacturing_advisor
+    import analytics_specialist
+    import quality_inspector
+    import report_writer
+    from cubejs_client import cubejs_client
+
+    async def complete(client, agent, **kwargs):
+        if agent == "manufacturing_advisor":
+            raise Exception("API Error")
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = (
+            json.dumps({"observations": [{"text": "4320 operations", "confidence": 0.9}], "anomalies": [], "root_causes": []})
+            if agent == "quality_inspector" else "4320 press operations recorded."
+        )
+        return response
+
+    def spore(knowledge):
+        return Spore(id="test-spore", spore_type="broadcast", from_agent="test", to_agent=None,
+                     knowledge=knowledge, created_at=None)
+
+    broadcasts = []
+    with patch.object(manufacturing_advisor.llm_gateway, "complete", side_effect=complete), \
+         patch.object(cubejs_client, "execute_query", new_callable=AsyncMock,
+                      return_value={"data": [{"PressOperations.count": "4320"}]}), \
+         patch.object(manufacturing_advisor, "broadcast", side_effect=broadcasts.append), \
+         patch.object(analytics_specialist, "broadcast", side_effect=broadcasts.append), \
+         patch.object(quality_inspector, "broadcast", side_effect=broadcasts.append), \
+         patch.object(report_writer, "broadcast", side_effect=broadcasts.append), \
+         patch.object(report_writer, "_request_data", {}):
+        manufacturing_advisor.manufacturing_advisor_handler(spore({
+            "type": "user_query", "message": "Why is scrap so high lately?",
+            "session_id": "session-1", "request_id": "req-degraded", "context": [],
+        }))
+        enriched = broadcasts[-1]
+        analytics_specialist.analytics_specialist_handler(spore(enriched))
+        data_ready = broadcasts[-1]
+        quality_inspector.quality_inspector_handler(spore(data_ready))
+        insights = broadcasts[-1]
+        report_writer.report_writer_handler(spore({
+            "type": "chart_ready", "chart_spec": {"type": "bar"},
+            "session_id": "session-1", "request_id": "req-degraded",
+        }))
+        report_writer.report_writer_handler(spore(insights))
+        final_response = broadcasts[-1]
+
+    assert enriched["degraded"] is True
+    assert data_ready["metadata"]["degraded"] is True
+    assert insights["degraded"] is True
+    assert final_response["narrative"] == "4320 press operations recorded."
+    assert final_response["cacheable"] is False
@@ -1,5 +1,6 @@
 """Tests for FastAPI endpoints."""
 import pytest
+import json
 import sys
 from pathlib import Path
 from fastapi.testclient import TestClient
@@ -11,7 +12,13 @@ sys.path.insert(0, str(agents_dir))
 
 from app import app
 from models import CubeQuery, ChartData
-import report_writer
+from response_registry import response_registry
+from admission import AdmissionController
+from cancellation import cancellation_registry
+from config import settings
+from response_cache import ResponseCache
+from llm_usage import usage_ledger
+from schema_registry import schema_registry
 
 
 client = TestClient(app)
@@ -28,15 +35,20 @@ def test_root_endpoint():
 
 
 def test_health_endpoint():
-    """Test health check endpoint."""
-    with patch("cubejs_client.cubejs_client.health_check", new_callable=AsyncMock) as mock_health:
-        mock_health.return_value = True
+    """Test that the health check reports the cached schema status without fetching /meta."""
+    schema_registry.load({"cubes": [{"name": "PressOperations", "measures": [], "dimensions": []}]})
+    try:
+        with patch("cubejs_client.cubejs_client.fetch_meta", new_callable=AsyncMock) as mock_fetch:
+            response = client.get("/health")
 
-        response = client.get("/health")
+        mock_fetch.assert_not_called()
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "healthy"
         assert data["cubejs_connected"] is True
+        assert data["cubejs_schema"]["cubes"] == 1
+    finally:
+        schema_registry.clear()
 
 
 def test_chat_endpoint_invalid_request():
@@ -52,41 +64,266 @@ def test_chat_endpoint_creates_session():
     Analytics Specialist, and Report Writer agents. For non-data queries like
     'Hello', the system guides users toward manufacturing analytics questions.
     """
-    # Mock the report_writer._pending_responses to provide a test response
-    with patch.object(report_writer, '_pending_responses', {}) as mock_responses:
-        # Pre-populate response for any session (we don't know the ID yet)
-        # The endpoint will create a session and look for a response
-
-        # We need to mock the response after the session is created
-        # Use a side effect to capture the session_id and inject response
-        original_broadcast = None
-        captured_session_id = None
-
-        def capture_and_respond(from_agent, knowledge):
-            nonlocal captured_session_id
-            if knowledge.get("type") == "user_query":
-                captured_session_id = knowledge.get("session_id")
-                # Inject a mock response for this session
-                mock_responses[captured_session_id] = {
-                    "narrative": "Hello! I can help you analyze automotive press manufacturing data.",
-                    "chart_spec": None,
-                    "follow_ups": ["What's the OEE?", "Show me quality trends"]
-                }
-
-        with patch("app.get_reef") as mock_get_reef:
-            mock_reef = mock_get_reef.return_value
-            mock_reef.broadcast.side_effect = capture_and_respond
-            mock_reef.get_network_stats.return_value = {"channel_stats": {}}
-
-            response = client.post("/chat", json={"message": "Hello"})
+    # Resolve the completion registry as soon as the user_query is broadcast
+    captured_session_id = None
+
+    def capture_and_respond(from_agent, knowledge):
+        nonlocal captured_session_id
+        if knowledge.get("type") == "user_query":
+            captured_session_id = knowledge.get("session_id")
+            # Deliver a mock response for this request
+            response_registry.resolve(knowledge.get("request_id"), {
+                "narrative": "Hello! I can help you analyze automotive press manufacturing data.",
+                "chart_spec": None,
+                "follow_ups": ["What's the OEE?", "Show me quality trends"]
+            })
+
+    with patch("app.get_reef") as mock_get_reef:
+        mock_reef = mock_get_reef.return_value
+        mock_reef.broadcast.side_effect = capture_and_respond
+        mock_reef.get_network_stats.return_value = {"channel_stats": {}}
+
+        response = client.post("/chat", json={"message": "Hello"})
 
-        assert response.status_code == 200
-        data = response.json()
-        assert "session_id" in data
-        assert len(data["session_id"]) > 0
-        # Verify a message was returned (content may vary based on agent responses)
-        assert "message" in data
-        assert len(data["message"]) > 0
+    assert response.status_code == 200
+    data = response.json()
+    assert "session_id" in data
+    assert len(data["session_id"]) > 0
+    # Verify a message was returned (content may vary based on agent responses)
+    assert "message" in data
+    assert len(data["message"]) > 0
+
+
+def test_chat_stream_emits_stages_before_final_response():
+    """Test that /chat/stream relays each pipeline stage as an SSE event."""
+    chart_spec = {
+        "type": "bar",
+        "data": {"labels": ["LINE_A", "LINE_B"], "datasets": [{"label": "OEE", "data": [82.1, 79.4]}]},
+        "options": {"plugins": {"title": {"text": "OEE by Press Line"}}},
+    }
+
+    def publish_stages(from_agent, knowledge):
+        request_id = knowledge["request_id"]
+        response_registry.publish(request_id, "domain_enriched_request", {"metrics": ["oee"]})
+        response_registry.publish(request_id, "data_ready", {"row_count": 2, "query_time_ms": 12})
+        response_registry.publish(request_id, "chart_ready", {"chart_type": "bar", "chart_spec": chart_spec})
+        response_registry.publish(request_id, "insights_ready", {"observations": [], "anomalies": [], "root_causes": []})
+        response_registry.resolve(request_id, {
+            "narrative": "🔍 Key Findings:\n• LINE_A leads OEE at 82.1%",
+            "chart_spec": chart_spec,
+            "follow_ups": ["Compare OEE across shifts"],
+        })
+
+    with patch("app.get_reef") as mock_get_reef:
+        mock_get_reef.return_value.broadcast.side_effect = publish_stages
+
+        with client.stream("POST", "/chat/stream", json={"message": "OEE by press line"}) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            body = "".join(response.iter_text())
+
+    events = [
+        line[len("event: "):]
+        for line in body.splitlines()
+        if line.startswith("event: ")
+    ]
+    assert events == [
+        "started",
+        "domain_enriched_request",
+        "data_ready",
+        "chart_ready",
+        "insights_ready",
+        "final_response_ready",
+    ]
+
+    payloads = [
+        json.loads(line[len("data: "):])
+        for line in body.splitlines()
+        if line.startswith("data: ")
+    ]
+    assert payloads[3]["chart"]["chart_type"] == "bar"
+    assert payloads[3]["chart"]["title"] == "OEE by Press Line"
+    assert payloads[-1]["insights"] == ["LINE_A leads OEE at 82.1%"]
+    assert payloads[-1]["suggested_questions"] == ["Compare OEE across shifts"]
+
+
+def test_chat_stream_never_iterated_leaves_no_registry_entries():
+    """Test that a stream abandoned before its first event still releases everything."""
+    import asyncio
+    from app import chat_stream, admission_controller
+    from models import ChatRequest
+
+    async def abandon():
+        response = await chat_stream(ChatRequest(message="OEE by press line"))
+        request_id = next(iter(response_registry._streams))
+        # The client went away: Starlette never iterates the body, only runs the background task
+        await response.background()
+        await response.body_iterator.aclose()
+        return request_id
+
+    active = admission_controller.active
+    request_id = asyncio.run(abandon())
+
+    assert not response_registry.has_stream(request_id)
+    assert response_registry.pending_count() == 0
+    assert admission_controller.active == active
+
+
+def test_chat_endpoint_timeout_cancels_request():
+    """Test that a timed-out /chat marks its request cancelled for the agents."""
+    broadcast_request_ids = []
+
+    def capture(from_agent, knowledge):
+        broadcast_request_ids.append(knowledge["request_id"])
+
+    with patch("app.get_reef") as mock_get_reef, \
+         patch.object(settings, "chat_timeout_seconds", 0.1):
+        mock_get_reef.return_value.broadcast.side_effect = capture
+
+        response = client.post("/chat", json={"message": "OEE by press line"})
+
+    assert response.status_code == 200
+    assert response.json()["message"] == "Processing timeout. Please try again."
+    assert len(broadcast_request_ids) == 1
+    assert cancellation_registry.is_cancelled(broadcast_request_ids[0])
+
+
+def test_chat_batch_returns_results_in_question_order():
+    """Test that /chat/batch runs every question and keeps the input order."""
+    questions = ["OEE by press line", "Defects by part family", "OEE by press line"]
+    batch_ids = set()
+
+    def respond(from_agent, knowledge):
+        batch_ids.add(knowledge["batch_id"])
+        response_registry.resolve(knowledge["request_id"], {
+            "narrative": f"Answer: {knowledge['message']}",
+            "chart_spec": None,
+            "follow_ups": [],
+        })
+
+    with patch("app.get_reef") as mock_get_reef, \
+         patch("app.response_cache", ResponseCache(max_entries=0, ttl_seconds=60)):
+        mock_get_reef.return_value.broadcast.side_effect = respond
+
+        response = client.post("/chat/batch", json={"questions": questions})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["question"] for r in data["results"]] == questions
+    assert [r["response"]["message"] for r in data["results"]] == [f"Answer: {q}" for q in questions]
+    assert batch_ids == {data["batch_id"]}
+
+
+def test_chat_batch_rejects_empty_question_list():
+    """Test that an empty batch is a validation error."""
+    response = client.post("/chat/batch", json={"questions": []})
+    assert response.status_code == 422
+
+
+def test_repeated_question_is_served_from_cache_until_data_changes():
+    """Test that /chat reuses a cached answer and /data-version invalidates it."""
+    broadcasts = []
+
+    def respond(from_agent, knowledge):
+        broadcasts.append(knowledge["request_id"])
+        response_registry.resolve(knowledge["request_id"], {
+            "narrative": f"Answer #{len(broadcasts)}",
+            "chart_spec": None,
+            "follow_ups": [],
+        })
+
+    with patch("app.get_reef") as mock_get_reef, \
+         patch("app.response_cache", ResponseCache(max_entries=8, ttl_seconds=60)):
+        mock_get_reef.return_value.broadcast.side_effect = respond
+
+        first = client.post("/chat", json={"message": "Defects by part family"})
+        second = client.post("/chat", json={"message": "defects by part family?"})
+        assert client.get("/metrics").json()["response_cache"]["hits"] == 1
+
+        client.post("/data-version", json={"token": "dbt-run-1"})
+        third = client.post("/chat", json={"message": "Defects by part family"})
+
+    assert first.json()["message"] == "Answer #1"
+    assert second.json()["message"] == "Answer #1"
+    assert third.json()["message"] == "Answer #2"
+    assert len(broadcasts) == 2
+
+
+def test_error_response_is_not_cached():
+    """Test that a degraded answer is returned but the next asker gets a fresh one."""
+    broadcasts = []
+
+    def respond(from_agent, knowledge):
+        broadcasts.append(knowledge["request_id"])
+        response_registry.resolve(knowledge["request_id"], {
+            "narrative": "Cannot connect to data service" if len(broadcasts) == 1 else "Answer",
+            "chart_spec": None,
+            "follow_ups": [],
+            "cacheable": len(broadcasts) > 1,
+        })
+
+    with patch("app.get_reef") as mock_get_reef, \
+         patch("app.response_cache", ResponseCache(max_entries=8, ttl_seconds=60)):
+        mock_get_reef.return_value.broadcast.side_effect = respond
+
+        first = client.post("/chat", json={"message": "OEE by shift"})
+        second = client.post("/chat", json={"message": "OEE by shift"})
+        third = client.post("/chat", json={"message": "OEE by shift"})
+
+    assert first.json()["message"] == "Cannot connect to data service"
+    assert second.json()["message"] == "Answer"
+    assert third.json()["message"] == "Answer"
+    assert len(broadcasts) == 2
+
+
+def test_chat_debug_block_reports_llm_usage():
+    """Test that debug=true returns the request's per-agent LLM usage."""
+    def respond(from_agent, knowledge):
+        usage = type("Usage", (), {"prompt_tokens": 900, "completion_tokens": 250})()
+        usage_ledger.record("report_writer", "gpt-4o", 1.5, usage, request_id=knowledge["request_id"])
+        response_registry.resolve(knowledge["request_id"], {
+            "narrative": "Answer",
+            "chart_spec": None,
+            "follow_ups": [],
+        })
+
+    with patch("app.get_reef") as mock_get_reef, \
+         patch("app.response_cache", ResponseCache(max_entries=0, ttl_seconds=60)):
+        mock_get_reef.return_value.broadcast.side_effect = respond
+
+        plain = client.post("/chat", json={"message": "OEE by press line"})
+        response = client.post("/chat", json={"message": "OEE by press line", "debug": True})
+
+    assert plain.json()["debug"] is None
+    debug = response.json()["debug"]
+    assert debug["cache_hit"] is False
+    assert debug["llm_usage"]["agents"]["report_writer"]["total_tokens"] == 1150
+    assert debug["llm_usage"]["totals"]["cost_usd"] > 0
+
+    by_request = client.get(f"/metrics/requests/{debug['request_id']}")
+    assert by_request.json()["totals"]["prompt_tokens"] == 900
+    assert client.get("/metrics/requests/unknown-request").status_code == 404
+
+
+def test_chat_endpoint_rejects_when_saturated():
+    """Test that /chat fails fast with Retry-After when no slot is available."""
+    saturated = AdmissionController(max_concurrent=1, max_queued=0, queue_timeout=0.1)
+    saturated._active = 1
+
+    with patch("app.admission_controller", saturated):
+        response = client.post("/chat", json={"message": "OEE by press line"})
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_metrics_endpoint_reports_admission():
+    """Test that admission queue metrics are exposed."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    admission = response.json()["admission"]
+    assert "queue_depth" in admission
+    assert "avg_wait_ms" in admission
 
 
 @pytest.mark.asyncio
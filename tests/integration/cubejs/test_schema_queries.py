@@ -43,7 +43,7 @@ async def test_press_operations_cube_query():
     with patch('httpx.AsyncClient') as mock_httpx:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
-        mock_httpx.return_value.__aenter__.return_value = mock_client
+        mock_httpx.return_value = mock_client
 
         result = await client.execute_query(query)
 
@@ -78,7 +78,7 @@ async def test_part_family_performance_cube_query():
     with patch('httpx.AsyncClient') as mock_httpx:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
-        mock_httpx.return_value.__aenter__.return_value = mock_client
+        mock_httpx.return_value = mock_client
 
         result = await client.execute_query(query)
 
@@ -117,7 +117,7 @@ async def test_press_line_utilization_cube_query():
     with patch('httpx.AsyncClient') as mock_httpx:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
-        mock_httpx.return_value.__aenter__.return_value = mock_client
+        mock_httpx.return_value = mock_client
 
         result = await client.execute_query(query)
 
@@ -156,7 +156,7 @@ async def test_cube_query_with_filters():
     with patch('httpx.AsyncClient') as mock_httpx:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
-        mock_httpx.return_value.__aenter__.return_value = mock_client
+        mock_httpx.return_value = mock_client
 
         result = await client.execute_query(query)
 
@@ -192,7 +192,7 @@ async def test_cube_query_with_time_dimensions():
     with patch('httpx.AsyncClient') as mock_httpx:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
-        mock_httpx.return_value.__aenter__.return_value = mock_client
+        mock_httpx.return_value = mock_client
 
         result = await client.execute_query(query)
 
@@ -238,7 +238,7 @@ async def test_cube_metadata_retrieval():
     with patch('httpx.AsyncClient') as mock_httpx:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
-        mock_httpx.return_value.__aenter__.return_value = mock_client
+        mock_httpx.return_value = mock_client
 
         metadata = await client.get_meta()
 
@@ -272,7 +272,7 @@ async def test_cube_query_error_handling():
     with patch('httpx.AsyncClient') as mock_httpx:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
-        mock_httpx.return_value.__aenter__.return_value = mock_client
+        mock_httpx.return_value = mock_client
 
         with pytest.raises(ValueError, match="Cube.js query failed"):
             await client.execute_query(query)
@@ -302,7 +302,7 @@ async def test_cube_query_with_limit():
     with patch('httpx.AsyncClient') as mock_httpx:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
-        mock_httpx.return_value.__aenter__.return_value = mock_client
+        mock_httpx.return_value = mock_client
 
         result = await client.execute_query(query)
 
@@ -342,7 +342,7 @@ async def test_multiple_measures_single_dimension():
     with patch('httpx.AsyncClient') as mock_httpx:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
-        mock_httpx.return_value.__aenter__.return_value = mock_client
+        mock_httpx.return_value = mock_client
 
         result = await client.execute_query(query)
 
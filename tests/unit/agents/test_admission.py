@@ -0,0 +1,114 @@
+"""Unit tests for chat admission control."""
+import pytest
+import asyncio
+import sys
+from pathlib import Path
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from admission import AdmissionController, AdmissionRejected
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_admits_up_to_limit_without_waiting():
+    """Test that requests under the limit are admitted immediately."""
+    controller = AdmissionController(max_concurrent=2, max_queued=1, queue_timeout=0.1)
+
+    assert await controller.acquire() == 0.0
+    assert await controller.acquire() == 0.0
+    assert controller.active == 2
+    assert controller.queue_depth == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_queued_request_gets_released_slot():
+    """Test that a waiting request is admitted when a slot frees up."""
+    controller = AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=1.0)
+    await controller.acquire()
+
+    waiting = asyncio.ensure_future(controller.acquire())
+    await asyncio.sleep(0)
+    assert controller.queue_depth == 1
+
+    controller.release(0.5)
+    waited = await asyncio.wait_for(waiting, timeout=1.0)
+
+    assert waited >= 0.0
+    assert controller.active == 1
+    assert controller.queue_depth == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_with_429():
+    """Test that requests beyond the queue bound fail fast."""
+    controller = AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=1.0)
+    await controller.acquire()
+    waiting = asyncio.ensure_future(controller.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await controller.acquire()
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.retry_after >= 1
+    assert controller.stats()["rejected_queue_full"] == 1
+
+    waiting.cancel()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_queue_timeout_is_rejected_with_503():
+    """Test that a request not admitted in time gets a 503."""
+    controller = AdmissionController(max_concurrent=1, max_queued=4, queue_timeout=0.05)
+    await controller.acquire()
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await controller.acquire()
+
+    assert exc_info.value.status_code == 503
+    assert controller.queue_depth == 0
+    assert controller.stats()["rejected_timeout"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_admit_context_releases_slot():
+    """Test that the context manager frees the slot on exit."""
+    controller = AdmissionController(max_concurrent=1, max_queued=0, queue_timeout=0.1)
+
+    async with controller.admit():
+        assert controller.active == 1
+
+    assert controller.active == 0
+    assert controller.stats()["admitted"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_cancellation_after_handoff_passes_slot_on():
+    """Test that a waiter cancelled right after receiving a slot does not lose it."""
+    controller = AdmissionController(max_concurrent=1, max_queued=4, queue_timeout=1.0)
+    await controller.acquire()
+
+    first = asyncio.ensure_future(controller.acquire())
+    second = asyncio.ensure_future(controller.acquire())
+    await asyncio.sleep(0)
+
+    # Hand the slot to the first waiter, then cancel it before it resumes
+    controller.release()
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    # The slot went on to the next waiter, and from there back to the pool
+    await second
+    assert controller.active == 1
+    controller.release()
+    assert controller.active == 0
+    assert controller.queue_depth == 0
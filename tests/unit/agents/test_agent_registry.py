@@ -0,0 +1,56 @@
+"""Unit tests for the agent registry."""
+import pytest
+import sys
+from pathlib import Path
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from agent_registry import AgentRegistry, agent_registry
+from manufacturing_advisor import ManufacturingAdvisorAgent
+from quality_inspector import QualityInspectorAgent
+from report_writer import ReportWriterAgent
+from visualization_specialist import VisualizationSpecialistAgent
+
+
+@pytest.mark.unit
+def test_get_returns_singleton():
+    """Test that each agent class is instantiated once."""
+    registry = AgentRegistry()
+
+    first = registry.get(ReportWriterAgent)
+    second = registry.get(ReportWriterAgent)
+
+    assert first is second
+
+
+@pytest.mark.unit
+def test_llm_agents_share_one_client():
+    """Test that all LLM agents use the same pooled OpenAI client."""
+    clients = {
+        id(agent_registry.get(agent_cls).client)
+        for agent_cls in [
+            ManufacturingAdvisorAgent,
+            VisualizationSpecialistAgent,
+            QualityInspectorAgent,
+            ReportWriterAgent,
+        ]
+    }
+
+    assert clients == {id(agent_registry.get_openai_client())}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_aclose_resets_client_and_agents():
+    """Test that closing the registry drops the client and instances."""
+    registry = AgentRegistry()
+    registry.initialize([ReportWriterAgent])
+    client = registry.get_openai_client()
+    agent = registry.get(ReportWriterAgent)
+
+    await registry.aclose()
+
+    assert registry.get_openai_client() is not client
+    assert registry.get(ReportWriterAgent) is not agent
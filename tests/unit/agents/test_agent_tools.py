@@ -18,6 +18,7 @@ from agent_tools import (
     get_agent_tools,
     TOOL_REGISTRY
 )
+from schema_registry import schema_registry
 from config import settings
 
 
@@ -190,6 +191,13 @@ class TestStatisticalTools:
 class TestCubeJsTools:
     """Test suite for CubeJsTools."""
 
+    @pytest.fixture(autouse=True)
+    def empty_schema_registry(self):
+        """Start every test without a cached schema."""
+        schema_registry.clear()
+        yield
+        schema_registry.clear()
+
     @pytest.mark.asyncio
     async def test_get_available_cubes_success(self, httpx_mock: HTTPXMock):
         """Test fetching available cubes successfully."""
@@ -10,6 +10,32 @@ sys.path.insert(0, str(agents_dir))
 
 from analytics_specialist import AnalyticsSpecialistAgent, METRIC_MAPPING, DIMENSION_MAPPING
 from models import CubeQuery
+from query_dedupe import speculative_queries
+from config import settings
+from schema_registry import schema_registry
+
+PRESS_OPERATIONS_META = {
+    "cubes": [{
+        "name": "PressOperations",
+        "measures": [
+            {"name": "PressOperations.count", "type": "number"},
+            {"name": "PressOperations.avgOee", "type": "number"},
+            {"name": "PressOperations.scrapRate", "type": "number"},
+        ],
+        "dimensions": [
+            {"name": "PressOperations.shiftId", "type": "string"},
+            {"name": "PressOperations.productionDate", "type": "time"},
+        ],
+    }]
+}
+
+
+@pytest.fixture
+def loaded_schema():
+    """Install a small Cube.js schema, restoring the alias-only mappings afterwards."""
+    schema_registry.load(PRESS_OPERATIONS_META)
+    yield
+    schema_registry.clear()
 
 
 @pytest.mark.unit
@@ -202,6 +228,97 @@ def test_build_cube_query_handles_unmapped_dimensions():
     assert len(query.dimensions) == 1
 
 
+@pytest.mark.unit
+def test_mappings_are_compiled_from_the_schema(loaded_schema):
+    """Test that new members are mapped, aliases kept, and stale aliases and cubes dropped."""
+    assert METRIC_MAPPING["PressOperations"]["scrap_rate"] == "PressOperations.scrapRate"
+    assert METRIC_MAPPING["PressOperations"]["oee"] == "PressOperations.avgOee"
+    assert "pass_rate" not in METRIC_MAPPING["PressOperations"]
+    assert DIMENSION_MAPPING["PressOperations"]["shift_id"] == "PressOperations.shiftId"
+    assert "PartFamilyPerformance" not in METRIC_MAPPING
+
+
+@pytest.mark.unit
+def test_mappings_fall_back_to_aliases_without_a_schema(loaded_schema):
+    """Test that clearing the schema restores the hand-written aliases."""
+    schema_registry.clear()
+
+    assert METRIC_MAPPING["PressOperations"]["pass_rate"] == "PressOperations.passRate"
+    assert "PartFamilyPerformance" in DIMENSION_MAPPING
+
+
+@pytest.mark.unit
+def test_build_cube_query_rejects_members_missing_from_schema(loaded_schema):
+    """Test that a query Cube.js would reject fails locally with the offending member."""
+    agent = AnalyticsSpecialistAgent()
+
+    with pytest.raises(ValueError, match="Invalid measure 'PartFamilyPerformance.count': unknown cube 'PartFamilyPerformance'"):
+        agent.build_cube_query({"cube_recommendation": "PartFamilyPerformance", "metrics": ["count"]})
+
+
+@pytest.mark.unit
+def test_build_cube_query_validates_against_schema(loaded_schema):
+    """Test that valid queries pass validation unchanged."""
+    agent = AnalyticsSpecialistAgent()
+
+    query = agent.build_cube_query({
+        "cube_recommendation": "PressOperations",
+        "metrics": ["scrap_rate"],
+        "dimensions": ["shift_id"],
+        "time_range": {"start": "2024-01-01", "end": "2024-01-31"},
+    })
+
+    assert query.measures == ["PressOperations.scrapRate"]
+    assert query.timeDimensions[0]["dimension"] == "PressOperations.productionDate"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_execute_query_reuses_speculative_result():
+    """Test that a matching speculative Cube.js request is awaited instead of re-executed."""
+    agent = AnalyticsSpecialistAgent()
+    query = CubeQuery(
+        measures=["PressOperations.passRate"],
+        dimensions=["PressOperations.partFamily"]
+    )
+    speculative_result = {
+        "data": [{"PressOperations.partFamily": "Door_Outer_Left", "PressOperations.passRate": "95.5"}]
+    }
+
+    async def fetch():
+        return speculative_result
+
+    speculative_queries.start("req-speculative", query, fetch)
+
+    with patch.object(agent.client, 'execute_query', new_callable=AsyncMock) as mock_execute:
+        result = await agent.execute_query(query, "test-session-123", "req-speculative")
+
+    mock_execute.assert_not_called()
+    assert result["query_results"] == speculative_result["data"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_query_time_includes_continue_wait_polling():
+    """Test that query_time_ms covers the time spent polling a "Continue wait" query."""
+    agent = AnalyticsSpecialistAgent()
+    query = CubeQuery(measures=["PressOperations.count"], dimensions=["PressOperations.shiftId"])
+
+    waiting, ready = MagicMock(), MagicMock()
+    waiting.json.return_value = {"error": "Continue wait"}
+    ready.json.return_value = {"data": [{"PressOperations.shiftId": "SHIFT_A", "PressOperations.count": "10"}]}
+    http_client = AsyncMock()
+    http_client.post.side_effect = [waiting, waiting, ready]
+
+    with patch.object(agent.client, 'http_client', return_value=http_client), \
+         patch.object(settings, 'cubejs_cache_enabled', False), \
+         patch.object(settings, 'cubejs_poll_initial_delay_seconds', 0.05):
+        result = await agent.execute_query(query, "test-session-123")
+
+    assert result["row_count"] == 1
+    assert result["query_time_ms"] >= 150  # 0.05s + 0.1s backoff
+
+
 @pytest.mark.unit
 @pytest.mark.asyncio
 async def test_execute_query_success():
@@ -0,0 +1,88 @@
+"""Unit tests for async utilities."""
+import pytest
+import asyncio
+import concurrent.futures
+import sys
+import threading
+from pathlib import Path
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from async_utils import BackgroundLoop, background_loop, run_async
+
+
+async def _current_loop():
+    """Return the loop the coroutine runs on."""
+    return asyncio.get_running_loop()
+
+
+@pytest.mark.unit
+def test_run_async_reuses_one_background_loop():
+    """Test that consecutive calls run on the same long-lived loop."""
+    first = run_async(_current_loop())
+    second = run_async(_current_loop())
+
+    assert first is second
+    assert first is background_loop.loop
+    assert background_loop.is_running()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_run_async_from_running_loop_does_not_use_caller_loop():
+    """Test that calling from inside another event loop still works."""
+    caller_loop = asyncio.get_running_loop()
+
+    result_loop = run_async(_current_loop())
+
+    assert result_loop is not caller_loop
+    assert result_loop is background_loop.loop
+
+
+@pytest.mark.unit
+def test_run_async_from_many_threads():
+    """Test that handler threads can submit concurrently."""
+    async def double(value):
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda v: run_async(double(v)), range(16)))
+
+    assert results == [v * 2 for v in range(16)]
+
+
+@pytest.mark.unit
+def test_run_async_timeout_cancels_coroutine():
+    """Test that a timed-out coroutine is cancelled on the loop."""
+    cancelled = threading.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        run_async(slow(), timeout=0.05)
+
+    assert cancelled.wait(timeout=1.0)
+
+
+@pytest.mark.unit
+def test_background_loop_stop_and_restart():
+    """Test that a stopped loop can be started again."""
+    loop = BackgroundLoop(name="test-loop")
+    first = loop.start()
+    assert loop.start() is first
+
+    loop.stop()
+    assert loop.loop is None
+    assert first.is_closed()
+
+    second = loop.start()
+    assert second is not first
+    loop.stop()
@@ -0,0 +1,138 @@
+"""Unit tests for request cancellation."""
+import pytest
+import asyncio
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import patch
+from praval import Spore
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+import quality_inspector
+import report_writer
+from async_utils import run_async
+from cancellation import CancellationRegistry, RequestCancelled, cancellation_registry
+
+
+def _make_spore(knowledge):
+    """Build a Spore carrying the given knowledge."""
+    return Spore(
+        id="test-spore",
+        spore_type="broadcast",
+        from_agent="test",
+        to_agent=None,
+        knowledge=knowledge,
+        created_at=None,
+    )
+
+
+@pytest.mark.unit
+def test_cancel_marks_request_and_notifies_listeners():
+    """Test that cancel records the request and calls listeners."""
+    registry = CancellationRegistry()
+    notified = []
+    registry.add_listener(notified.append)
+
+    registry.cancel("req-1")
+
+    assert registry.is_cancelled("req-1")
+    assert not registry.is_cancelled("req-2")
+    assert not registry.is_cancelled("")
+    assert notified == ["req-1"]
+
+
+@pytest.mark.unit
+def test_cancelled_ids_expire():
+    """Test that old cancellations are forgotten on the next cancel."""
+    registry = CancellationRegistry(ttl_seconds=0.0)
+
+    registry.cancel("req-1")
+    registry.cancel("req-2")
+
+    assert not registry.is_cancelled("req-1")
+    assert registry.is_cancelled("req-2")
+
+
+@pytest.mark.unit
+def test_run_async_refuses_cancelled_request():
+    """Test that no coroutine is started for an already-cancelled request."""
+    started = []
+
+    async def work():
+        started.append(True)
+
+    cancellation_registry.cancel("req-already-cancelled")
+
+    with pytest.raises(RequestCancelled):
+        run_async(work(), request_id="req-already-cancelled")
+
+    assert started == []
+
+
+@pytest.mark.unit
+def test_cancel_stops_in_flight_coroutine():
+    """Test that cancelling a request cancels the coroutine run_async is waiting on."""
+    entered = threading.Event()
+    outcome = {}
+
+    async def slow_call():
+        entered.set()
+        await asyncio.sleep(10)
+
+    def handler():
+        try:
+            run_async(slow_call(), request_id="req-in-flight")
+        except RequestCancelled:
+            outcome["cancelled"] = True
+
+    thread = threading.Thread(target=handler)
+    thread.start()
+    assert entered.wait(timeout=2)
+
+    cancellation_registry.cancel("req-in-flight")
+    thread.join(timeout=2)
+
+    assert not thread.is_alive()
+    assert outcome == {"cancelled": True}
+
+
+@pytest.mark.unit
+def test_handler_skips_cancelled_request():
+    """Test that a handler does no work and broadcasts nothing for a cancelled request."""
+    cancellation_registry.cancel("req-skip")
+
+    with patch.object(quality_inspector, "broadcast") as mock_broadcast, \
+         patch.object(quality_inspector, "run_async") as mock_run_async:
+        quality_inspector.quality_inspector_handler(_make_spore({
+            "type": "data_ready",
+            "query_results": [{"line": "LINE_A", "oee": 0.8}],
+            "measures": ["oee"],
+            "dimensions": ["line"],
+            "session_id": "session-1",
+            "request_id": "req-skip",
+        }))
+
+    mock_run_async.assert_not_called()
+    mock_broadcast.assert_not_called()
+
+
+@pytest.mark.unit
+def test_cancel_discards_partial_report_data():
+    """Test that a cancelled request's stored chart does not linger in the Report Writer."""
+    with patch.object(report_writer, "broadcast"), \
+         patch.object(report_writer, "_request_data", {}) as request_data:
+        report_writer.report_writer_handler(_make_spore({
+            "type": "chart_ready",
+            "chart_type": "bar",
+            "chart_spec": {"type": "bar"},
+            "session_id": "session-1",
+            "request_id": "req-partial",
+        }))
+        assert "req-partial" in request_data
+
+        cancellation_registry.cancel("req-partial")
+
+        assert "req-partial" not in request_data
@@ -1,6 +1,8 @@
 """Unit tests for Cube.js Client."""
 import pytest
+import asyncio
 import sys
+import time
 from pathlib import Path
 from unittest.mock import AsyncMock, patch, MagicMock
 import httpx
@@ -9,7 +11,8 @@ import httpx
 agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
 sys.path.insert(0, str(agents_dir))
 
-from cubejs_client import CubeJSClient
+from cubejs_client import CubeJSClient, CubeQueryTimeout
+from config import settings
 from models import CubeQuery
 
 
@@ -62,7 +65,7 @@ async def test_execute_query_success():
     with patch('httpx.AsyncClient') as mock_httpx:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
-        mock_httpx.return_value.__aenter__.return_value = mock_client
+        mock_httpx.return_value = mock_client
 
         result = await client.execute_query(query)
 
@@ -92,7 +95,7 @@ async def test_execute_query_http_error():
     with patch('httpx.AsyncClient') as mock_httpx:
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
-        mock_httpx.return_value.__aenter__.return_value = mock_client
+        mock_httpx.return_value = mock_client
 
         with pytest.raises(ValueError, match="Cube.js query failed"):
             await client.execute_query(query)
@@ -111,7 +114,7 @@ async def test_execute_query_connection_error():
     with patch('httpx.AsyncClient') as mock_httpx:
         mock_client = AsyncMock()
         mock_client.post.side_effect = httpx.RequestError("Connection refused")
-        mock_httpx.return_value.__aenter__.return_value = mock_client
+        mock_httpx.return_value = mock_client
 
         with pytest.raises(ConnectionError, match="Cannot connect to Cube.js"):
             await client.execute_query(query)
@@ -138,7 +141,7 @@ async def test_get_meta_success():
     with patch('httpx.AsyncClient') as mock_httpx:
         mock_client = AsyncMock()
         mock_client.get.return_value = mock_response
-        mock_httpx.return_value.__aenter__.return_value = mock_client
+        mock_httpx.return_value = mock_client
 
         result = await client.get_meta()
 
@@ -169,3 +172,82 @@ async def test_health_check_unhealthy():
         result = await client.health_check()
 
     assert result is False
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_http_client_is_pooled_per_event_loop():
+    """Test that queries reuse one HTTP client per event loop and aclose() releases it."""
+    client = CubeJSClient()
+    created = []
+
+    def new_http_client():
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"data": [], "cubes": []}))
+        http_client = httpx.AsyncClient(transport=transport)
+        created.append(http_client)
+        return http_client
+
+    query = CubeQuery(measures=["PressOperations.count"])
+    with patch.object(client, '_new_http_client', side_effect=new_http_client):
+        await client.execute_query(query)
+        await client.execute_query(query)
+        await client.get_meta()
+        assert len(created) == 1
+
+        # Another event loop (e.g. the agents' background loop) gets its own client
+        await asyncio.to_thread(asyncio.run, client.get_meta())
+        assert len(created) == 2
+
+    await client.aclose()
+    assert created[0].is_closed
+
+
+def _polling_http_client(bodies):
+    """HTTP client stand-in answering /load with the given bodies in turn."""
+    responses = []
+    for body in bodies:
+        response = MagicMock()
+        response.json.return_value = body
+        responses.append(response)
+    http_client = AsyncMock()
+    http_client.post.side_effect = responses
+    return http_client
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_execute_query_polls_continue_wait_until_ready():
+    """Test that "Continue wait" is polled with backoff until the result is ready."""
+    client = CubeJSClient()
+    rows = {"data": [{"PressOperations.count": "42"}]}
+    http_client = _polling_http_client([{"error": "Continue wait"}, {"error": "Continue wait"}, rows])
+
+    with patch.object(client, 'http_client', return_value=http_client), \
+         patch.object(settings, 'cubejs_poll_initial_delay_seconds', 0.01):
+        result = await client.execute_query(CubeQuery(measures=["PressOperations.count"]))
+
+    assert result == rows
+    assert http_client.post.await_count == 3
+    stats = client.poll_stats()
+    assert stats["polled_queries"] == 1
+    assert stats["polls"] == 2
+    assert stats["wait_seconds"] >= 0.03  # 0.01s, then 0.02s backoff
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_execute_query_stops_polling_at_deadline():
+    """Test that polling gives up when the request deadline passes."""
+    client = CubeJSClient()
+    http_client = _polling_http_client([{"error": "Continue wait"}] * 100)
+
+    started = time.monotonic()
+    with patch.object(client, 'http_client', return_value=http_client), \
+         patch.object(settings, 'cubejs_poll_initial_delay_seconds', 0.01), \
+         patch.object(settings, 'cubejs_poll_max_delay_seconds', 0.02):
+        with pytest.raises(CubeQueryTimeout):
+            await client.execute_query(CubeQuery(measures=["PressOperations.count"]), deadline=time.time() + 0.1)
+
+    assert time.monotonic() - started < 1.0
+    assert client.poll_stats()["timeouts"] == 1
+    assert client.cache.stats()["entries"] == 0
@@ -0,0 +1,118 @@
+"""Unit tests for the Quality Inspector data digest."""
+import pytest
+import sys
+from pathlib import Path
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from data_digest import build_digest, estimate_tokens
+from quality_inspector import QualityInspectorAgent
+
+
+def _operator_rows(count):
+    """High-cardinality result: defect counts per operator (numbers as strings, like Cube.js)."""
+    rows = [
+        {"PressOperations.operatorId": f"OP_{i:04d}", "PressOperations.defectCount": str(10 + i % 7)}
+        for i in range(count)
+    ]
+    if count > 42:
+        rows[42]["PressOperations.defectCount"] = "250"
+    return rows
+
+
+@pytest.mark.unit
+def test_small_result_includes_all_rows():
+    """Test that raw rows are included when they fit the budget."""
+    rows = _operator_rows(3)
+
+    digest = build_digest(rows, ["PressOperations.defectCount"], ["PressOperations.operatorId"], token_budget=2000)
+
+    assert "COMPLETE DATA (all rows):" in digest
+    assert "OP_0002" in digest
+    assert "n=3" in digest
+
+
+@pytest.mark.unit
+def test_large_result_stays_within_budget():
+    """Test that 1000 rows are summarized without dumping every row."""
+    rows = _operator_rows(1000)
+
+    digest = build_digest(rows, ["PressOperations.defectCount"], ["PressOperations.operatorId"], token_budget=500, top_k=3)
+
+    assert estimate_tokens(digest) <= 500
+    assert "COMPLETE DATA" not in digest
+    assert "Raw rows omitted: 1000 rows" in digest
+    assert "n=1000" in digest
+    assert "max=250.00" in digest
+    assert "Top: OP_0042=250.00" in digest
+    assert "Outliers (outside 1.5*IQR): OP_0042=250.00" in digest
+
+
+@pytest.mark.unit
+def test_statistics_use_short_member_names_and_skip_non_numeric():
+    """Test that short keys resolve and unparseable values are ignored."""
+    rows = [
+        {"partFamily": "Door_Outer_Left", "avgOee": "80"},
+        {"partFamily": "Door_Outer_Right", "avgOee": None},
+        {"partFamily": "Bonnet_Outer", "avgOee": "90"},
+    ]
+
+    digest = build_digest(rows, ["PressOperations.avgOee"], ["PressOperations.partFamily"], token_budget=2000)
+
+    assert "n=2 min=80.00 max=90.00 mean=85.00" in digest
+    assert "Top: Bonnet_Outer=90.00, Door_Outer_Left=80.00" in digest
+
+
+class _CountingRow(dict):
+    """Result row that counts how often it is formatted."""
+
+    formatted = 0
+
+    def items(self):
+        _CountingRow.formatted += 1
+        return super().items()
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("value,max_formatted", [
+    # Keys alone exceed the budget: no row is formatted
+    ("1", 0),
+    # Long values: formatting stops at the first row past the budget
+    ("x" * 200, 20),
+])
+def test_rows_over_budget_are_not_all_formatted(value, max_formatted):
+    """Test that raw rows are abandoned as soon as they cannot fit."""
+    _CountingRow.formatted = 0
+    rows = [_CountingRow({"PressOperations.operatorId": value, "PressOperations.defectCount": "1"}) for _ in range(1000)]
+
+    digest = build_digest(rows, ["PressOperations.defectCount"], [], token_budget=1000)
+
+    assert "Raw rows omitted: 1000 rows" in digest
+    assert _CountingRow.formatted <= max_formatted
+
+
+@pytest.mark.unit
+def test_statistics_for_several_measures_match_direct_computation():
+    """Test the single-pass moments against a straightforward calculation."""
+    rows = [{"a": str(v), "b": str(v * v)} for v in (3, 1, 4, 1, 5, 9, 2, 6)]
+
+    digest = build_digest(rows, ["X.a", "X.b"], [], token_budget=2000)
+
+    values = [3, 1, 4, 1, 5, 9, 2, 6]
+    mean = sum(values) / len(values)
+    std = (sum((v - mean) ** 2 for v in values) / len(values)) ** 0.5
+    assert f"n=8 min=1.00 max=9.00 mean={mean:.2f} std={std:.2f} total=31.00" in digest
+    assert "n=8 min=1.00 max=81.00" in digest
+
+
+@pytest.mark.unit
+def test_summarize_data_respects_configured_budget():
+    """Test that the inspector prompt summary uses the digest."""
+    agent = QualityInspectorAgent()
+
+    summary = agent._summarize_data(_operator_rows(1000), ["PressOperations.defectCount"], ["PressOperations.operatorId"])
+
+    assert "ONLY analyze the data shown below" in summary
+    assert estimate_tokens(summary) < 2000
@@ -0,0 +1,37 @@
+"""Unit tests for request deadline helpers."""
+import pytest
+import sys
+import time
+from pathlib import Path
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from deadlines import has_budget, make_deadline, remaining_seconds
+
+
+@pytest.mark.unit
+def test_no_deadline_always_has_budget():
+    """Test that requests without a deadline are never degraded."""
+    assert remaining_seconds(None) is None
+    assert has_budget(None, 1000.0) is True
+
+
+@pytest.mark.unit
+def test_has_budget_compares_remaining_time():
+    """Test budget checks against an absolute deadline."""
+    deadline = make_deadline(10.0)
+
+    assert 9.0 < remaining_seconds(deadline) <= 10.0
+    assert has_budget(deadline, 5.0) is True
+    assert has_budget(deadline, 15.0) is False
+
+
+@pytest.mark.unit
+def test_expired_deadline_has_negative_remaining():
+    """Test that a passed deadline reports negative remaining time."""
+    deadline = time.time() - 2.0
+
+    assert remaining_seconds(deadline) < 0
+    assert has_budget(deadline, 0.0) is False
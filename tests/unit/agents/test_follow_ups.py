@@ -0,0 +1,68 @@
+"""Unit tests for deterministic follow-up generation."""
+import pytest
+import sys
+from pathlib import Path
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from follow_ups import generate_follow_ups
+
+
+@pytest.mark.unit
+def test_suggests_drill_down_trend_and_related_metric():
+    """Test the default mix for a bar chart of one metric by one dimension."""
+    follow_ups = generate_follow_ups(
+        chart_type="bar",
+        measures=["PressOperations.defectCount"],
+        dimensions=["PressOperations.partFamily"],
+        observations=[{"text": "Bonnet_Outer has the most defects"}],
+    )
+
+    assert follow_ups == [
+        "Break down defect count by shift",
+        "How has defect count trended over the past month?",
+        "Compare cost per part across part family",
+    ]
+
+
+@pytest.mark.unit
+def test_never_suggests_breakdown_already_shown():
+    """Test that used dimensions are skipped when drilling down."""
+    follow_ups = generate_follow_ups(
+        chart_type="grouped_bar",
+        measures=["PressOperations.avgOee"],
+        dimensions=["PressOperations.shiftId", "PressOperations.dieId"],
+        observations=[{"text": "Shift 2 trails"}],
+    )
+
+    assert "Break down OEE by operator" in follow_ups
+    assert not any(q.endswith("by shift") or q.endswith("by die") for q in follow_ups)
+
+
+@pytest.mark.unit
+def test_anomalies_and_root_causes_lead_suggestions():
+    """Test that flagged issues are investigated first."""
+    follow_ups = generate_follow_ups(
+        chart_type="bar",
+        measures=["PressOperations.defectCount"],
+        dimensions=["PressOperations.partFamily"],
+        observations=[{"text": "Door_Outer_Left spikes"}],
+        anomalies=[{"entity": "Door_Outer_Left", "metric": "defect count", "severity": "high"}],
+        root_causes=[{"hypothesis": "Die wear on DIE_07"}],
+    )
+
+    assert follow_ups[0] == "What is driving the defect count result for Door_Outer_Left?"
+    assert follow_ups[1] == "Compare defect count by die to check for die wear"
+    assert len(follow_ups) == 3
+
+
+@pytest.mark.unit
+def test_follow_ups_are_deterministic_without_query_details():
+    """Test that missing measures and dimensions still produce suggestions."""
+    first = generate_follow_ups(chart_type="kpi")
+    second = generate_follow_ups(chart_type="kpi")
+
+    assert first == second
+    assert first[0] == "Show OEE for each press line"
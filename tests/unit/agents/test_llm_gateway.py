@@ -0,0 +1,253 @@
+"""Unit tests for the LLM gateway."""
+import pytest
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+import httpx
+import openai
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from config import settings
+from llm_gateway import LLMGateway, LLMUnavailable, ModelLimiter
+
+
+def _client(create):
+    """Build a stand-in AsyncOpenAI client whose completions.create is the given mock."""
+    client = MagicMock()
+    client.chat.completions.create = create
+    return client
+
+
+def _rate_limit_error():
+    """A 429 error as raised by the OpenAI SDK."""
+    response = httpx.Response(429, headers={"retry-after": "0"}, request=httpx.Request("POST", "https://api.openai.com"))
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def _completion(prompt_tokens=120, completion_tokens=30):
+    """A completion with token usage."""
+    response = MagicMock()
+    response.usage.prompt_tokens = prompt_tokens
+    response.usage.completion_tokens = completion_tokens
+    return response
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay():
+    """Retry immediately so tests don't sleep."""
+    with patch.object(settings, "llm_retry_base_delay_seconds", 0.0):
+        yield
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_retries_rate_limit_then_succeeds():
+    """Test that a 429 is retried and the call is counted once for the calling agent."""
+    gateway = LLMGateway()
+    completion = _completion()
+    create = AsyncMock(side_effect=[_rate_limit_error(), completion])
+
+    response = await gateway.complete(_client(create), "report_writer", model="gpt-4o", messages=[])
+
+    assert response is completion
+    assert create.await_count == 2
+    assert create.call_args.kwargs["model"] == "gpt-4o"
+    stats = gateway.stats()["agents"]["report_writer"]
+    assert stats["calls"] == 1
+    assert stats["retries"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_non_retryable_error_is_raised_immediately():
+    """Test that errors other than 429/5xx/connection are not retried."""
+    gateway = LLMGateway()
+    create = AsyncMock(side_effect=ValueError("bad request"))
+
+    with pytest.raises(ValueError):
+        await gateway.complete(_client(create), "quality_inspector", model="gpt-4o", messages=[])
+
+    assert create.await_count == 1
+    assert gateway.stats()["agents"]["quality_inspector"]["errors"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_circuit_opens_after_repeated_failures():
+    """Test that an open circuit fails fast without calling OpenAI."""
+    gateway = LLMGateway()
+    create = AsyncMock(side_effect=_rate_limit_error())
+
+    with patch.object(settings, "llm_max_retries", 0), \
+         patch.object(settings, "llm_breaker_failure_threshold", 2):
+        for _ in range(2):
+            with pytest.raises(openai.RateLimitError):
+                await gateway.complete(_client(create), "manufacturing_advisor", model="gpt-4o-mini", messages=[])
+
+        with pytest.raises(LLMUnavailable):
+            await gateway.complete(_client(create), "manufacturing_advisor", model="gpt-4o-mini", messages=[])
+
+    assert create.await_count == 2
+    assert gateway.stats()["models"]["gpt-4o-mini"]["circuit"] == "open"
+    assert gateway.stats()["agents"]["manufacturing_advisor"]["short_circuited"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_model_concurrency_limit():
+    """Test that no more than the model's limit of calls run at once."""
+    gateway = LLMGateway()
+    running = 0
+    peak = 0
+
+    async def create(**kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return _completion()
+
+    with patch.object(settings, "llm_model_concurrency", {"gpt-4o": 2}):
+        await asyncio.gather(*[
+            gateway.complete(_client(create), "quality_inspector", model="gpt-4o", messages=[])
+            for _ in range(6)
+        ])
+
+    assert peak == 2
+    assert gateway.stats()["models"]["gpt-4o"]["in_flight"] == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_hedged_request_wins_over_slow_primary():
+    """Test that a call slower than the p95 latency is hedged and the faster answer returned."""
+    gateway = LLMGateway()
+    slow, fast = _completion(), _completion()
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            await asyncio.sleep(1)
+            return slow
+        return fast
+
+    with patch.object(settings, "llm_hedging_enabled", True), \
+         patch.object(settings, "llm_hedge_min_samples", 1):
+        gateway._record_success("report_writer", "gpt-4o", 0.01, _completion())
+        response = await gateway.complete(_client(create), "report_writer", model="gpt-4o", messages=[])
+
+    assert response is fast
+    assert len(calls) == 2
+    assert gateway.stats()["agents"]["report_writer"]["hedged"] == 1
+    assert gateway.stats()["agents"]["report_writer"]["hedged_cancelled"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_cancelled_hedge_loser_is_charged_estimated_prompt_tokens():
+    """Test that the losing request's prompt shows up in the usage ledger."""
+    from llm_usage import UsageLedger
+    import llm_gateway as llm_gateway_module
+
+    gateway = LLMGateway()
+    ledger = UsageLedger()
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            await asyncio.sleep(1)
+        return _completion(prompt_tokens=250, completion_tokens=40)
+
+    with patch.object(settings, "llm_hedging_enabled", True), \
+         patch.object(settings, "llm_hedge_min_samples", 1), \
+         patch.object(llm_gateway_module, "usage_ledger", ledger):
+        gateway._record_success("report_writer", "gpt-4o", 0.01, _completion())
+        await gateway.complete(_client(create), "report_writer", model="gpt-4o",
+                               messages=[{"role": "user", "content": "x" * 1000}])
+
+    totals = ledger.stats()["agents"]["report_writer"]
+    # Winner as reported, plus the loser's prompt estimated from 1000 characters
+    assert totals["calls"] == 3
+    assert totals["prompt_tokens"] == 120 + 250 + 251
+    assert totals["completion_tokens"] == 30 + 40
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot():
+    """Test that cancelling a call queued on the limiter leaves the slot count intact."""
+    limiter = ModelLimiter(1)
+    await limiter.acquire()
+
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    limiter.release()
+    assert limiter.in_flight == 0
+    assert limiter.try_acquire()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_cancelling_caller_mid_hedge_cancels_both_requests():
+    """Test that cancelling the caller stops the primary and the hedge and frees their slots."""
+    gateway = LLMGateway()
+    started, cancelled = [], []
+
+    async def create(**kwargs):
+        started.append(kwargs)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(kwargs)
+            raise
+
+    with patch.object(settings, "llm_hedging_enabled", True), \
+         patch.object(settings, "llm_hedge_min_samples", 1):
+        gateway._record_success("report_writer", "gpt-4o", 0.01, _completion())
+        call = asyncio.ensure_future(gateway.complete(_client(create), "report_writer", model="gpt-4o", messages=[]))
+        while len(started) < 2:
+            await asyncio.sleep(0.01)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        await asyncio.sleep(0)
+
+    assert len(cancelled) == 2
+    assert gateway.stats()["models"]["gpt-4o"]["in_flight"] == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_stream_holds_slot_until_consumed():
+    """Test that a streamed completion counts against the model limit until it is exhausted."""
+    gateway = LLMGateway()
+
+    async def chunks():
+        yield "a"
+        yield "b"
+
+    create = AsyncMock(side_effect=lambda **kwargs: chunks())
+
+    stream = await gateway.complete(_client(create), "report_writer", model="gpt-4o", messages=[], stream=True)
+    assert gateway.stats()["models"]["gpt-4o"]["in_flight"] == 1
+
+    assert [chunk async for chunk in stream] == ["a", "b"]
+    assert gateway.stats()["models"]["gpt-4o"]["in_flight"] == 0
+
+    # Closing a partly read stream frees the slot too
+    stream = await gateway.complete(_client(create), "report_writer", model="gpt-4o", messages=[], stream=True)
+    async with stream:
+        await stream.__anext__()
+    await stream.close()
+    assert gateway.stats()["models"]["gpt-4o"]["in_flight"] == 0
@@ -0,0 +1,93 @@
+"""Unit tests for LLM usage accounting."""
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from async_utils import run_async
+from llm_gateway import llm_gateway
+from llm_usage import UsageLedger, estimate_cost, usage_ledger
+
+
+def _usage(prompt_tokens, completion_tokens):
+    """An OpenAI-style usage object."""
+    usage = MagicMock()
+    usage.prompt_tokens = prompt_tokens
+    usage.completion_tokens = completion_tokens
+    return usage
+
+
+@pytest.mark.unit
+def test_estimate_cost_uses_model_pricing():
+    """Test that cost follows the per-million-token price of the model."""
+    assert estimate_cost("gpt-4o", 1_000_000, 0) == pytest.approx(2.50)
+    assert estimate_cost("gpt-4o-mini", 0, 1_000_000) == pytest.approx(0.60)
+    assert estimate_cost("unknown-model", 1000, 1000) == 0.0
+
+
+@pytest.mark.unit
+def test_ledger_aggregates_per_request_and_agent():
+    """Test that calls are summed per request, per agent and per model."""
+    ledger = UsageLedger()
+    ledger.record("quality_inspector", "gpt-4o", 2.0, _usage(3000, 400), request_id="req-1")
+    ledger.record("report_writer", "gpt-4o", 1.5, _usage(900, 250), request_id="req-1")
+    ledger.record("manufacturing_advisor", "gpt-4o-mini", 0.5, _usage(700, 80), request_id="req-2")
+
+    request = ledger.get("req-1")
+    assert request["totals"]["calls"] == 2
+    assert request["totals"]["prompt_tokens"] == 3900
+    assert request["totals"]["wall_seconds"] == 3.5
+    assert request["agents"]["quality_inspector"]["model"] == "gpt-4o"
+    assert request["agents"]["quality_inspector"]["cost_usd"] == pytest.approx(estimate_cost("gpt-4o", 3000, 400))
+
+    stats = ledger.stats()
+    assert stats["models"]["gpt-4o"]["total_tokens"] == 4550
+    assert stats["agents"]["manufacturing_advisor"]["calls"] == 1
+    assert ledger.get("req-unknown") is None
+
+
+@pytest.mark.unit
+def test_ledger_counts_cached_prompt_tokens():
+    """Test that prompt tokens served from the provider's prefix cache are tracked."""
+    ledger = UsageLedger()
+    cached = _usage(2000, 100)
+    cached.prompt_tokens_details.cached_tokens = 1536
+    ledger.record("quality_inspector", "gpt-4o", 1.0, cached, request_id="req-1")
+    ledger.record("quality_inspector", "gpt-4o", 1.0, _usage(2000, 100), request_id="req-1")
+
+    assert ledger.get("req-1")["totals"]["cached_prompt_tokens"] == 1536
+    assert ledger.stats()["agents"]["quality_inspector"]["prompt_tokens"] == 4000
+
+
+@pytest.mark.unit
+def test_ledger_keeps_most_recent_requests():
+    """Test that the oldest requests are dropped past max_requests."""
+    ledger = UsageLedger(max_requests=2)
+    for request_id in ("req-1", "req-2", "req-3"):
+        ledger.record("report_writer", "gpt-4o", 1.0, _usage(10, 10), request_id=request_id)
+
+    assert ledger.get("req-1") is None
+    assert ledger.get("req-3") is not None
+    assert ledger.stats()["agents"]["report_writer"]["calls"] == 3
+
+
+@pytest.mark.unit
+def test_run_async_charges_gateway_calls_to_request():
+    """Test that LLM calls inside run_async are charged to its request without passing the id."""
+    client = MagicMock()
+    response = MagicMock()
+    response.usage = _usage(500, 120)
+    client.chat.completions.create = AsyncMock(return_value=response)
+
+    run_async(
+        llm_gateway.complete(client, "visualization_specialist", model="gpt-4o-mini", messages=[]),
+        request_id="req-charged",
+    )
+
+    usage = usage_ledger.get("req-charged")
+    assert usage["agents"]["visualization_specialist"]["prompt_tokens"] == 500
+    assert usage["agents"]["visualization_specialist"]["completion_tokens"] == 120
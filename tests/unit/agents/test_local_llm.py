@@ -0,0 +1,99 @@
+"""Unit tests for the local LLM stand-in."""
+import pytest
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from config import settings
+from agent_registry import AgentRegistry
+from local_llm import LocalLLMClient
+from manufacturing_advisor import ManufacturingAdvisorAgent
+from visualization_specialist import VisualizationSpecialistAgent
+from quality_inspector import QualityInspectorAgent
+from report_writer import ReportWriterAgent
+
+
+@pytest.fixture(autouse=True)
+def no_synthetic_latency():
+    """Answer immediately."""
+    with patch.object(settings, "local_llm_latency_seconds", 0.0):
+        yield
+
+
+@pytest.mark.unit
+def test_registry_selects_local_backend():
+    """Test that llm_backend=local gives agents the stand-in client."""
+    with patch.object(settings, "llm_backend", "local"):
+        registry = AgentRegistry()
+        assert isinstance(registry.get_openai_client(), LocalLLMClient)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_completion_reports_synthetic_usage():
+    """Test that completions carry configurable token counts."""
+    client = LocalLLMClient()
+
+    with patch.object(settings, "local_llm_completion_tokens", 321):
+        response = await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": "Hello there"}],
+        )
+
+    assert response.model == "gpt-4o-mini"
+    assert response.usage.completion_tokens == 321
+    assert response.usage.total_tokens == response.usage.prompt_tokens + 321
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_pipeline_agents_get_schema_valid_answers():
+    """Test that each agent's LLM path parses the stand-in's answers."""
+    advisor = ManufacturingAdvisorAgent()
+    advisor.client = LocalLLMClient()
+    with patch.object(settings, "enrichment_fast_path_enabled", False):
+        enriched = await advisor.enrich_query("defect count by operator", [], "session-1")
+    assert enriched["metrics"] == ["defect_count"]
+    assert enriched["dimensions"] == ["operator_id"]
+
+    visualizer = VisualizationSpecialistAgent()
+    visualizer.client = LocalLLMClient()
+    data = [{"PressOperations.operatorId": f"OP{i}", "PressOperations.defectCount": str(i)} for i in range(20)]
+    with patch.object(settings, "chart_rules_mode", "off"):
+        chart_type = await visualizer.determine_chart_type(
+            data, ["PressOperations.defectCount"], ["PressOperations.operatorId"],
+            {"row_count": 20, "column_count": 2},
+        )
+    assert chart_type == "table"
+
+    inspector = QualityInspectorAgent()
+    inspector.client = LocalLLMClient()
+    insights = await inspector.analyze_data(
+        data, ["PressOperations.defectCount"], ["PressOperations.operatorId"], "PressOperations", "session-1",
+    )
+    assert insights["observations"][0]["text"] == "Query returned 20 rows"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_narrative_streams_from_stand_in():
+    """Test that the streamed narrative arrives in deltas that add up to the final text."""
+    writer = ReportWriterAgent()
+    writer.client = LocalLLMClient()
+    deltas = []
+
+    response = await writer.compose_narrative(
+        chart_spec={"type": "bar"},
+        insights={"observations": [{"text": "Query returned 20 rows", "confidence": 0.5}]},
+        session_id="session-1",
+        on_delta=deltas.append,
+    )
+
+    assert len(deltas) > 1
+    assert "".join(deltas).strip() == response["narrative"]
+    assert "• Query returned 20 rows" in response["narrative"]
@@ -10,6 +10,7 @@ agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
 sys.path.insert(0, str(agents_dir))
 
 from manufacturing_advisor import ManufacturingAdvisorAgent
+from prompts import ENRICHMENT_SYSTEM_PROMPT
 
 
 @pytest.mark.unit
@@ -123,18 +124,18 @@ async def test_enrich_query_with_filters():
         "metrics": ["avgOee"],
         "dimensions": [],
         "cube_recommendation": "PressLineUtilization",
-        "filters": {"press_line_id": "LINE_A"}
+        "filters": {"press_line_id": "LINE_A_800T"}
     })
 
     with patch.object(advisor.client.chat.completions, 'create', new_callable=AsyncMock, return_value=mock_response):
         result = await advisor.enrich_query(
-            "Show me OEE for LINE_A",
+            "How is OEE trending for LINE_A lately?",
             [],
             "test-session-123"
         )
 
     assert result["is_in_scope"] is True
-    assert result["filters"]["press_line_id"] == "LINE_A"
+    assert result["filters"]["press_line_id"] == "LINE_A_800T"
     assert "avgOee" in result["metrics"]
 
 
@@ -174,6 +175,27 @@ async def test_enrich_query_with_context():
     assert "Bonnet_Outer" in result["part_families"]
 
 
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_enrich_query_sends_static_system_prefix():
+    """Test that guardrails are a fixed system prefix and only the query varies."""
+    advisor = ManufacturingAdvisorAgent()
+
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = json.dumps({"is_in_scope": True})
+
+    with patch.object(advisor.client.chat.completions, 'create', new_callable=AsyncMock, return_value=mock_response) as mock_create:
+        await advisor.enrich_query("Why is the bonnet line scrapping parts?", [], "test-session-123")
+
+    system, user = mock_create.call_args.kwargs["messages"]
+    assert system == {"role": "system", "content": ENRICHMENT_SYSTEM_PROMPT}
+    assert "bonnet line" not in system["content"]
+    assert user["role"] == "user"
+    assert 'User Query: "Why is the bonnet line scrapping parts?"' in user["content"]
+    assert "GUARDRAILS" not in user["content"]
+
+
 @pytest.mark.unit
 @pytest.mark.asyncio
 async def test_enrich_query_error_handling():
@@ -192,6 +214,7 @@ async def test_enrich_query_error_handling():
     assert result["user_intent"] == "general_query"
     assert "count" in result["metrics"]
     assert result["cube_recommendation"] == "PressOperations"
+    assert result["degraded"] is True
 
 
 @pytest.mark.unit
@@ -314,3 +337,46 @@ async def test_enrich_query_metadata_detection():
     assert result["is_in_scope"] is True
     assert result["metrics"] == []
     assert result["dimensions"] == []
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_enrich_query_fast_path_skips_llm():
+    """Test that a well-formed question is enriched without an LLM call."""
+    advisor = ManufacturingAdvisorAgent()
+
+    with patch.object(advisor.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+        result = await advisor.enrich_query("Defect count by operator", [], "test-session-123")
+
+    mock_create.assert_not_called()
+    assert result["metrics"] == ["defect_count"]
+    assert result["dimensions"] == ["operator_id"]
+    assert result["cube_recommendation"] == "PressOperations"
+    assert advisor.fast_path_stats()["hits"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_enrich_query_low_confidence_uses_llm():
+    """Test that questions the parser cannot fully account for go to the LLM."""
+    advisor = ManufacturingAdvisorAgent()
+
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = json.dumps({
+        "is_in_scope": True,
+        "rejection_reason": "",
+        "user_intent": "defect_spike_root_cause",
+        "part_families": [],
+        "metrics": ["defect_count"],
+        "dimensions": ["defect_type"],
+        "cube_recommendation": "PressOperations",
+        "filters": {}
+    })
+
+    with patch.object(advisor.client.chat.completions, 'create', new_callable=AsyncMock, return_value=mock_response) as mock_create:
+        result = await advisor.enrich_query("Why did defects spike on LINE_A?", [], "test-session-123")
+
+    mock_create.assert_called_once()
+    assert result["user_intent"] == "defect_spike_root_cause"
+    assert advisor.fast_path_stats()["misses"] == 1
@@ -2,6 +2,7 @@
 import pytest
 import sys
 import json
+import time
 from pathlib import Path
 from unittest.mock import AsyncMock, patch, MagicMock
 
@@ -78,6 +79,7 @@ async def test_analyze_data_empty_dataset():
     assert result["anomalies"] == []
     assert result["root_causes"] == []
     assert result["session_id"] == "test-session-123"
+    assert result["degraded"] is False
 
 
 @pytest.mark.unit
@@ -139,3 +141,24 @@ async def test_analyze_data_error_handling():
     assert result["type"] == "insights_ready"
     assert result["observations"] == []
     assert result["session_id"] == "test-session-123"
+    assert result["degraded"] is True
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_analyze_data_returns_empty_insights_when_deadline_budget_low():
+    """Test that an exhausted deadline skips the LLM and returns empty insights."""
+    agent = QualityInspectorAgent()
+
+    data = [{"PressOperations.partFamily": "Bonnet_Outer", "PressOperations.defectCount": "12"}]
+
+    with patch.object(agent.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+        insights = await agent.analyze_data(
+            data, ["PressOperations.defectCount"], ["PressOperations.partFamily"],
+            "PressOperations", "session-1", "req-1", deadline=time.time() - 1
+        )
+
+    mock_create.assert_not_called()
+    assert insights["observations"] == []
+    assert insights["request_id"] == "req-1"
+    assert insights["degraded"] is True
@@ -0,0 +1,141 @@
+"""Unit tests for the Cube.js query-result cache."""
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+import query_cache as query_cache_module
+from query_cache import QueryResultCache
+from cubejs_client import CubeJSClient, canonical_query_key
+from data_version import data_version
+from models import CubeQuery
+
+
+def _rows(count):
+    """A Cube.js result with the given number of rows."""
+    return {"data": [{"PressOperations.operatorId": f"OP{i:03d}", "PressOperations.defectCount": str(i)} for i in range(count)]}
+
+
+@pytest.mark.unit
+def test_hit_returns_independent_copy():
+    """Test that hits are counted and callers cannot modify the cached result."""
+    cache = QueryResultCache(max_bytes=10_000, ttl_seconds=60)
+    cache.put("k1", _rows(2))
+
+    first = cache.get("k1")
+    first["data"].clear()
+
+    assert cache.get("k1") == _rows(2)
+    assert cache.get("k2") is None
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["hit_rate"] == pytest.approx(0.667, abs=0.001)
+
+
+@pytest.mark.unit
+def test_least_recently_used_results_are_evicted_past_max_bytes():
+    """Test that the cache stays within its byte budget, evicting LRU entries."""
+    entry_bytes = len(query_cache_module.json.dumps(_rows(5), separators=(",", ":")))
+    cache = QueryResultCache(max_bytes=entry_bytes * 2, ttl_seconds=60, compress_min_bytes=10**9)
+
+    cache.put("k1", _rows(5))
+    cache.put("k2", _rows(5))
+    cache.get("k1")
+    cache.put("k3", _rows(5))
+
+    assert cache.get("k2") is None
+    assert cache.get("k1") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+@pytest.mark.unit
+def test_expired_result_is_a_miss():
+    """Test that results are not served after their TTL."""
+    cache = QueryResultCache(max_bytes=10_000, ttl_seconds=10)
+
+    with patch.object(query_cache_module.time, "monotonic", return_value=100.0):
+        cache.put("k1", _rows(1))
+    with patch.object(query_cache_module.time, "monotonic", return_value=111.0):
+        assert cache.get("k1") is None
+
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["bytes"] == 0
+
+
+@pytest.mark.unit
+def test_large_results_are_compressed():
+    """Test that results above the threshold are stored compressed and round-trip."""
+    cache = QueryResultCache(max_bytes=10**7, ttl_seconds=60, compress_min_bytes=1024)
+    result = _rows(500)
+
+    cache.put("k1", result)
+
+    assert cache.get("k1") == result
+    stats = cache.stats()
+    assert stats["compression"] in ("zstd", "zlib")
+    assert stats["compression_ratio"] > 2
+    assert stats["bytes"] < len(query_cache_module.json.dumps(result))
+
+
+@pytest.mark.unit
+def test_canonical_key_ignores_member_and_filter_value_order():
+    """Test that equivalent queries share a key while sort priority still matters."""
+    first = CubeQuery(
+        measures=["PressOperations.count", "PressOperations.passRate"],
+        filters=[{"member": "PressOperations.shiftId", "operator": "equals", "values": ["SHIFT_B", "SHIFT_A"]}],
+        order={"PressOperations.count": "desc", "PressOperations.passRate": "asc"},
+    )
+    second = CubeQuery(
+        measures=["PressOperations.passRate", "PressOperations.count"],
+        filters=[{"member": "PressOperations.shiftId", "operator": "equals", "values": ["SHIFT_A", "SHIFT_B"]}],
+        order={"PressOperations.count": "desc", "PressOperations.passRate": "asc"},
+        limit=None,
+    )
+    reordered = second.model_copy(update={"order": {"PressOperations.passRate": "asc", "PressOperations.count": "desc"}})
+
+    assert canonical_query_key(first) == canonical_query_key(second)
+    assert canonical_query_key(first) != canonical_query_key(reordered)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_client_serves_repeated_queries_from_cache_until_data_version_changes():
+    """Test that CubeJSClient only reaches Cube.js once per query and data version."""
+    client = CubeJSClient()
+    response = MagicMock()
+    response.json.return_value = _rows(3)
+    http_client = AsyncMock()
+    http_client.post.return_value = response
+    query = CubeQuery(measures=["PressOperations.defectCount"], dimensions=["PressOperations.operatorId"])
+
+    with patch.object(client, "http_client", return_value=http_client):
+        await client.execute_query(query)
+        assert await client.execute_query(query.model_copy()) == _rows(3)
+        assert http_client.post.await_count == 1
+
+        data_version.bump()
+        await client.execute_query(query)
+        assert http_client.post.await_count == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_client_does_not_cache_error_payloads():
+    """Test that error bodies are raised, not cached."""
+    client = CubeJSClient()
+    response = MagicMock()
+    response.json.return_value = {"error": "Unknown member: PressOperations.nope"}
+    http_client = AsyncMock()
+    http_client.post.return_value = response
+
+    with patch.object(client, "http_client", return_value=http_client):
+        with pytest.raises(ValueError, match="Unknown member"):
+            await client.execute_query(CubeQuery(measures=["PressOperations.nope"]))
+
+    assert client.cache.stats()["entries"] == 0
@@ -0,0 +1,117 @@
+"""Unit tests for batch Cube.js query deduplication and speculative queries."""
+import pytest
+import asyncio
+import sys
+from pathlib import Path
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from models import CubeQuery
+from cubejs_client import canonical_query_key
+from query_dedupe import BatchQueryDeduplicator, SpeculativeQueryStore
+
+
+def _counting_fetch(calls):
+    """Build a fetch factory that counts Cube.js requests."""
+    async def fetch():
+        calls.append(True)
+        await asyncio.sleep(0.01)
+        return {"data": [{"PressOperations.avgOee": 82.1}]}
+    return fetch
+
+
+@pytest.mark.unit
+def test_canonical_key_ignores_member_order():
+    """Test that reordered measures and dimensions produce the same key."""
+    first = CubeQuery(
+        measures=["PressOperations.avgOee", "PressOperations.count"],
+        dimensions=["PressOperations.pressLineId", "PressOperations.shift"],
+    )
+    second = CubeQuery(
+        measures=["PressOperations.count", "PressOperations.avgOee"],
+        dimensions=["PressOperations.shift", "PressOperations.pressLineId"],
+    )
+    other = CubeQuery(measures=["PressOperations.count"])
+
+    assert canonical_query_key(first) == canonical_query_key(second)
+    assert canonical_query_key(first) != canonical_query_key(other)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_identical_queries_in_batch_run_once():
+    """Test that concurrent identical queries in one batch share a single request."""
+    deduplicator = BatchQueryDeduplicator()
+    deduplicator.open_batch("batch-1")
+    calls = []
+    query = CubeQuery(measures=["PressOperations.avgOee"])
+
+    results = await asyncio.gather(*[
+        deduplicator.execute("batch-1", query, _counting_fetch(calls))
+        for _ in range(5)
+    ])
+
+    assert len(calls) == 1
+    assert all(result == results[0] for result in results)
+    assert deduplicator.close_batch("batch-1") == 4
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_queries_outside_a_batch_are_not_shared():
+    """Test that requests without an open batch execute independently."""
+    deduplicator = BatchQueryDeduplicator()
+    calls = []
+    query = CubeQuery(measures=["PressOperations.avgOee"])
+
+    await deduplicator.execute("", query, _counting_fetch(calls))
+    await deduplicator.execute("closed-batch", query, _counting_fetch(calls))
+
+    assert len(calls) == 2
+
+
+@pytest.mark.unit
+def test_speculative_query_reused_when_query_matches():
+    """Test that the real query claims the speculative request when they are the same."""
+    store = SpeculativeQueryStore()
+    calls = []
+    predicted = CubeQuery(measures=["PressOperations.avgOee", "PressOperations.count"])
+    built = CubeQuery(measures=["PressOperations.count", "PressOperations.avgOee"])
+
+    assert store.start("req-1", predicted, _counting_fetch(calls))
+    future = store.claim("req-1", built)
+
+    assert future is not None
+    assert future.result(timeout=2) == {"data": [{"PressOperations.avgOee": 82.1}]}
+    assert len(calls) == 1
+    assert store.stats()["hits"] == 1
+
+
+@pytest.mark.unit
+def test_mismatched_speculation_is_cancelled():
+    """Test that a wrong prediction is discarded rather than reused."""
+    store = SpeculativeQueryStore()
+
+    async def slow_fetch():
+        await asyncio.sleep(10)
+
+    store.start("req-1", CubeQuery(measures=["PressOperations.avgOee"]), slow_fetch)
+    future = store._entries["req-1"][1]
+
+    assert store.claim("req-1", CubeQuery(measures=["PressOperations.defectCount"])) is None
+    assert future.cancelled()
+    assert store.stats()["misses"] == 1
+
+
+@pytest.mark.unit
+def test_speculation_after_claim_is_not_sent():
+    """Test that a prediction arriving after the real query was built does not query Cube.js."""
+    store = SpeculativeQueryStore()
+    calls = []
+    query = CubeQuery(measures=["PressOperations.avgOee"])
+
+    assert store.claim("req-1", query) is None
+    assert not store.start("req-1", query, _counting_fetch(calls))
+    assert calls == []
@@ -0,0 +1,133 @@
+"""Unit tests for the rule-based query parser."""
+import pytest
+import sys
+from pathlib import Path
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from query_parser import parse_query
+from analytics_specialist import METRIC_MAPPING, DIMENSION_MAPPING
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("message,metrics,dimensions,cube", [
+    ("OEE by shift", ["avgOee"], ["shift_id"], "PressOperations"),
+    ("defect count by operator", ["defect_count"], ["operator_id"], "PressOperations"),
+    ("Show me OEE by press line", ["avgOee"], ["press_line_id"], "PressLineUtilization"),
+    ("Total cost per part family", ["total_cost"], ["part_family"], "PartFamilyPerformance"),
+    ("Defects by part family", ["defect_count"], ["part_family"], "PressOperations"),
+])
+def test_parses_metric_and_breakdown(message, metrics, dimensions, cube):
+    """Test that simple metric-by-dimension questions are fully understood."""
+    enrichment, confidence = parse_query(message)
+
+    assert confidence == 1.0
+    assert enrichment["metrics"] == metrics
+    assert enrichment["dimensions"] == dimensions
+    assert enrichment["cube_recommendation"] == cube
+
+
+@pytest.mark.unit
+def test_part_family_and_press_line_become_filters():
+    """Test that entities from EntityTracker vocabulary are mapped to filters."""
+    enrichment, confidence = parse_query("pass rate for Door_Outer_Left")
+    assert confidence == 1.0
+    assert enrichment["part_families"] == ["Door_Outer_Left"]
+    assert enrichment["dimensions"] == []
+
+    enrichment, confidence = parse_query("cycle time for line B by shift")
+    assert confidence == 1.0
+    assert enrichment["filters"] == {"press_line_id": "LINE_B_1200T"}
+    assert enrichment["dimensions"] == ["shift_id"]
+
+    enrichment, confidence = parse_query("What is the OEE on line A")
+    assert confidence == 1.0
+    assert enrichment["filters"] == {"press_line_id": "LINE_A_800T"}
+
+
+@pytest.mark.unit
+def test_several_press_lines_or_part_families_are_broken_down():
+    """Test that comparing entities keeps every one of them, one row each."""
+    enrichment, confidence = parse_query("compare OEE of line A and line B")
+    assert confidence == 1.0
+    assert enrichment["filters"] == {"press_line_id": ["LINE_A_800T", "LINE_B_1200T"]}
+    assert enrichment["dimensions"] == ["press_line_id"]
+    assert enrichment["cube_recommendation"] == "PressLineUtilization"
+
+    enrichment, confidence = parse_query("compare pass rate of Door_Outer_Left and Bonnet_Outer")
+    assert confidence == 1.0
+    assert enrichment["part_families"] == ["Door_Outer_Left", "Bonnet_Outer"]
+    assert enrichment["dimensions"] == ["part_family"]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("message", [
+    "What's the weather?",
+    "What data do you have?",
+    "OEE trend last week",
+    "Show springback defects by shift",
+])
+def test_unsupported_questions_have_zero_confidence(message):
+    """Test that out-of-scope or unsupported questions are left to the LLM."""
+    enrichment, confidence = parse_query(message)
+
+    assert enrichment is None
+    assert confidence == 0.0
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("message", [
+    "show me defects excluding line A",
+    "defects not on LINE_B",
+    "OEE except line B",
+    "pass rate without Bonnet_Outer",
+    "OEE by shift other than line A",
+    "defects that aren't on line A",
+])
+def test_negated_questions_are_left_to_the_llm(message):
+    """Test that negations, which the parser would invert, get zero confidence."""
+    assert parse_query(message) == (None, 0.0)
+
+
+@pytest.mark.unit
+def test_generic_count_is_dropped_next_to_a_specific_metric():
+    """Test that "count of defects" asks for the defect count only."""
+    enrichment, confidence = parse_query("count of defects")
+
+    assert confidence == 1.0
+    assert enrichment["metrics"] == ["defect_count"]
+
+
+@pytest.mark.unit
+def test_weekend_is_a_filter_unless_it_is_the_breakdown():
+    """Test that "for weekend" restricts the data while "by weekend" groups it."""
+    enrichment, confidence = parse_query("OEE by shift for weekend")
+    assert confidence == 1.0
+    assert enrichment["dimensions"] == ["shift_id"]
+    assert enrichment["filters"] == {"is_weekend": "true"}
+
+    enrichment, _ = parse_query("defect count on weekdays")
+    assert enrichment["filters"] == {"is_weekend": "false"}
+
+    enrichment, _ = parse_query("OEE by weekend")
+    assert enrichment["dimensions"] == ["is_weekend"]
+    assert enrichment["filters"] == {}
+
+
+@pytest.mark.unit
+def test_unexplained_words_lower_confidence():
+    """Test that confidence drops when words are not accounted for."""
+    _, confidence = parse_query("Why did defects spike on LINE_A?")
+    assert 0.0 < confidence < 0.8
+
+
+@pytest.mark.unit
+def test_output_keys_exist_in_mapping_tables():
+    """Test that every parsed metric and dimension maps onto the chosen cube."""
+    for message in ["OEE by shift", "Rework by line", "Availability per die", "Yield by part family"]:
+        enrichment, _ = parse_query(message)
+        cube = enrichment["cube_recommendation"]
+        assert all(m in METRIC_MAPPING[cube] for m in enrichment["metrics"])
+        assert all(d in DIMENSION_MAPPING[cube] for d in enrichment["dimensions"])
@@ -0,0 +1,248 @@
+"""Unit tests for Report Writer Agent."""
+import pytest
+import sys
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+from praval import Spore
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+import report_writer
+from report_writer import ReportWriterAgent, report_writer_handler
+
+
+def _make_spore(knowledge):
+    """Build a Spore carrying the given knowledge."""
+    return Spore(
+        id="test-spore",
+        spore_type="broadcast",
+        from_agent="test",
+        to_agent=None,
+        knowledge=knowledge,
+        created_at=None,
+    )
+
+
+async def _echo_narrative(self, chart_spec, insights, session_id, request_id="", deadline=None,
+                          measures=None, dimensions=None, on_delta=None):
+    """Stand-in for compose_narrative that echoes the correlated inputs."""
+    return {
+        "type": "final_response_ready",
+        "narrative": insights["observations"][0]["text"],
+        "chart_spec": chart_spec,
+        "follow_ups": [],
+        "session_id": session_id,
+        "request_id": request_id,
+    }
+
+
+@pytest.mark.unit
+def test_concurrent_requests_in_one_session_do_not_collide():
+    """Test that chart and insights are joined on request_id, not session_id."""
+    broadcasts = []
+
+    with patch.object(report_writer, "broadcast", side_effect=broadcasts.append), \
+         patch.object(ReportWriterAgent, "compose_narrative", _echo_narrative), \
+         patch.object(report_writer, "_request_data", {}):
+
+        for request_id, chart_type in [("req-1", "bar"), ("req-2", "line")]:
+            report_writer_handler(_make_spore({
+                "type": "chart_ready",
+                "chart_type": chart_type,
+                "chart_spec": {"type": chart_type},
+                "session_id": "shared-session",
+                "request_id": request_id,
+            }))
+
+        for request_id in ["req-2", "req-1"]:
+            report_writer_handler(_make_spore({
+                "type": "insights_ready",
+                "observations": [{"text": f"insight for {request_id}"}],
+                "anomalies": [],
+                "root_causes": [],
+                "session_id": "shared-session",
+                "request_id": request_id,
+            }))
+
+    by_request = {b["request_id"]: b for b in broadcasts}
+    assert set(by_request) == {"req-1", "req-2"}
+    assert by_request["req-1"]["chart_spec"] == {"type": "bar"}
+    assert by_request["req-1"]["narrative"] == "insight for req-1"
+    assert by_request["req-2"]["chart_spec"] == {"type": "line"}
+    assert by_request["req-2"]["narrative"] == "insight for req-2"
+
+
+@pytest.mark.unit
+def test_waits_for_both_chart_and_insights():
+    """Test that nothing is composed until both Spores have arrived."""
+    with patch.object(report_writer, "broadcast") as mock_broadcast, \
+         patch.object(ReportWriterAgent, "compose_narrative", new_callable=AsyncMock) as mock_compose, \
+         patch.object(report_writer, "_request_data", {}) as request_data:
+
+        report_writer_handler(_make_spore({
+            "type": "chart_ready",
+            "chart_type": "bar",
+            "chart_spec": {"type": "bar"},
+            "session_id": "session-1",
+            "request_id": "req-1",
+        }))
+
+    mock_compose.assert_not_called()
+    mock_broadcast.assert_not_called()
+    assert "req-1" in request_data
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_compose_narrative_uses_fallback_when_deadline_budget_low():
+    """Test that an exhausted deadline returns the deterministic narrative."""
+    writer = ReportWriterAgent()
+    insights = {
+        "observations": [{"text": "LINE_A OEE is 82.1%", "confidence": 0.9}],
+        "anomalies": [],
+        "root_causes": [],
+    }
+
+    with patch.object(writer.client.chat.completions, "create", new_callable=AsyncMock) as mock_create:
+        response = await writer.compose_narrative(
+            chart_spec={"type": "bar"},
+            insights=insights,
+            session_id="session-1",
+            request_id="req-1",
+            deadline=time.time() + 1,
+        )
+
+    mock_create.assert_not_called()
+    assert "LINE_A OEE is 82.1%" in response["narrative"]
+    assert response["request_id"] == "req-1"
+    assert response["cacheable"] is False
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("insights_degraded,llm_error,cacheable", [
+    (False, None, True),
+    (True, None, False),
+    (False, Exception("API Error"), False),
+])
+async def test_compose_narrative_marks_degraded_answers_uncacheable(insights_degraded, llm_error, cacheable):
+    """Test that only narratives of real insights may be cached."""
+    writer = ReportWriterAgent()
+    insights = {"observations": [], "anomalies": [], "root_causes": [], "degraded": insights_degraded}
+
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = "No notable findings."
+
+    with patch.object(writer.client.chat.completions, "create", new_callable=AsyncMock,
+                      return_value=mock_response, side_effect=llm_error):
+        response = await writer.compose_narrative(chart_spec={"type": "bar"}, insights=insights, session_id="session-1")
+
+    assert response["narrative"]
+    assert response["cacheable"] is cacheable
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_compose_narrative_makes_a_single_llm_call():
+    """Test that follow-ups come without a second, sequential LLM round trip."""
+    writer = ReportWriterAgent()
+    insights = {
+        "observations": [{"text": "LINE_A OEE is 82.1%", "confidence": 0.9}],
+        "anomalies": [],
+        "root_causes": [],
+    }
+
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = "🔍 Key Findings:\n• LINE_A OEE is 82.1%"
+
+    with patch.object(writer.client.chat.completions, "create", new_callable=AsyncMock, return_value=mock_response) as mock_create:
+        response = await writer.compose_narrative(
+            chart_spec={"type": "bar"},
+            insights=insights,
+            session_id="session-1",
+            request_id="req-1",
+            measures=["PressLineUtilization.overallAvgOee"],
+            dimensions=["PressLineUtilization.pressLineId"],
+        )
+
+    mock_create.assert_called_once()
+    assert len(response["follow_ups"]) == 3
+    assert "Break down OEE by shift" in response["follow_ups"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_compose_narrative_streams_deltas():
+    """Test that a streamed completion forwards each delta and returns the assembled text."""
+    writer = ReportWriterAgent()
+    insights = {
+        "observations": [{"text": "LINE_A OEE is 82.1%", "confidence": 0.9}],
+        "anomalies": [],
+        "root_causes": [],
+    }
+
+    def chunk(content):
+        mock_chunk = MagicMock()
+        mock_chunk.choices = [MagicMock()]
+        mock_chunk.choices[0].delta.content = content
+        return mock_chunk
+
+    usage_chunk = MagicMock()
+    usage_chunk.choices = []
+
+    async def completion_stream():
+        for item in (chunk("🔍 Key Findings:\n"), chunk(None), chunk("• LINE_A leads"), usage_chunk):
+            yield item
+
+    deltas = []
+    with patch.object(writer.client.chat.completions, "create", new_callable=AsyncMock, return_value=completion_stream()) as mock_create:
+        response = await writer.compose_narrative(
+            chart_spec={"type": "bar"},
+            insights=insights,
+            session_id="session-1",
+            request_id="req-1",
+            on_delta=deltas.append,
+        )
+
+    assert mock_create.call_args.kwargs["stream"] is True
+    assert deltas == ["🔍 Key Findings:\n", "• LINE_A leads"]
+    assert response["narrative"] == "🔍 Key Findings:\n• LINE_A leads"
+
+
+@pytest.mark.unit
+def test_handler_relays_narrative_deltas_to_open_stream():
+    """Test that narrative deltas are published only when a streaming client is listening."""
+    async def streaming_narrative(self, chart_spec, insights, session_id, request_id="", deadline=None,
+                                  measures=None, dimensions=None, on_delta=None):
+        if on_delta is not None:
+            on_delta("LINE_A ")
+            on_delta("leads")
+        return await _echo_narrative(self, chart_spec, insights, session_id, request_id)
+
+    with patch.object(report_writer, "broadcast"), \
+         patch.object(report_writer, "_request_data", {}), \
+         patch.object(ReportWriterAgent, "compose_narrative", streaming_narrative), \
+         patch.object(report_writer.response_registry, "has_stream", return_value=True), \
+         patch.object(report_writer.response_registry, "publish") as mock_publish:
+        report_writer_handler(_make_spore({
+            "type": "chart_ready",
+            "chart_spec": {"type": "bar"},
+            "session_id": "session-1",
+            "request_id": "req-stream",
+        }))
+        report_writer_handler(_make_spore({
+            "type": "insights_ready",
+            "observations": [{"text": "LINE_A leads"}],
+            "session_id": "session-1",
+            "request_id": "req-stream",
+        }))
+
+    assert [c.args for c in mock_publish.call_args_list] == [
+        ("req-stream", "narrative_delta", {"delta": "LINE_A "}),
+        ("req-stream", "narrative_delta", {"delta": "leads"}),
+    ]
@@ -0,0 +1,83 @@
+"""Unit tests for the final-answer response cache."""
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+import response_cache as response_cache_module
+from response_cache import ResponseCache, cache_key, normalize_question
+from data_version import DataVersion
+
+
+@pytest.mark.unit
+def test_normalize_question_ignores_case_spacing_and_punctuation():
+    """Test that trivially different phrasings share a key."""
+    assert normalize_question("  OEE by   press line? ") == "oee by press line"
+    assert cache_key("OEE by press line", [], "v1") == cache_key("oee BY press line!", [], "v1")
+
+
+@pytest.mark.unit
+def test_key_changes_with_context_and_data_version():
+    """Test that context and data version are part of the key."""
+    context = [{"role": "user", "content": "Show me LINE_A"}]
+
+    assert cache_key("OEE by press line", [], "v1") != cache_key("OEE by press line", context, "v1")
+    assert cache_key("OEE by press line", [], "v1") != cache_key("OEE by press line", [], "v2")
+
+
+@pytest.mark.unit
+def test_get_returns_stored_response_and_counts_hits():
+    """Test basic hit/miss accounting."""
+    cache = ResponseCache(max_entries=4, ttl_seconds=60)
+    cache.put("k1", {"narrative": "answer"})
+
+    assert cache.get("k1") == {"narrative": "answer"}
+    assert cache.get("k2") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+@pytest.mark.unit
+def test_least_recently_used_entry_is_evicted():
+    """Test that the cache stays within max_entries."""
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.put("k1", {"narrative": "one"})
+    cache.put("k2", {"narrative": "two"})
+    cache.get("k1")
+    cache.put("k3", {"narrative": "three"})
+
+    assert cache.get("k2") is None
+    assert cache.get("k1") is not None
+    assert cache.get("k3") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.unit
+def test_expired_entry_is_a_miss():
+    """Test that entries are not served after their TTL."""
+    cache = ResponseCache(max_entries=2, ttl_seconds=10)
+
+    with patch.object(response_cache_module.time, "monotonic", return_value=100.0):
+        cache.put("k1", {"narrative": "answer"})
+    with patch.object(response_cache_module.time, "monotonic", return_value=111.0):
+        assert cache.get("k1") is None
+
+    assert cache.stats()["expirations"] == 1
+
+
+@pytest.mark.unit
+def test_data_version_bump_changes_token():
+    """Test that bumping the data version produces a new token."""
+    version = DataVersion()
+    initial = version.token
+
+    assert version.bump("dbt-run-42") == "dbt-run-42"
+    assert version.token != initial
+    assert version.info()["data_version"] == "dbt-run-42"
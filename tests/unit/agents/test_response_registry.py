@@ -0,0 +1,69 @@
+"""Unit tests for the response completion registry."""
+import pytest
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from response_registry import ResponseRegistry
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_resolve_from_worker_thread_wakes_waiter():
+    """Test that a response produced on another thread resolves the Future."""
+    registry = ResponseRegistry()
+    future = registry.register("session-1")
+
+    worker = threading.Thread(
+        target=registry.resolve,
+        args=("session-1", {"narrative": "done"})
+    )
+    worker.start()
+
+    result = await asyncio.wait_for(future, timeout=1.0)
+    worker.join()
+
+    assert result == {"narrative": "done"}
+    assert registry.pending_count() == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_resolve_without_waiter_returns_false():
+    """Test that responses for unknown keys are dropped."""
+    registry = ResponseRegistry()
+
+    assert registry.resolve("unknown", {"narrative": "late"}) is False
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_resolve_is_idempotent():
+    """Test that a second resolve for the same key is ignored."""
+    registry = ResponseRegistry()
+    future = registry.register("session-1")
+
+    assert registry.resolve("session-1", {"narrative": "first"}) is True
+    assert registry.resolve("session-1", {"narrative": "second"}) is False
+
+    result = await asyncio.wait_for(future, timeout=1.0)
+    assert result["narrative"] == "first"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_discard_removes_waiter():
+    """Test that discarding a timed-out waiter frees the slot."""
+    registry = ResponseRegistry()
+    registry.register("session-1")
+    assert registry.pending_count() == 1
+
+    registry.discard("session-1")
+
+    assert registry.pending_count() == 0
+    assert registry.resolve("session-1", {"narrative": "late"}) is False
@@ -0,0 +1,211 @@
+"""Unit tests for the cached Cube.js schema registry."""
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add agents directory to path
+agents_dir = Path(__file__).parent.parent.parent.parent / "agents"
+sys.path.insert(0, str(agents_dir))
+
+from cubejs_client import CubeJSClient
+from models import CubeQuery
+from schema_registry import SchemaRegistry
+
+META = {
+    "cubes": [
+        {
+            "name": "PressOperations",
+            "measures": [
+                {"name": "PressOperations.count", "type": "number", "title": "Count"},
+                {"name": "PressOperations.passRate", "type": "number"},
+            ],
+            "dimensions": [
+                {"name": "PressOperations.shiftId", "type": "string"},
+                {"name": "PressOperations.productionDate", "type": "time"},
+            ],
+            "segments": [],
+        },
+        {"name": "PartFamilyPerformance", "measures": [{"name": "avgOee", "type": "number"}], "dimensions": []},
+    ]
+}
+
+
+def _client(*results):
+    """A client whose fetch_meta returns (or raises) the given results in turn."""
+    client = MagicMock()
+    client.fetch_meta = AsyncMock(side_effect=list(results))
+    return client
+
+
+@pytest.mark.unit
+def test_lookups_use_prebuilt_indexes():
+    """Test cube, measure, dimension and member-type lookups."""
+    registry = SchemaRegistry(client=MagicMock())
+    registry.load(META)
+
+    assert registry.cube_names() == ["PressOperations", "PartFamilyPerformance"]
+    assert registry.measures("PressOperations") == ["PressOperations.count", "PressOperations.passRate"]
+    assert registry.dimensions("PressOperations") == ["PressOperations.shiftId", "PressOperations.productionDate"]
+    assert registry.measures("PartFamilyPerformance") == ["PartFamilyPerformance.avgOee"]
+    assert registry.measures("Unknown") == []
+    assert registry.member_type("PressOperations.productionDate") == "time"
+    assert registry.member("PressOperations.count")["kind"] == "measure"
+    assert registry.member("PressOperations.nope") is None
+
+
+@pytest.mark.unit
+def test_unchanged_schema_is_not_rebuilt():
+    """Test that reloading an identical document keeps the existing indexes."""
+    registry = SchemaRegistry(client=MagicMock())
+
+    assert registry.load(META) is True
+    assert registry.load({"cubes": list(META["cubes"])}) is False
+    assert registry.status()["rebuilds"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_refresh_sends_etag_and_keeps_schema_on_not_modified():
+    """Test that a 304 keeps the cached schema without rebuilding."""
+    client = _client((META, '"v1"'), (None, '"v1"'))
+    registry = SchemaRegistry(client=client)
+
+    assert await registry.refresh() is True
+    assert await registry.refresh() is True
+
+    assert client.fetch_meta.await_args_list[0].kwargs == {"etag": None}
+    assert client.fetch_meta.await_args_list[1].kwargs == {"etag": '"v1"'}
+    status = registry.status()
+    assert status["cubes"] == 2
+    assert status["rebuilds"] == 1
+    assert status["refreshes"] == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_last_schema_and_reports_disconnected():
+    """Test that a failed fetch is reported but the cached schema stays usable."""
+    registry = SchemaRegistry(client=_client((META, None), ConnectionError("Cube.js down")))
+    await registry.refresh()
+
+    assert await registry.refresh() is False
+
+    assert registry.connected is False
+    assert registry.measures("PressOperations")
+    status = registry.status()
+    assert status["last_error"] == "Cube.js down"
+    assert status["failures"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_ensure_loaded_fetches_only_once():
+    """Test that ensure_loaded hits /meta only while nothing is cached."""
+    client = _client((META, None))
+    registry = SchemaRegistry(client=client)
+
+    assert await registry.ensure_loaded() is True
+    assert await registry.ensure_loaded() is True
+    assert client.fetch_meta.await_count == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_background_refresh_runs_until_stopped():
+    """Test that the background task refreshes on the interval and stops cleanly."""
+    client = MagicMock()
+    client.fetch_meta = AsyncMock(return_value=(META, None))
+    registry = SchemaRegistry(client=client)
+
+    with patch("schema_registry.settings.schema_refresh_interval_seconds", 0), \
+         patch("schema_registry.settings.schema_refresh_retry_seconds", 0):
+        registry.start_background_refresh()
+        registry.start_background_refresh()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        await registry.stop_background_refresh()
+
+    refreshes = client.fetch_meta.await_count
+    assert refreshes >= 1
+    await asyncio.sleep(0)
+    assert client.fetch_meta.await_count == refreshes
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_fetch_meta_returns_none_on_not_modified():
+    """Test the conditional /meta request of CubeJSClient."""
+    client = CubeJSClient()
+    response = MagicMock(status_code=304, headers={"ETag": '"v1"'})
+    http_client = AsyncMock()
+    http_client.get.return_value = response
+
+    with patch.object(client, "http_client", return_value=http_client):
+        assert await client.fetch_meta(etag='"v1"') == (None, '"v1"')
+
+    assert http_client.get.await_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+
+
+@pytest.mark.unit
+def test_validate_query_accepts_schema_members():
+    """Test that a query using existing members passes."""
+    registry = SchemaRegistry(client=MagicMock())
+    registry.load(META)
+
+    registry.validate_query(CubeQuery(
+        measures=["PressOperations.passRate"],
+        dimensions=["PressOperations.shiftId"],
+        filters=[{"or": [
+            {"member": "PressOperations.shiftId", "operator": "equals", "values": ["SHIFT_A"]},
+            {"member": "PressOperations.count", "operator": "set"},
+        ]}],
+        timeDimensions=[{"dimension": "PressOperations.productionDate", "granularity": "week"}],
+        order={"PressOperations.passRate": "desc"},
+    ))
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("query,message", [
+    (CubeQuery(measures=["PressOperations.passRat"]),
+     "Invalid measure 'PressOperations.passRat': PressOperations has no such measure "
+     "\\(did you mean 'PressOperations.passRate'\\?\\)"),
+    (CubeQuery(measures=["PressOperations.shiftId"]), "Invalid measure 'PressOperations.shiftId': it is a dimension"),
+    (CubeQuery(dimensions=["Scrap.reason"]), "unknown cube 'Scrap'"),
+    (CubeQuery(measures=["count"]), "expected 'Cube.member'"),
+    (CubeQuery(filters=[{"member": "PressOperations.shiftId", "operator": "is", "values": ["A"]}]),
+     "unknown operator 'is'"),
+    (CubeQuery(filters=[{"member": "PressOperations.shiftId", "operator": "equals"}]), "needs values"),
+    (CubeQuery(timeDimensions=[{"dimension": "PressOperations.shiftId"}]), "type is string, not time"),
+    (CubeQuery(timeDimensions=[{"dimension": "PressOperations.productionDate", "granularity": "fortnight"}]),
+     "unknown granularity 'fortnight'"),
+    (CubeQuery(measures=["PressOperations.count"], order={"PressOperations.oee": "desc"}), "Invalid order member"),
+])
+def test_validate_query_rejects_with_precise_error(query, message):
+    """Test that each kind of schema mismatch names the offending member."""
+    registry = SchemaRegistry(client=MagicMock())
+    registry.load(META)
+
+    with pytest.raises(ValueError, match=message):
+        registry.validate_query(query)
+
+
+@pytest.mark.unit
+def test_validate_query_is_skipped_without_schema():
+    """Test that nothing is rejected before a schema is loaded."""
+    SchemaRegistry(client=MagicMock()).validate_query(CubeQuery(measures=["Anything.atAll"]))
+
+
+@pytest.mark.unit
+def test_listeners_run_when_schema_changes():
+    """Test that listeners run on a new schema and on clear, not on an unchanged reload."""
+    registry = SchemaRegistry(client=MagicMock())
+    listener = MagicMock()
+    registry.add_listener(listener)
+
+    registry.load(META)
+    registry.load(META)
+    registry.clear()
+
+    assert listener.call_count == 2
@@ -2,6 +2,7 @@
 import pytest
 import sys
 import json
+import time
 from pathlib import Path
 from unittest.mock import AsyncMock, patch, MagicMock
 
@@ -178,3 +179,87 @@ def test_generate_chart_spec_table():
     assert spec["type"] == "table"
     # Table should have columns and rows structure
     assert "columns" in spec or "rows" in spec or "data" in spec
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_determine_chart_type_skips_llm_when_deadline_budget_low():
+    """Test that an exhausted deadline falls back to the row-count heuristic."""
+    agent = VisualizationSpecialistAgent()
+
+    data = [{"PressOperations.partFamily": f"Part_{i}", "PressOperations.count": i} for i in range(5)]
+    metadata = {"row_count": 5, "column_count": 2, "has_time_series": False}
+
+    with patch.object(agent.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+        chart_type = await agent.determine_chart_type(
+            data, ["PressOperations.count"], ["PressOperations.partFamily"], metadata,
+            deadline=time.time() + 0.5
+        )
+
+    assert chart_type == "bar"
+    mock_create.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_determine_chart_type_rules_settle_time_series_without_llm():
+    """Test that a time-series shape is charted as a line without an LLM call."""
+    agent = VisualizationSpecialistAgent()
+
+    data = [{"PressOperations.productionDate": f"2024-01-0{i}", "PressOperations.avgOee": 80 + i} for i in range(1, 8)]
+    metadata = {"row_count": 7, "column_count": 2, "has_time_series": True}
+
+    with patch.object(agent.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+        chart_type = await agent.determine_chart_type(data, ["PressOperations.avgOee"], [], metadata)
+
+    assert chart_type == "line"
+    mock_create.assert_not_called()
+    assert agent.rule_stats()["rule_decisions"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_determine_chart_type_ambiguous_shape_uses_llm():
+    """Test that shapes the rules cannot settle still go to the LLM."""
+    agent = VisualizationSpecialistAgent()
+
+    data = [
+        {"PressOperations.dieId": f"DIE_{i}", "PressOperations.avgOee": 80, "PressOperations.defectCount": i}
+        for i in range(4)
+    ]
+    measures = ["PressOperations.avgOee", "PressOperations.defectCount"]
+    metadata = {"row_count": 4, "column_count": 3, "has_time_series": False}
+
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = json.dumps({"chart_type": "table", "reasoning": "Two measures"})
+
+    with patch.object(agent.client.chat.completions, 'create', new_callable=AsyncMock, return_value=mock_response) as mock_create:
+        chart_type = await agent.determine_chart_type(data, measures, ["PressOperations.dieId"], metadata)
+
+    assert chart_type == "table"
+    mock_create.assert_called_once()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_determine_chart_type_shadow_mode_measures_agreement():
+    """Test that shadow mode asks the LLM and records whether the rules agreed."""
+    agent = VisualizationSpecialistAgent()
+
+    data = [{"PressOperations.avgOee": 85.5}]
+    metadata = {"row_count": 1, "column_count": 1}
+
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = json.dumps({"chart_type": "kpi", "reasoning": "Single value"})
+
+    with patch("visualization_specialist.settings.chart_rules_mode", "shadow"), \
+         patch.object(agent.client.chat.completions, 'create', new_callable=AsyncMock, return_value=mock_response) as mock_create:
+        chart_type = await agent.determine_chart_type(data, ["PressOperations.avgOee"], [], metadata)
+        stats = agent.rule_stats()
+
+    assert chart_type == "kpi"
+    mock_create.assert_called_once()
+    assert stats["shadow_comparisons"] == 1
+    assert stats["shadow_agreement_rate"] == 1.0